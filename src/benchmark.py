@@ -0,0 +1,538 @@
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+from collections import OrderedDict
+from timeit import default_timer
+
+import numpy as np
+
+import actions
+import cell_types
+import directions
+import environment
+import generate_world
+import reactive_agent
+from compiled_environment import CompiledEnvironment
+from navigation import IncrementalNavigator, Navigator
+from tournament import agent_logger
+from vec_environment import VecEnvironment
+
+"""
+The seed the benchmark worlds are made from, so every run measures the
+same worlds.
+"""
+CORPUS_SEED = 0
+
+"""
+How many worlds each benchmark is run over.
+"""
+CORPUS_WORLDS = 20
+
+"""
+How much slower than the baseline a benchmark may get before compare
+counts it as a regression, as a fraction of the baseline.
+"""
+REGRESSION_THRESHOLD = 0.2
+
+"""
+The least time each run of a benchmark takes, repeating the benchmark as
+many times as needed, so that short benchmarks are not lost in noise.
+"""
+MIN_RUN_SECONDS = 0.2
+
+"""
+The safe cell types when a navigator is given the whole board.
+"""
+SAFE_CELLS = {cell_types.EMPTY, cell_types.GOLD}
+
+
+def corpus(size, compact=False):
+    """
+    Makes the benchmark worlds of a size.
+
+    :param size: the size of the boards
+    :type size: int
+    :param compact: whether to store the boards as flat arrays of cell
+        types
+    :type compact: bool
+    :rtype: list[BoardState]
+    :returns: the same worlds each time it is called with the same size
+    """
+    return [
+        generate_world.generate_world(
+            size, 0.1, 0.1, 0.1, compact,
+            rng=generate_world.world_seed(CORPUS_SEED, index), max_size=size
+        )
+        for index in xrange(CORPUS_WORLDS)
+    ]
+
+
+def bench_generate_world(size, compact):
+    """
+    Times making the benchmark worlds.
+
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of worlds made
+    """
+    start = default_timer()
+    corpus(size, compact)
+    return default_timer() - start, CORPUS_WORLDS
+
+
+def bench_squares(method, compact):
+    """
+    Times calling a board state method with the position of every square
+    on the 25x25 benchmark worlds.
+
+    :param method: calls the method on a board state with a position
+    :type method: function
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of calls made
+    """
+    worlds = corpus(25, compact)
+    positions = [[col, row] for row in xrange(25) for col in xrange(25)]
+    start = default_timer()
+    for world in worlds:
+        for pos in positions:
+            method(world, pos)
+    return default_timer() - start, len(worlds) * len(positions)
+
+
+def get_board_percepts(world, pos):
+    world.pos = pos
+    return world.get_board_percepts()
+
+
+def cell_at(world, pos):
+    return world.cell_at(pos)
+
+
+def adj_cells(world, pos):
+    return list(world.adj_cells(pos))
+
+
+def bench_perform_action(action, calls=200, compiled=False):
+    """
+    Times performing one type of action over and over on the 25x25
+    benchmark worlds, putting the agent back where it started before
+    each one.
+
+    :param action: the action to perform
+    :type action: int
+    :param calls: how many times to perform it on each world
+    :type calls: int
+    :param compiled: whether to play in a CompiledEnvironment
+    :type compiled: bool
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of actions performed
+    """
+    make_env = CompiledEnvironment if compiled else environment.Environment
+    envs = [make_env(world) for world in corpus(25)]
+    start = default_timer()
+    for env in envs:
+        board_state = env.board_state
+        square = board_state.square
+        for _ in xrange(calls):
+            board_state.square = square
+            board_state.arrows = 1
+            env.perform_action(action)
+    return default_timer() - start, len(envs) * calls
+
+
+def bench_path_to(size):
+    """
+    Times finding a path from the agent to the gold on the benchmark
+    worlds, knowing where everything is.
+
+    :param size: the size of the boards
+    :type size: int
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of paths found
+    """
+    searches = []
+    for world in corpus(size, compact=True):
+        def is_safe(pos, world=world):
+            return (world.on_board(pos) and
+                    world.cell_at(pos).cell_type in SAFE_CELLS)
+        gold = world.cells.index(chr(cell_types.GOLD))
+        searches.append((
+            Navigator(is_safe), tuple(world.pos) + (world.direction,),
+            (gold % world.width, gold // world.width)
+        ))
+
+    start = default_timer()
+    for navigator, agent_loc, gold_loc in searches:
+        navigator.path_to(agent_loc, gold_loc)
+    return default_timer() - start, len(searches)
+
+
+def bench_replan(size, navigator_class):
+    """
+    Times replanning on the benchmark worlds while walking to the gold,
+    taking every square to be safe until the agent is next to it and sees
+    that it is not, and planning again after every action.
+
+    :param size: the size of the boards
+    :type size: int
+    :param navigator_class: the navigator to plan with
+    :type navigator_class: type
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of paths found
+    """
+    elapsed = 0
+    replans = 0
+    for world in corpus(size, compact=True):
+        unsafe = set()
+
+        def is_safe(pos, unsafe=unsafe):
+            return (0 <= pos[0] < size and 0 <= pos[1] < size and
+                    tuple(pos) not in unsafe)
+
+        navigator = navigator_class(is_safe)
+        gold = world.cells.index(chr(cell_types.GOLD))
+        gold_loc = (gold % size, gold // size)
+        pos = tuple(world.pos)
+        direction = world.direction
+        for _ in xrange(4 * size * size):
+            seen = [
+                square for square in (
+                    reactive_agent.action_result(pos, to, actions.FORWARD)[0]
+                    for to in directions.DIRECTIONS
+                )
+                if is_safe(square) and
+                world.cell_at(square).cell_type not in SAFE_CELLS
+            ]
+            if seen:
+                unsafe.update(seen)
+                navigator.squares_changed(seen)
+
+            start = default_timer()
+            path = navigator.path_to(pos + (direction,), gold_loc)
+            elapsed += default_timer() - start
+            replans += 1
+            if not path:
+                break
+            pos, direction = reactive_agent.action_result(
+                pos, direction, path[0]
+            )
+    return elapsed, replans
+
+
+def bench_episodes(size):
+    """
+    Times the reactive agent playing the benchmark worlds.
+
+    :param size: the size of the boards
+    :type size: int
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of games played
+    """
+    envs = [environment.Environment(world) for world in corpus(size, True)]
+    logger = agent_logger()
+    start = default_timer()
+    for env in envs:
+        reactive_agent.run(env, logger)
+    return default_timer() - start, len(envs)
+
+
+def bench_vec_step(games, steps=20):
+    """
+    Times stepping a batch of 10x10 games in lockstep with random
+    actions.
+
+    :param games: the number of games in the batch
+    :type games: int
+    :param steps: the number of steps to take
+    :type steps: int
+    :rtype: tuple(float, int)
+    :returns: the seconds taken and the number of actions performed
+    """
+    vec_env = VecEnvironment.from_batch(generate_world.generate_worlds(
+        games, 10, 0.1, 0.1, 0.1, rng=CORPUS_SEED
+    ))
+    rng = np.random.RandomState(CORPUS_SEED)
+    chosen = [rng.choice(actions.ACTIONS, games) for _ in xrange(steps)]
+    start = default_timer()
+    for step_actions in chosen:
+        vec_env.step(step_actions)
+    return default_timer() - start, games * steps
+
+
+def deep_size(obj, seen):
+    """
+    Measures the memory an object takes up along with everything it
+    refers to, counting each object once however often it is referred to.
+
+    :param obj: the object to measure
+    :type obj: object
+    :param seen: the ids of the objects already counted, which is added to
+    :type seen: set{int}
+    :rtype: int
+    :returns: the size in bytes of the objects not already counted
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, dict):
+        children = list(itertools.chain(obj.iterkeys(), obj.itervalues()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        children = list(obj)
+    else:
+        children = [getattr(obj, name)
+                    for name in getattr(type(obj), '__slots__', ())
+                    if hasattr(obj, name)]
+        if hasattr(obj, '__dict__'):
+            children.append(obj.__dict__)
+    return sys.getsizeof(obj) + sum(deep_size(child, seen)
+                                    for child in children)
+
+
+def memory_per_square(worlds):
+    """
+    Measures the memory a list of worlds takes up once the board percepts
+    of every square have been sensed.
+
+    :param worlds: the worlds to measure
+    :type worlds: list[BoardState]
+    :rtype: float
+    :returns: the bytes taken up per square of the worlds
+    """
+    squares = 0
+    for world in worlds:
+        height = len(world.flat_cell_types()) // world.width
+        for row in xrange(height):
+            for col in xrange(world.width):
+                world.pos = [col, row]
+                world.get_board_percept_mask()
+        squares += world.width * height
+    return deep_size(worlds, set()) / float(squares)
+
+
+def memory_benchmarks():
+    """
+    Gives every memory benchmark by name.
+
+    :rtype: OrderedDict
+    :returns: for each benchmark, a function that gives the bytes taken
+        up per square
+    """
+    found = OrderedDict()
+    for kind, compact in (('grid', False), ('compact', True)):
+        found['memory.board.{}.25'.format(kind)] = (
+            lambda compact=compact: memory_per_square(
+                corpus(25, compact)[:1]
+            )
+        )
+        found['memory.corpus.{}.25'.format(kind)] = (
+            lambda compact=compact: memory_per_square(corpus(25, compact))
+        )
+    return found
+
+
+def benchmarks():
+    """
+    Gives every benchmark by name.
+
+    :rtype: OrderedDict
+    :returns: for each benchmark, a function that runs it once and gives
+        the seconds taken and the number of operations timed
+    """
+    found = OrderedDict()
+    for size in (5, 10, 25):
+        found['generate_world.grid.{}'.format(size)] = (
+            lambda size=size: bench_generate_world(size, False)
+        )
+    for size in (25, 100, 400):
+        found['generate_world.compact.{}'.format(size)] = (
+            lambda size=size: bench_generate_world(size, True)
+        )
+    for name, method in (('get_board_percepts', get_board_percepts),
+                         ('cell_at', cell_at),
+                         ('adj_cells', adj_cells)):
+        for kind, compact in (('grid', False), ('compact', True)):
+            found['board_state.{}.{}'.format(name, kind)] = (
+                lambda method=method, compact=compact:
+                    bench_squares(method, compact)
+            )
+    for action in actions.ACTIONS:
+        name = environment.ACTION_NAME[action].replace(' ', '_')
+        found['perform_action.{}'.format(name)] = (
+            lambda action=action: bench_perform_action(action)
+        )
+        found['perform_action.compiled.{}'.format(name)] = (
+            lambda action=action: bench_perform_action(action, compiled=True)
+        )
+    for size in (25, 100):
+        found['navigator.path_to.{}'.format(size)] = (
+            lambda size=size: bench_path_to(size)
+        )
+    for kind, navigator_class in (('plain', Navigator),
+                                  ('incremental', IncrementalNavigator)):
+        found['navigator.replan.{}.100'.format(kind)] = (
+            lambda navigator_class=navigator_class:
+                bench_replan(100, navigator_class)
+        )
+    for size in (10, 25):
+        found['reactive_agent.run.{}'.format(size)] = (
+            lambda size=size: bench_episodes(size)
+        )
+    for games in (100, 10000):
+        found['vec_environment.step.{}'.format(games)] = (
+            lambda games=games: bench_vec_step(games)
+        )
+    return found
+
+
+def timed(bench):
+    """
+    Runs a benchmark until it has taken at least MIN_RUN_SECONDS, with the
+    garbage collector off as timeit does, so that collections set off by
+    earlier benchmarks are not counted.
+
+    :param bench: the benchmark to run
+    :type bench: function
+    :rtype: tuple(float, int)
+    :returns: the seconds taken per operation and the number of
+        operations timed
+    """
+    seconds = ops = 0
+    gc.collect()
+    gc.disable()
+    try:
+        while seconds < MIN_RUN_SECONDS:
+            run_seconds, run_ops = bench()
+            seconds += run_seconds
+            ops += run_ops
+    finally:
+        gc.enable()
+    return seconds / ops, ops
+
+
+def run_benchmarks(names=None, repeat=5):
+    """
+    Runs benchmarks, each several times, keeping the fastest run of each.
+    Every benchmark is run once before any is run again, so that a burst
+    of load on the machine does not spoil all the runs of one benchmark.
+
+    :param names: only run the benchmarks whose names contain one of
+        these, or None to run them all
+    :type names: list[str]
+    :param repeat: how many times to run each benchmark
+    :type repeat: int
+    :rtype: dict
+    :returns: the seconds per operation of each benchmark and the bytes
+        per square of each memory benchmark, along with the version of
+        python they ran on
+    """
+    def wanted(name):
+        return not names or any(part in name for part in names)
+
+    chosen = [(name, bench) for name, bench in benchmarks().iteritems()
+              if wanted(name)]
+    runs = [[timed(bench) for name, bench in chosen]
+            for _ in xrange(repeat)]
+
+    results = OrderedDict()
+    for (name, _), timings in zip(chosen, zip(*runs)):
+        seconds_per_op, ops = min(timings)
+        results[name] = {'seconds_per_op': seconds_per_op, 'ops': ops}
+
+    memory = OrderedDict(
+        (name, {'bytes_per_square': bench()})
+        for name, bench in memory_benchmarks().iteritems() if wanted(name)
+    )
+    return {
+        'python': platform.python_version(),
+        'benchmarks': results,
+        'memory': memory
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD,
+            section='benchmarks', measure='seconds_per_op'):
+    """
+    Compares benchmark results with a saved baseline.
+
+    :param results: benchmark results, as given by run_benchmarks
+    :type results: dict
+    :param baseline: earlier benchmark results
+    :type baseline: dict
+    :param threshold: how much slower a benchmark may get before it
+        counts as a regression, as a fraction of the baseline
+    :type threshold: float
+    :param section: the benchmarks to compare, 'benchmarks' or 'memory'
+    :type section: str
+    :param measure: what to compare of each, 'seconds_per_op' or
+        'bytes_per_square'
+    :type measure: str
+    :rtype: list[tuple(str, float, float, float, bool)]
+    :returns: for each benchmark in both, its name, its measure in the
+        baseline and now, how many times larger it is, and whether that
+        is a regression. A measure of 0 in the baseline gives a ratio of 1
+        if it is still 0, or infinity, and a regression, if it has grown.
+    """
+    compared = []
+    saved = baseline.get(section, {})
+    for name, result in results[section].iteritems():
+        if name not in saved:
+            continue
+        before = saved[name][measure]
+        now = result[measure]
+        if before:
+            ratio = now / before
+        else:
+            ratio = float('inf') if now else 1.0
+        compared.append((name, before, now, ratio, ratio > 1 + threshold))
+    return compared
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time the hot paths of the game on seeded worlds.'
+    )
+    parser.add_argument('names', nargs='*',
+                        help='only run benchmarks whose names contain these')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare',
+                        help='compare the results with this saved file')
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD,
+                        help='the slowdown counted as a regression')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names, args.repeat)
+    for name, result in results['benchmarks'].iteritems():
+        print '{:<40} {:>12.3f} us'.format(
+            name, result['seconds_per_op'] * 1e6
+        )
+    for name, result in results['memory'].iteritems():
+        print '{:<40} {:>12.1f} B/square'.format(
+            name, result['bytes_per_square']
+        )
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as saved:
+            baseline = json.load(saved)
+        print
+        regressed = False
+        for section, measure, scale, unit in (
+                ('benchmarks', 'seconds_per_op', 1e6, 'us'),
+                ('memory', 'bytes_per_square', 1, 'B')):
+            compared = compare(results, baseline, args.threshold, section,
+                               measure)
+            for name, before, now, ratio, regression in compared:
+                print '{:<40} {:>12.3f} {:>12.3f} {:<2} {:>+7.1%}{}'.format(
+                    name, before * scale, now * scale, unit, ratio - 1,
+                    '  REGRESSION' if regression else ''
+                )
+                regressed = regressed or regression
+        sys.exit(1 if regressed else 0)
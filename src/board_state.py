@@ -1,10 +1,16 @@
+import copy
+
 import cell_types
 import directions
+from cell import SHARED_CELLS, Cell
 import environment
 import percepts
+from instrumentation import COUNTED_METHODS
+from line_of_sight import ArrowIndex
+from squares import Squares
 
 
-class BoardState:
+class BoardState(object):
     def __init__(self, board, pos, direction):
         """
         Creates a new board with state to keep track of the game as it
@@ -19,9 +25,35 @@ class BoardState:
         :type direction: int
         """
         self.board = board
-        self.pos = list(pos)
+        self.width = len(board[0])
+        self.height = len(board)
+        self.squares = Squares(self.width, self.height)
+        self.square = self.squares.index(pos)
         self.direction = direction
         self.arrows = self.count_wumpuses()
+        self.percept_masks = None
+        self.adjacent_pits = None
+        self.adjacent_wumpuses = None
+        self.shared = False
+        self.arrow_index = None
+
+    @property
+    def pos(self):
+        """
+        Gives the position of the agent, given as column then row order.
+        The agent's square is kept as an index (see squares), so this is
+        a new list each time, and changing it does not move the agent.
+
+        :rtype: list[int]
+        :returns: the position of the agent
+        """
+        square, width = self.square, self.width
+        return [square % width, square // width]
+
+    @pos.setter
+    def pos(self, pos):
+        col, row = pos
+        self.square = row * self.width + col
 
     def show(self, logger=None):
         """
@@ -43,23 +75,87 @@ class BoardState:
             print 'Direction: {}'.format(directions.NAMES[self.direction])
             print 'Arrows: {}'.format(self.arrows)
 
-    def get_board_percepts(self):
+    def flat_cell_types(self):
+        """
+        Gives the type of every cell on the board, in row order.
+
+        :rtype: bytearray
+        :returns: one cell type per square
+        """
+        return bytearray(cell.cell_type for row in self.board for cell in row)
+
+    def precompute_percepts(self):
+        """
+        Computes the board percepts of every square up front, so that
+        reading them later is a single lookup.
+
+        :rtype: None
+        :returns: Nothing, but fills in percept_masks
+        """
+        import percept_grid
+
+        self.percept_masks = percept_grid.board_percept_masks(
+            self.flat_cell_types(), self.width
+        )
+
+    def get_board_percept_mask(self):
         """
         Returns the percepts the agent percieves purely due to its
-        positioning relative to cells on the board.
+        positioning relative to cells on the board, as a bit mask.
+
+        :rtype: int
+        :returns: the bit mask of the board percepts (see percepts.MASKS)
         """
-        current_cell = self.cell_at(self.pos)
+        square = self.square
+        if self.percept_masks is not None:
+            return self.percept_masks[square]
+        return self._derive_percept_mask(self.cell_type_at(square), square)
 
-        if current_cell.get_percepts() is None:
-            current_cell.add_percept(
-                environment.ON_SPOT_BOARD_PERCEPTS.get(current_cell.cell_type)
+    def _derive_percept_mask(self, cell_type, index):
+        """
+        Works out the board percepts of a square from its cell type and
+        the number of pits and wumpuses next to it.
+
+        :param cell_type: the type of the cell at the square
+        :type cell_type: int
+        :param index: the square, in row order
+        :type index: int
+        :rtype: int
+        :returns: the bit mask of the board percepts at the square
+        """
+        if self.adjacent_wumpuses is None:
+            self.count_hazards()
+
+        mask = environment.ON_SPOT_BOARD_PERCEPT_MASKS[cell_type]
+        if self.adjacent_pits[index]:
+            mask |= percepts.BREEZE_MASK
+        if self.adjacent_wumpuses[index]:
+            mask |= percepts.STENCH_MASK
+        return mask
+
+    def count_hazards(self):
+        """
+        Counts the pits and wumpuses next to every square, which the board
+        percepts are derived from. This is done the first time they are
+        needed, and kept up to date as wumpuses are killed and put back.
+
+        :rtype: None
+        :returns: Nothing, but fills in adjacent_pits and adjacent_wumpuses
+        """
+        import percept_grid
+
+        self.adjacent_pits, self.adjacent_wumpuses = (
+            percept_grid.board_hazard_counts(
+                self.flat_cell_types(), self.width
             )
-            for adj_cell in self.adj_cells(self.pos):
-                current_cell.add_percept(
-                    environment.ADJACENT_BOARD_PERCEPTS.get(adj_cell.cell_type)
-                )
+        )
 
-        return current_cell.get_percepts()
+    def get_board_percepts(self):
+        """
+        Returns the percepts the agent percieves purely due to its
+        positioning relative to cells on the board.
+        """
+        return percepts.from_mask(self.get_board_percept_mask())
 
     def count_wumpuses(self):
         """
@@ -99,16 +195,146 @@ class BoardState:
         """
         Update the board state for killing a wumpus a the given position.
         - Change the cell where the wumpus was to empty
-        - Remove the stench from adjacent cells
+        - Take one off the wumpus count of each adjacent square, which
+          stops smelling once no wumpus is left next to it
 
         :param wumpus_pos: the position of the wumpus to kill
         :type wumpus_pos: list[int]
         """
-        wumpus_cell = self.cell_at(wumpus_pos)
-        wumpus_cell.cell_type = cell_types.EMPTY
+        self._own_cells()
+        if self.adjacent_wumpuses is None:
+            self.count_hazards()
+        self._set_cell_type(wumpus_pos, cell_types.EMPTY)
+        square = self.squares.index(wumpus_pos)
+        if self.arrow_index is not None:
+            self.arrow_index.cleared(self, square)
+
+        counts = self.adjacent_wumpuses
+        for index in self.squares.adjacent(square):
+            counts[index] -= 1
+            if not counts[index] and self.percept_masks is not None:
+                self.percept_masks[index] &= ~percepts.STENCH_MASK
+
+    def revive_wumpus(self, wumpus_pos):
+        """
+        Undoes kill_wumpus, putting a wumpus back at the given position
+        and adding one to the wumpus count of each adjacent square.
+
+        :param wumpus_pos: the position of the wumpus to put back
+        :type wumpus_pos: list[int]
+        """
+        self._own_cells()
+        if self.adjacent_wumpuses is None:
+            self.count_hazards()
+        self._set_cell_type(wumpus_pos, cell_types.WUMPUS)
+        square = self.squares.index(wumpus_pos)
+        if self.arrow_index is not None:
+            self.arrow_index.blocked(self, square)
 
-        for adj_cell in self.adj_cells(wumpus_pos):
-            adj_cell.remove_percept(percepts.STENCH)
+        counts = self.adjacent_wumpuses
+        for index in self.squares.adjacent(square):
+            counts[index] += 1
+            if self.percept_masks is not None:
+                self.percept_masks[index] |= percepts.STENCH_MASK
+
+    def fork(self):
+        """
+        Copies the board state, sharing the board with the copy until
+        either of them kills or revives a wumpus, which copies the board
+        first. Forking costs the same whatever the size of the board.
+
+        :rtype: BoardState
+        :returns: a board state that can be changed without changing
+            this one
+        """
+        forked = copy.copy(self)
+        for name in COUNTED_METHODS:
+            vars(forked).pop(name, None)
+        self.shared = forked.shared = True
+        return forked
+
+    def _own_cells(self):
+        """
+        Copies the board if it is shared with a fork, so that it can be
+        changed.
+
+        :rtype: None
+        :returns: Nothing, but makes sure no other board state shares
+            the cells
+        """
+        if not self.shared:
+            return
+        self.board = [list(row) for row in self.board]
+        self._own_percepts()
+        self.shared = False
+
+    def arrow_stop(self, square, direction):
+        """
+        Finds where an arrow shot from a square stops, using an index of
+        the obstacles and wumpuses along each row and column that is built
+        as arrows are shot.
+
+        :param square: where the arrow starts, which it can stop at (see
+            squares)
+        :type square: int
+        :param direction: the direction the arrow flies in
+        :type direction: int
+        :rtype: int
+        :returns: the square of the first obstacle or wumpus in the
+            arrow's path, or -1 if the arrow leaves the board
+        """
+        if self.arrow_index is None:
+            self.arrow_index = ArrowIndex()
+        return self.arrow_index.stop(self, square, direction)
+
+    def row_types(self, row):
+        """
+        Gives the type of every cell in a row.
+
+        :param row: the row
+        :type row: int
+        :rtype: bytearray
+        :returns: one cell type per column
+        """
+        return bytearray(cell.cell_type for cell in self.board[row])
+
+    def column_types(self, col):
+        """
+        Gives the type of every cell in a column.
+
+        :param col: the column
+        :type col: int
+        :rtype: bytearray
+        :returns: one cell type per row
+        """
+        return bytearray(row[col].cell_type for row in self.board)
+
+    def _own_percepts(self):
+        """
+        Copies what is kept about the board alongside the cells when the
+        cells are copied, except the pit counts which never change.
+
+        :rtype: None
+        :returns: Nothing, but replaces the wumpus counts and percept
+            masks with copies, and drops the arrow index
+        """
+        if self.adjacent_wumpuses is not None:
+            self.adjacent_wumpuses = bytearray(self.adjacent_wumpuses)
+        if self.percept_masks is not None:
+            self.percept_masks = bytearray(self.percept_masks)
+        self.arrow_index = None
+
+    def _set_cell_type(self, pos, cell_type):
+        """
+        Changes the type of the cell at a given position.
+
+        :param pos: the given position
+        :type pos: list[int]
+        :param cell_type: the new type of the cell
+        :type cell_type: int
+        """
+        col, row = pos
+        self.board[row][col] = Cell(cell_type)
 
     def adj_cells(self, pos):
         """
@@ -123,6 +349,18 @@ class BoardState:
                 for direction in directions.DIRECTIONS
                 if self.on_board(move(pos, direction)))
 
+    def cell_type_at(self, square):
+        """
+        Gives the type of the cell at a square.
+
+        :param square: the index of the square (see squares)
+        :type square: int
+        :rtype: int
+        :returns: the type of the cell
+        """
+        row, col = divmod(square, self.width)
+        return self.board[row][col].cell_type
+
     def cell_at(self, pos):
         """
         Gives the cell at a given posiition.
@@ -154,6 +392,188 @@ class BoardState:
         )
 
 
+class CompactBoardState(BoardState):
+    def __init__(self, cells, width, pos, direction):
+        """
+        Creates a new board state that stores the type of every square in
+        one flat array instead of a grid of Cell objects. It behaves like
+        a BoardState, but uses a byte per square.
+
+        :param cells: the type of every cell on the board, in row order
+        :type cells: bytearray
+        :param width: the number of columns on the board
+        :type width: int
+        :param pos: the initial position of the agent, given as column
+            then row order
+        :type pos: list[int]
+        :param direction: the initial direction of the agent
+        :type direction: int
+        """
+        self.cells = cells
+        self.width = width
+        self.height = len(cells) // width
+        self.squares = Squares(width, self.height)
+        self.square = self.squares.index(pos)
+        self.direction = direction
+        self.arrows = self.count_wumpuses()
+        self.percept_masks = None
+        self.adjacent_pits = None
+        self.adjacent_wumpuses = None
+        self.shared = False
+        self.arrow_index = None
+
+    @classmethod
+    def from_board(cls, board, pos, direction):
+        """
+        Creates a compact board state from a grid of cells.
+
+        :param board: the initial set of cells in the board
+        :type board: list[list[Cell]]
+        :param pos: the initial position of the agent
+        :type pos: list[int]
+        :param direction: the initial direction of the agent
+        :type direction: int
+        :rtype: CompactBoardState
+        :returns: a compact board state with the same cells
+        """
+        cells = bytearray(cell.cell_type for row in board for cell in row)
+        return cls(cells, len(board[0]), pos, direction)
+
+    def flat_cell_types(self):
+        """
+        Gives the type of every cell on the board, in row order.
+
+        :rtype: bytearray
+        :returns: one cell type per square
+        """
+        return self.cells
+
+    @property
+    def board(self):
+        """
+        Gives the board as a grid of (shared, read only) cells, for code
+        that walks the rows of the board.
+
+        :rtype: list[list[Cell]]
+        :returns: the cells in the board
+        """
+        width = self.width
+        return [
+            [SHARED_CELLS[cell_type]
+             for cell_type in self.cells[start:start + width]]
+            for start in xrange(0, len(self.cells), width)
+        ]
+
+    def count_wumpuses(self):
+        """
+        Counts the number of wumpuses on the board.
+
+        :rtype: int
+        :returns: the number of wumpuses one the board
+        """
+        return self.cells.count(chr(cell_types.WUMPUS))
+
+    def _set_cell_type(self, pos, cell_type):
+        """
+        Changes the type of the cell at a given position.
+
+        :param pos: the given position
+        :type pos: list[int]
+        :param cell_type: the new type of the cell
+        :type cell_type: int
+        """
+        col, row = pos
+        self.cells[row * self.width + col] = cell_type
+
+    def _own_cells(self):
+        """
+        Copies the cells if they are shared with a fork, so that they can
+        be changed.
+
+        :rtype: None
+        :returns: Nothing, but makes sure no other board state shares
+            the cells
+        """
+        if not self.shared:
+            return
+        self.cells = bytearray(self.cells)
+        self._own_percepts()
+        self.shared = False
+
+    def row_types(self, row):
+        """
+        Gives the type of every cell in a row.
+
+        :param row: the row
+        :type row: int
+        :rtype: bytearray
+        :returns: one cell type per column
+        """
+        return self.cells[row * self.width:(row + 1) * self.width]
+
+    def column_types(self, col):
+        """
+        Gives the type of every cell in a column.
+
+        :param col: the column
+        :type col: int
+        :rtype: bytearray
+        :returns: one cell type per row
+        """
+        return self.cells[col::self.width]
+
+    def adj_cells(self, pos):
+        """
+        Gives the cells adjacent to a given position.
+
+        :param pos: the given position
+        :type pos: list[int]
+        :rtype: generator
+        :returns: an iterator for the cells adjacent to the current position
+        """
+        col, row = pos
+        return (self.cell_at((col + d_col, row + d_row))
+                for d_col, d_row in directions.MOVEMENTS.itervalues()
+                if self.on_board((col + d_col, row + d_row)))
+
+    def cell_type_at(self, square):
+        """
+        Gives the type of the cell at a square.
+
+        :param square: the index of the square (see squares)
+        :type square: int
+        :rtype: int
+        :returns: the type of the cell
+        """
+        return self.cells[square]
+
+    def cell_at(self, pos):
+        """
+        Gives the cell at a given posiition.
+
+        :param pos: the given position
+        :type pos: list[int]
+        :rtype: Cell
+        :returns: the (shared, read only) cell at the given position, or
+            None if that position is not on the board
+        """
+        col, row = pos
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return SHARED_CELLS[self.cells[row * self.width + col]]
+        return None
+
+    def on_board(self, pos):
+        """
+        Determine whether a position is on the board, according to the size
+        of the board.
+
+        :rtype: bool
+        :returns: whether a position is a valid position on the board
+        """
+        col, row = pos
+        return 0 <= col < self.width and 0 <= row < self.height
+
+
 def move(pos, direction):
     """
     Calculate where something will end up if it moves forward
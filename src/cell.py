@@ -1,53 +1,29 @@
 import cell_types
 
 
-class Cell:
-    def __init__(self, cell_type):
+class Cell(object):
+    __slots__ = ('cell_type',)
+
+    def __new__(cls, cell_type):
         """
-        Constructs a cell of the given type, caching percepts.
+        Gives the cell of the given type. A cell holds nothing but its
+        type, so every square of a type shares the one cell in
+        SHARED_CELLS, and cells cannot be changed. What changes about a
+        square is kept by its board state.
 
-        :param cell_type: the type of the cell to construct
+        :param cell_type: the type of the cell to give
         :type cell_type: int
         :rtype: Cell
         :return: Cell of the given type
         """
-        self.percepts = None
-        self.cell_type = cell_type
-
-    def get_percepts(self):
-        """
-        Gets the percepts recorded for this cell.
-
-        :rtype: set{int}
-        :return: the percepts for this cell
-        """
-        return self.percepts
-
-    def add_percept(self, percept):
-        """
-        Adds a percept to the given cell, ignoring 'None' and making sure
-        there is a percept set if it is not yet created.
-
-        :param percept: the percept to record
-        :type percept: int
-        :returns: nothing
-        """
-        if self.percepts is None:
-            self.percepts = set()
-
-        if percept is not None:
-            self.percepts.add(percept)
+        return SHARED_CELLS[cell_type]
 
-    def remove_percept(self, percept):
-        """
-        Removes a percept from a given cell (for when a cell is changed).
+    def __setattr__(self, name, value):
+        raise AttributeError('Cells are shared, and cannot be changed')
 
-        :param percept: the percept to remove
-        :type percept: int
-        :returns: nothing
-        """
-        if self.percepts:
-            self.percepts.discard(percept)
+    def __reduce__(self):
+        # copies and pickles give back the shared cell
+        return Cell, (self.cell_type,)
 
     def __str__(self):
         if self.cell_type == cell_types.WUMPUS:
@@ -60,3 +36,17 @@ class Cell:
             return '[G]'
         if self.cell_type == cell_types.PIT:
             return '[P]'
+
+
+def _make_shared_cell(cell_type):
+    cell = object.__new__(Cell)
+    object.__setattr__(cell, 'cell_type', cell_type)
+    return cell
+
+
+"""
+The one cell of each cell type, indexed by cell type.
+"""
+SHARED_CELLS = tuple(
+    _make_shared_cell(cell_type) for cell_type in cell_types.CELL_TYPES
+)
@@ -3,3 +3,13 @@ The types of cells on the board
 """
 CELL_TYPES = range(5)
 EMPTY, OBSTACLE, PIT, WUMPUS, GOLD = CELL_TYPES
+
+"""
+The cell types that an agent cannot walk into and survive.
+"""
+KILL_AGENT_CELLS = frozenset([PIT, WUMPUS])
+
+"""
+The cell types that stop an arrow.
+"""
+STOP_ARROW_CELLS = frozenset([OBSTACLE, WUMPUS])
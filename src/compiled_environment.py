@@ -0,0 +1,230 @@
+"""
+An environment that looks up the outcome of moving forward or shooting in
+tables built once per world, instead of walking the board on every action.
+"""
+from array import array
+
+import numpy as np
+
+import actions
+import cell_types
+import directions
+import percepts
+from environment import ACTION_PENALTY, GOLD_REWARD, Environment
+from line_of_sight import arrow_targets
+
+"""
+The number of directions, which each table entry is indexed by along with
+its square, as square * DIRECTION_COUNT + direction.
+"""
+DIRECTION_COUNT = len(directions.DIRECTIONS)
+
+
+class CompiledEnvironment(Environment):
+    def __init__(self, board_state):
+        """
+        Constructs a new environment from an initial board state, which
+        plays by the same rules as Environment but builds tables of what
+        moving forward and shooting do from every square and direction.
+        The tables are patched when a wumpus is killed or put back, so the
+        board state should only be changed through this environment.
+        """
+        Environment.__init__(self, board_state)
+        self.compile()
+
+    def compile(self):
+        """
+        Builds the tables for the board as it is now.
+
+        - neighbors: the square ahead, or -1 off the board
+        - forward_squares: the square moved or died in, or -1
+        - forward_percepts: the percepts of moving forward, 0 if the agent
+          moved
+        - arrow_targets: the wumpus an arrow would kill, or -1
+
+        :rtype: None
+        :returns: Nothing, but replaces the tables
+        """
+        width = self.width = self.board_state.width
+        self.types = bytearray(self.board_state.flat_cell_types())
+        grid = np.frombuffer(bytes(self.types), dtype=np.uint8).reshape(
+            -1, width
+        )
+        height = len(grid)
+        cols, rows = np.meshgrid(np.arange(width), np.arange(height))
+        squares = rows * width + cols
+
+        neighbors = np.empty((height, width, DIRECTION_COUNT), np.int32)
+        for direction in directions.DIRECTIONS:
+            d_col, d_row = directions.MOVEMENTS[direction]
+            neighbors[:, :, direction] = np.where(
+                (0 <= cols + d_col) & (cols + d_col < width) &
+                (0 <= rows + d_row) & (rows + d_row < height),
+                squares + d_row * width + d_col, -1
+            )
+        ahead = grid.ravel()[neighbors]
+        forward_percepts = np.zeros(neighbors.shape, np.uint8)
+        forward_percepts[
+            np.isin(ahead, list(cell_types.KILL_AGENT_CELLS))
+        ] = percepts.DEATH_MASK
+        forward_percepts[
+            (neighbors < 0) | (ahead == cell_types.OBSTACLE)
+        ] = percepts.BUMP_MASK
+
+        self.neighbors = array('i', neighbors.tobytes())
+        self.forward_squares = array('i', neighbors.tobytes())
+        self.forward_percepts = array('B', forward_percepts.tobytes())
+        self.arrow_targets = array(
+            'i', arrow_targets(grid[np.newaxis]).tobytes()
+        )
+
+    def _compile_forward(self, square, direction):
+        """
+        Fills in the outcome of moving forward from a square, as
+        Environment._do_move_forward.
+        """
+        entry = square * DIRECTION_COUNT + direction
+        ahead = self.neighbors[entry]
+        self.forward_squares[entry] = ahead
+        if ahead < 0 or self.types[ahead] == cell_types.OBSTACLE:
+            self.forward_percepts[entry] = percepts.BUMP_MASK
+        elif self.types[ahead] in cell_types.KILL_AGENT_CELLS:
+            self.forward_percepts[entry] = percepts.DEATH_MASK
+        else:
+            self.forward_percepts[entry] = 0
+
+    def _compile_arrow(self, square, direction):
+        """
+        Fills in the wumpus an arrow shot from a square kills, as
+        Environment._do_shoot, from the entry of the square ahead.
+        """
+        entry = square * DIRECTION_COUNT + direction
+        cell_type = self.types[square]
+        if cell_type == cell_types.WUMPUS:
+            self.arrow_targets[entry] = square
+        elif cell_type == cell_types.OBSTACLE:
+            self.arrow_targets[entry] = -1
+        else:
+            ahead = self.neighbors[entry]
+            self.arrow_targets[entry] = (
+                self.arrow_targets[ahead * DIRECTION_COUNT + direction]
+                if ahead >= 0 else -1
+            )
+
+    def _patch(self, square):
+        """
+        Updates the entries that a change to the cell at a square affects:
+        walking into it from each neighbor, and shooting through it from
+        each square behind it up to the nearest thing that stops arrows.
+
+        :param square: the square that changed
+        :type square: int
+        """
+        for direction in directions.DIRECTIONS:
+            behind = (direction + 2) % DIRECTION_COUNT
+            neighbor = self.neighbors[square * DIRECTION_COUNT + behind]
+            if neighbor >= 0:
+                self._compile_forward(neighbor, direction)
+
+            current = square
+            while current >= 0:
+                self._compile_arrow(current, direction)
+                current = self.neighbors[current * DIRECTION_COUNT + behind]
+                if (current >= 0 and
+                        self.types[current] in cell_types.STOP_ARROW_CELLS):
+                    break
+
+    def _kill_wumpus(self, wumpus_pos):
+        """
+        Processes a wumpus' death as Environment._kill_wumpus, patching
+        the tables.
+        """
+        Environment._kill_wumpus(self, wumpus_pos)
+        square = wumpus_pos[1] * self.width + wumpus_pos[0]
+        self.types[square] = cell_types.EMPTY
+        self._patch(square)
+
+    def _revive_wumpus(self, wumpus_pos):
+        """
+        Puts a wumpus back as Environment._revive_wumpus, patching the
+        tables.
+        """
+        Environment._revive_wumpus(self, wumpus_pos)
+        square = wumpus_pos[1] * self.width + wumpus_pos[0]
+        self.types[square] = cell_types.WUMPUS
+        self._patch(square)
+
+    def fork(self):
+        """
+        Copies the game as Environment.fork, along with its tables.
+
+        :rtype: CompiledEnvironment
+        :returns: an environment in the same state as this one
+        """
+        forked = Environment.fork(self)
+        forked.types = self.types[:]
+        forked.forward_squares = self.forward_squares[:]
+        forked.forward_percepts = self.forward_percepts[:]
+        forked.arrow_targets = self.arrow_targets[:]
+        return forked
+
+    def perform_action(self, action):
+        """
+        Performs a specified action, keeping track of move history,
+        and other statistics.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.time_action(self._perform_action, action)
+        else:
+            self._perform_action(action)
+
+    def _perform_action(self, action):
+        """
+        Performs a specified action by looking up its outcome.
+
+        :param action: the action to perform
+        :type action: int
+        """
+        self.action_percepts = 0
+        self.actions.append(action)
+        self.action_counts[action] += 1
+        self.score -= ACTION_PENALTY[action]
+
+        board_state = self.board_state
+        if action == actions.FORWARD:
+            entry = (board_state.square * DIRECTION_COUNT +
+                     board_state.direction)
+            ahead = self.forward_squares[entry]
+            outcome = self.forward_percepts[entry]
+            if not outcome:
+                board_state.square = ahead
+            elif outcome == percepts.BUMP_MASK:
+                self.action_percepts = outcome
+            else:
+                self._kill_agent([ahead % self.width, ahead // self.width],
+                                 self.types[ahead])
+        elif action == actions.LEFT:
+            board_state.direction = (
+                (board_state.direction - 1) % DIRECTION_COUNT
+            )
+        elif action == actions.RIGHT:
+            board_state.direction = (
+                (board_state.direction + 1) % DIRECTION_COUNT
+            )
+        elif action == actions.SHOOT:
+            if board_state.arrows > 0:
+                board_state.arrows -= 1
+                target = self.arrow_targets[
+                    board_state.square * DIRECTION_COUNT +
+                    board_state.direction
+                ]
+                if target >= 0:
+                    self._kill_wumpus([target % self.width,
+                                       target // self.width])
+        else:
+            if self.types[board_state.square] == cell_types.GOLD:
+                self.finished = True
+                self.score += GOLD_REWARD
+
+        self.scores.append(self.score)
+        self.turn += 1
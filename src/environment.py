@@ -1,7 +1,10 @@
+import copy
+from array import array
+
 import actions
 import cell_types
 import percepts
-import board_state as state
+from instrumentation import Instrumentation
 
 ADJACENT_BOARD_PERCEPTS = {
     cell_types.PIT:    percepts.BREEZE,
@@ -10,6 +13,16 @@ ADJACENT_BOARD_PERCEPTS = {
 ON_SPOT_BOARD_PERCEPTS = {
     cell_types.GOLD:   percepts.GLITTER
 }
+ADJACENT_BOARD_PERCEPT_MASKS = [
+    percepts.MASKS[ADJACENT_BOARD_PERCEPTS[cell_type]]
+    if cell_type in ADJACENT_BOARD_PERCEPTS else 0
+    for cell_type in cell_types.CELL_TYPES
+]
+ON_SPOT_BOARD_PERCEPT_MASKS = [
+    percepts.MASKS[ON_SPOT_BOARD_PERCEPTS[cell_type]]
+    if cell_type in ON_SPOT_BOARD_PERCEPTS else 0
+    for cell_type in cell_types.CELL_TYPES
+]
 
 ACTION_NAME = {
     actions.LEFT:    'turn left',
@@ -40,13 +53,110 @@ class Environment:
         self.board_state = board_state
         self.score = 0
         self.turn = 0
-        self.action_percepts = set()
-        self.scores = [0]
-        self.actions = []
+        self.action_percepts = 0
+        self.scores = array('l', [0])
+        self.actions = array('B')
         self.deaths = []
         self.kills = []
         self.finished = False
         self.action_counts = {action: 0 for action in actions.ACTIONS}
+        self.instrumentation = None
+
+    def instrument(self, enabled=True):
+        """
+        Turns measuring the time taken by each action, and the calls made
+        to the board state, on or off. While it is off, performing an
+        action costs one extra check.
+
+        :param enabled: whether to measure from now on
+        :type enabled: bool
+        :rtype: Instrumentation
+        :returns: what has been measured, which keeps what it measured
+            after being turned off, or None if it was never turned on
+        """
+        instrumentation = self.instrumentation
+        if enabled and instrumentation is None:
+            self.instrumentation = Instrumentation(self.board_state)
+        elif not enabled and instrumentation is not None:
+            instrumentation.stop()
+            self.instrumentation = None
+        return self.instrumentation or instrumentation
+
+    def instrumentation_snapshot(self):
+        """
+        Gives the time taken by each action, and the calls made to the
+        board state, since measuring was turned on.
+
+        :rtype: dict
+        :returns: the measurements (see Instrumentation.snapshot), or None
+            if measuring is off
+        """
+        if self.instrumentation is None:
+            return None
+        return self.instrumentation.snapshot()
+
+    def snapshot(self):
+        """
+        Records the state of the game, so that it can be restored after
+        trying out some actions. Only what actions change is recorded,
+        not the board, so this takes the same time whatever its size.
+
+        :rtype: tuple
+        :returns: the state to pass to restore
+        """
+        board_state = self.board_state
+        return (
+            self.score, self.turn, self.action_percepts, self.finished,
+            dict(self.action_counts), len(self.deaths), len(self.kills),
+            board_state.square, board_state.direction, board_state.arrows
+        )
+
+    def restore(self, snapshot):
+        """
+        Puts the game back the way it was when a snapshot was taken,
+        undoing every action since, including wumpus kills. A snapshot
+        can be restored any number of times, until a snapshot taken
+        before it is restored.
+
+        :param snapshot: the state recorded by snapshot
+        :type snapshot: tuple
+        """
+        (self.score, turn, self.action_percepts, self.finished,
+         action_counts, deaths, kills, square, direction, arrows) = snapshot
+
+        for _, wumpus_pos in reversed(self.kills[kills:]):
+            self._revive_wumpus(wumpus_pos)
+        del self.kills[kills:]
+        del self.deaths[deaths:]
+        del self.actions[turn:]
+        del self.scores[turn + 1:]
+        self.turn = turn
+        self.action_counts = dict(action_counts)
+
+        board_state = self.board_state
+        board_state.square = square
+        board_state.direction = direction
+        board_state.arrows = arrows
+
+    def fork(self):
+        """
+        Copies the game, so that actions can be tried out on the copy
+        without changing this one. The board is shared until either game
+        kills a wumpus (see BoardState.fork), and measuring is left off
+        in the copy.
+
+        :rtype: Environment
+        :returns: an environment in the same state as this one
+        """
+        forked = copy.copy(self)
+        forked.board_state = self.board_state.fork()
+        forked.scores = self.scores[:]
+        forked.actions = self.actions[:]
+        forked.deaths = list(self.deaths)
+        forked.kills = list(self.kills)
+        forked.action_counts = dict(self.action_counts)
+        forked.instrumentation = None
+        return forked
 
     def _clear_action_percepts(self):
         """
@@ -55,7 +165,7 @@ class Environment:
         :rtype: None
         :returns: Nothing, but clears any percepts made by the last action
         """
-        self.action_percepts.clear()
+        self.action_percepts = 0
 
     def is_finished(self):
         """
@@ -74,9 +184,18 @@ class Environment:
         :rtype: list[string]
         :returns: a list of sense as strings
         """
-        return map(
-            lambda p: percepts.NAMES[p],
-            self.get_percepts()
+        return percepts.names(self.get_percept_mask())
+
+    def get_percept_mask(self):
+        """
+        Gives the percepts that are currently available to to the agent,
+        as a bit mask.
+
+        :rtype: int
+        :returns: the bit mask of the senses (see percepts.MASKS)
+        """
+        return (
+            self.action_percepts | self.board_state.get_board_percept_mask()
         )
 
     def get_percepts(self):
@@ -86,10 +205,7 @@ class Environment:
         :rtype: {int}
         :returns: a set of senses
         """
-        percepts = self.action_percepts.copy()
-        percepts.update(self.board_state.get_board_percepts())
-
-        return percepts
+        return percepts.from_mask(self.get_percept_mask())
 
     def _record_action(self, action):
         """
@@ -131,7 +247,7 @@ class Environment:
         """
         self.score -= DEATH_PENALTY
         self.deaths.append((self.turn, death_pos, cell_type))
-        self.action_percepts.add(percepts.DEATH)
+        self.action_percepts |= percepts.DEATH_MASK
 
     def _kill_wumpus(self, wumpus_pos):
         """
@@ -146,7 +262,17 @@ class Environment:
         self.board_state.kill_wumpus(wumpus_pos)
         self.score += WUMPUS_KILL_REWARD
         self.kills.append((self.turn, wumpus_pos))
-        self.action_percepts.add(percepts.SCREAM)
+        self.action_percepts |= percepts.SCREAM_MASK
+
+    def _revive_wumpus(self, wumpus_pos):
+        """
+        Undoes _kill_wumpus on the board, putting the wumpus back. The
+        score and records are put back by restore.
+
+        :param wumpus_pos: where the wumpus died
+        :type wumpus_pos: list[int]
+        """
+        self.board_state.revive_wumpus(wumpus_pos)
 
     def _do_turn_left(self):
         """
@@ -166,61 +292,59 @@ class Environment:
         """
         Fires an arrow in the direction the agent is facing.
         If there is no obstacle in the way, kills the first
-        wumpus the arrow would land on.
+        wumpus the arrow would land on, found with the board's
+        line-of-sight index rather than by walking the arrow.
         """
-        if self.board_state.arrows > 0:
-            self.board_state.arrows -= 1
-
-            arrow_pos = self.board_state.pos
-            arrow_direction = self.board_state.direction
+        board_state = self.board_state
+        if board_state.arrows > 0:
+            board_state.arrows -= 1
 
-            while (self.board_state.on_board(arrow_pos) and
-                   not stops_arrow(self.board_state.cell_at(arrow_pos))):
-                arrow_pos = state.move(arrow_pos, arrow_direction)
+            stop = board_state.arrow_stop(
+                board_state.square, board_state.direction
+            )
 
-            if (self.board_state.on_board(arrow_pos) and
-                    self.board_state.cell_at(
-                        arrow_pos
-                    ).cell_type == cell_types.WUMPUS):
-                self._kill_wumpus(arrow_pos)
+            if (stop >= 0 and
+                    board_state.cell_type_at(stop) == cell_types.WUMPUS):
+                self._kill_wumpus(board_state.squares.position(stop))
 
     def _do_grab(self):
         """
         If the agent is over the gold, grabs the gold and wins the game,
         giving the explorer the reward. Otherwise, does nothing.
         """
-        current_cell = self.board_state.cell_at(self.board_state.pos)
-
-        if current_cell.cell_type == cell_types.GOLD:
+        board_state = self.board_state
+        if board_state.cell_type_at(board_state.square) == cell_types.GOLD:
             self.finished = True
             self.score += GOLD_REWARD
 
     def _do_move_forward(self):
         """
         Tries to move the agent forward one square, possibly killing
-        or bumping the agent back in the process.
+        or bumping the agent back in the process. The square ahead is
+        found from the board's square index tables (see squares).
         """
-        next_pos = state.move(
-            self.board_state.pos,
-            self.board_state.direction
+        board_state = self.board_state
+        next_square = board_state.squares.step(
+            board_state.square, board_state.direction
         )
 
-        if not self.board_state.on_board(next_pos):
-            self.action_percepts.add(percepts.BUMP)
+        if next_square < 0:
+            self.action_percepts |= percepts.BUMP_MASK
             return
 
-        next_cell = self.board_state.cell_at(next_pos)
-        if next_cell.cell_type == cell_types.OBSTACLE:
-            self.action_percepts.add(percepts.BUMP)
+        next_type = board_state.cell_type_at(next_square)
+        if next_type == cell_types.OBSTACLE:
+            self.action_percepts |= percepts.BUMP_MASK
             return
 
-        if deadly(next_cell):
-            self._kill_agent(next_pos, next_cell.cell_type)
+        if next_type in KILL_AGENT_CELLS:
+            self._kill_agent(board_state.squares.position(next_square),
+                             next_type)
             return
 
         # The agent should be able to move forward, given that they
         # didn't bump into something or die
-        self.board_state.pos = next_pos
+        board_state.square = next_square
 
     ACTION_METHOD = {
         actions.LEFT:    _do_turn_left,
@@ -235,6 +359,22 @@ class Environment:
         Performs a specified action, keeping track of move history,
         and other statistics.
         """
+        if self.instrumentation is not None:
+            self.instrumentation.time_action(self._perform_action, action)
+            return
+
+        self._record_action(action)
+        Environment.ACTION_METHOD[action](self)
+        self._update_turn(action)
+
+    def _perform_action(self, action):
+        """
+        Performs a specified action like perform_action, but without
+        measuring it.
+
+        :param action: the action to perform
+        :type action: int
+        """
         self._record_action(action)
         Environment.ACTION_METHOD[action](self)
         self._update_turn(action)
@@ -287,8 +427,8 @@ class Environment:
         self.perform_action(actions.GRAB)
 
 
-KILL_AGENT_CELLS = {cell_types.PIT, cell_types.WUMPUS}
-STOP_ARROW_CELLS = {cell_types.OBSTACLE, cell_types.WUMPUS}
+KILL_AGENT_CELLS = cell_types.KILL_AGENT_CELLS
+STOP_ARROW_CELLS = cell_types.STOP_ARROW_CELLS
 
 
 def deadly(cell):
@@ -314,18 +454,51 @@ def stops_arrow(cell):
     return cell.cell_type in STOP_ARROW_CELLS
 
 
-def new_game(size):
+"""
+The default max_size of new_game, which stands for
+generate_world.MAX_BOARD_SIZE, as generate_world is only imported once a
+game is made.
+"""
+CAPPED = object()
+
+
+def new_game(size, compact=False, eager_percepts=False, seed=None,
+             compiled=False, max_size=CAPPED):
     """
     Generate a new initial board state and environment of the given size.
 
-    :param size: the size of the board to make
-    :type size: int
+    :param size: the size of the board to make, or its width and height
+    :type size: int or tuple(int, int)
+    :param compact: whether to store the board as a flat array of cell types
+    :type compact: bool
+    :param eager_percepts: whether to compute every square's percepts up front
+    :type eager_percepts: bool
+    :param seed: the seed to generate the world from, so the same game can
+        be played again
+    :type seed: int
+    :param compiled: whether to play in a CompiledEnvironment, which looks
+        up the outcome of each action in tables built for the world
+    :type compiled: bool
+    :param max_size: the largest allowed width or height, None to allow
+        any size, or by default generate_world.MAX_BOARD_SIZE
+    :type max_size: int
     :rtype: tuple(BoardState, Environment)
     :returns: the board_state and corresponding environment for a new game
+    :raises ValueError: if the size is not allowed
     """
     import generate_world
 
-    world = generate_world.generate_world(size, 0.1, 0.1, 0.1)
+    if max_size is CAPPED:
+        max_size = generate_world.MAX_BOARD_SIZE
+    world = generate_world.generate_world(
+        size, 0.1, 0.1, 0.1, compact, eager_percepts, seed,
+        max_size=max_size
+    )
+    if world is None:
+        raise ValueError('Board size {} is not allowed'.format(size))
+    if compiled:
+        from compiled_environment import CompiledEnvironment
+        return world, CompiledEnvironment(world)
     return world, Environment(world)
 
 
@@ -0,0 +1,245 @@
+"""
+Records games compactly, as the world they started from and one byte per
+action, and replays them to any turn.
+"""
+import struct
+import sys
+import zlib
+from array import array
+
+import environment
+from board_state import CompactBoardState
+
+"""
+The bytes an episode file starts with.
+"""
+MAGIC = b'WEPS\x02'
+
+"""
+The layout of an episode's header: its flags, the width and height of the
+board, the agent's starting column, row and direction, the seed of the
+world, the checksum of its cells and the number of turns, little endian.
+"""
+HEADER = struct.Struct('<BIIIIBQII')
+
+"""
+Flag set when the world is stored as the seed new_game made it from,
+rather than as its cells.
+"""
+SEEDED = 1
+
+"""
+Flag set when the seeded world was made as a compact board, so that it is
+rebuilt as the same kind of board state.
+"""
+COMPACT = 2
+
+
+def checksum(cells):
+    """
+    Gives the checksum of a world's cells, which a world rebuilt from its
+    seed is checked against.
+
+    :param cells: the type of every cell on the board, in row order
+    :type cells: bytearray
+    :rtype: int
+    :returns: the CRC-32 of the cells, as an unsigned int
+    """
+    return zlib.crc32(bytes(cells)) & 0xFFFFFFFF
+
+
+def little_endian(values):
+    """
+    Gives an array's values in little endian order, as stored in episode
+    files.
+
+    :param values: the values to order
+    :type values: array
+    :rtype: array
+    :returns: the array itself on little endian machines, otherwise a
+        swapped copy
+    """
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class Episode(object):
+    def __init__(self, width, height, pos, direction, cells=None, seed=None,
+                 compact=True, cells_checksum=None):
+        """
+        Creates an episode with no turns, starting from a given world.
+
+        :param width: the number of columns on the board
+        :type width: int
+        :param height: the number of rows on the board
+        :type height: int
+        :param pos: the agent's starting position
+        :type pos: list[int]
+        :param direction: the agent's starting direction
+        :type direction: int
+        :param cells: the type of every cell the board started with, in
+            row order, or None if the world is stored as a seed
+        :type cells: bytearray
+        :param seed: the seed new_game made the world from, if it was
+        :type seed: int
+        :param compact: whether new_game made the seeded world compact
+        :type compact: bool
+        :param cells_checksum: the checksum of the cells the board started
+            with (see checksum), or None to work it out from cells, if
+            given
+        :type cells_checksum: int
+        """
+        self.width = width
+        self.height = height
+        self.pos = list(pos)
+        self.direction = direction
+        self.cells = cells
+        self.seed = seed
+        self.compact = compact
+        if cells_checksum is None and cells is not None:
+            cells_checksum = checksum(cells)
+        self.cells_checksum = cells_checksum
+        self.actions = array('B')
+        self.score_deltas = array('h')
+
+    @classmethod
+    def start(cls, board_state, seed=None):
+        """
+        Starts recording a game, before any action is performed.
+
+        :param board_state: the world the game starts from
+        :type board_state: BoardState
+        :param seed: the seed new_game made the world from, so only the
+            seed needs storing, or None to store the world's cells
+        :type seed: int
+        :rtype: Episode
+        :returns: an episode with no turns
+        """
+        cells = bytearray(board_state.flat_cell_types())
+        height = len(cells) // board_state.width
+        return cls(board_state.width, height, board_state.pos,
+                   board_state.direction, None if seed is not None else cells,
+                   seed, isinstance(board_state, CompactBoardState),
+                   checksum(cells))
+
+    def record(self, env):
+        """
+        Adds the turns an environment has played since the last record.
+
+        :param env: the environment the game is played in
+        :type env: Environment
+        """
+        turns = len(self.actions)
+        self.actions.extend(env.actions[turns:])
+        scores = env.scores
+        self.score_deltas.extend(
+            scores[turn + 1] - scores[turn]
+            for turn in xrange(turns, len(scores) - 1)
+        )
+
+    def world(self):
+        """
+        Rebuilds the world the game started from.
+
+        :rtype: BoardState
+        :returns: a new board state as it was before the first turn
+        :raises ValueError: if the seed does not rebuild the world
+            recorded, or new_game cannot make a board of its size
+        """
+        if self.cells is None:
+            world, _ = environment.new_game(
+                (self.width, self.height), self.compact, seed=self.seed,
+                max_size=None
+            )
+            if (world.width != self.width or world.height != self.height or
+                    world.pos != self.pos or
+                    world.direction != self.direction or
+                    self.cells_checksum not in (
+                        None, checksum(world.flat_cell_types()))):
+                raise ValueError(
+                    'Seed {} does not rebuild the recorded world'.format(
+                        self.seed
+                    )
+                )
+            return world
+        return CompactBoardState(
+            bytearray(self.cells), self.width, self.pos, self.direction
+        )
+
+    def replay(self, turn=None):
+        """
+        Rebuilds the game as it was after a number of turns.
+
+        :param turn: the number of turns to play, or None for all of them
+        :type turn: int
+        :rtype: Environment
+        :returns: a new environment after that turn
+        """
+        env = environment.Environment(self.world())
+        env.perform_actions(self.actions[:turn])
+        return env
+
+    def scores(self):
+        """
+        Gives the score after each turn, without replaying the game.
+
+        :rtype: array
+        :returns: the scores, starting with 0 before the first turn
+        """
+        scores = array('l', [0])
+        score = 0
+        for delta in self.score_deltas:
+            score += delta
+            scores.append(score)
+        return scores
+
+    def write(self, output):
+        """
+        Writes the episode to a file.
+
+        :param output: the file to write to, opened in binary mode
+        :type output: file
+        """
+        flags = 0
+        if self.cells is None:
+            flags = SEEDED | (COMPACT if self.compact else 0)
+        col, row = self.pos
+        output.write(MAGIC)
+        output.write(HEADER.pack(
+            flags, self.width, self.height, col, row, self.direction,
+            self.seed or 0, self.cells_checksum or 0, len(self.actions)
+        ))
+        if self.cells is not None:
+            output.write(bytes(self.cells))
+        output.write(self.actions.tostring())
+        output.write(little_endian(self.score_deltas).tostring())
+
+    @classmethod
+    def read(cls, source):
+        """
+        Reads an episode written by write.
+
+        :param source: the file to read from, opened in binary mode
+        :type source: file
+        :rtype: Episode
+        :returns: the episode
+        """
+        if source.read(len(MAGIC)) != MAGIC:
+            raise ValueError('Not an episode file')
+        (flags, width, height, col, row, direction, seed, cells_checksum,
+         turns) = HEADER.unpack(source.read(HEADER.size))
+
+        if flags & SEEDED:
+            episode = cls(width, height, [col, row], direction, seed=seed,
+                          compact=bool(flags & COMPACT),
+                          cells_checksum=cells_checksum)
+        else:
+            episode = cls(width, height, [col, row], direction,
+                          bytearray(source.read(width * height)),
+                          cells_checksum=cells_checksum)
+        episode.actions.fromstring(source.read(turns))
+        episode.score_deltas.fromstring(source.read(turns * 2))
+        episode.score_deltas = little_endian(episode.score_deltas)
+        return episode
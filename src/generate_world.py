@@ -1,70 +1,641 @@
-from random import random, choice
-from board_state import BoardState
-from cell import Cell
+import numbers
+import random
+import numpy as np
+from board_state import BoardState, CompactBoardState
+from cell import Cell, SHARED_CELLS
 import cell_types
 import directions
+import percept_grid
 
+MIN_BOARD_SIZE = 5
+MAX_BOARD_SIZE = 25
 
-def generate_world(board_size, prob_obst, prob_pit, prob_wump):
+"""
+How many squares large boards are drawn at a time, which bounds the
+memory used on top of the board itself.
+"""
+GENERATION_CHUNK = 1 << 16
+
+"""
+How many random squares to try when placing something on a large board
+before falling back to counting through the empty squares.
+"""
+PLACEMENT_TRIES = 64
+
+
+def generate_world(board_size, prob_obst, prob_pit, prob_wump, compact=False,
+                   eager_percepts=False, rng=None, max_size=MAX_BOARD_SIZE,
+                   exact=False):
     """
     Generates a world with the given parameters
 
-    :param board_size: desired size of the board
-    :type board_size: int
+    :param board_size: desired size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
     :param prob_obst: probability of an obsticle
     :type prob_obst: float
     :param prob_pit: probability of a pit
     :type prob_pit: float
     :param prob_wump: probability of a wumpus
     :type prob_wump: float
+    :param compact: whether to store the board as a flat array of cell
+        types (see CompactBoardState), generated in linear time
+    :type compact: bool
+    :param eager_percepts: whether to compute the percepts of every square
+        while generating, rather than on the first visit
+    :type eager_percepts: bool
+    :param rng: a seed or generator to draw the world from (see make_rng)
+    :type rng: int or random.Random
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
+    :param exact: whether to place exactly the expected number of each
+        cell type (see exact_counts) instead of drawing every cell
+    :type exact: bool
     :rtype: [[Cell]] or None
     :return: [[Cell]] if valid input otherwise None
     """
-    if valid_input(board_size, prob_obst, prob_pit, prob_wump):
-        return create_board(board_size, prob_obst, prob_pit, prob_wump)
+    if exact:
+        if check_prob(prob_obst, prob_pit, prob_wump):
+            return generate_exact_world(
+                board_size,
+                *exact_counts(board_size, prob_obst, prob_pit, prob_wump),
+                compact=compact, eager_percepts=eager_percepts, rng=rng,
+                max_size=max_size
+            )
+        return None
+
+    if valid_input(board_size, prob_obst, prob_pit, prob_wump, max_size):
+        world = create_board(
+            board_size, prob_obst, prob_pit, prob_wump, compact,
+            make_rng(rng)
+        )
+        if eager_percepts:
+            world.precompute_percepts()
+        return world
+
+
+def generate_exact_world(board_size, num_obst, num_pit, num_wump,
+                         compact=False, eager_percepts=False, rng=None,
+                         max_size=MAX_BOARD_SIZE):
+    """
+    Generates a world with exactly the given number of obstacles, pits and
+    wumpuses, in one pass and without retrying
+
+    :param board_size: desired size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param num_obst: number of obstacles
+    :type num_obst: int
+    :param num_pit: number of pits
+    :type num_pit: int
+    :param num_wump: number of wumpuses
+    :type num_wump: int
+    :param compact: whether to store the board as a flat array of cell
+        types (see CompactBoardState)
+    :type compact: bool
+    :param eager_percepts: whether to compute the percepts of every square
+        while generating, rather than on the first visit
+    :type eager_percepts: bool
+    :param rng: a seed or generator to draw the world from (see make_rng)
+    :type rng: int or random.Random
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
+    :rtype: BoardState or None
+    :return: BoardState if valid input otherwise None
+    """
+    if (check_board_size(board_size, max_size) and
+            check_counts(board_size, num_obst, num_pit, num_wump)):
+        world = create_exact_board(
+            board_size, num_obst, num_pit, num_wump, compact, make_rng(rng)
+        )
+        if eager_percepts:
+            world.precompute_percepts()
+        return world
+
+
+def generate_worlds(n, board_size, prob_obst, prob_pit, prob_wump,
+                    eager_percepts=False, rng=None, max_size=MAX_BOARD_SIZE):
+    """
+    Generates a batch of worlds with the given parameters at once
+
+    :param n: the number of worlds to generate
+    :type n: int
+    :param board_size: desired size of the boards, or their width and
+        height
+    :type board_size: int or tuple(int, int)
+    :param prob_obst: probability of an obsticle
+    :type prob_obst: float
+    :param prob_pit: probability of a pit
+    :type prob_pit: float
+    :param prob_wump: probability of a wumpus
+    :type prob_wump: float
+    :param eager_percepts: whether to compute the percepts of every square
+        of every world while generating
+    :type eager_percepts: bool
+    :param rng: a seed or NumPy generator to draw the batch from (see
+        make_numpy_rng)
+    :type rng: int or numpy.random.RandomState
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
+    :rtype: WorldBatch or None
+    :return: WorldBatch if valid input otherwise None
+    """
+    if valid_input(board_size, prob_obst, prob_pit, prob_wump, max_size):
+        return create_boards(
+            n, board_size, prob_obst, prob_pit, prob_wump, eager_percepts,
+            make_numpy_rng(rng)
+        )
+
+
+def make_rng(rng):
+    """
+    Gives the random number generator to draw a world from
+
+    :param rng: a seed, a generator to use as is, a NumPy generator to
+        seed one from, or None to use the shared generator of the random
+        module
+    :type rng: int or random.Random or numpy.random.RandomState
+    :rtype: random.Random
+    :return: a generator with random() and choice()
+    :raises TypeError: if rng is neither a seed nor a generator
+    """
+    if rng is None:
+        return random
+    if isinstance(rng, numbers.Integral):
+        # NumPy integers seed the same generator as the int they hold
+        return random.Random(int(rng))
+    if hasattr(rng, 'getrandbits'):
+        return rng
+    if is_numpy_rng(rng):
+        return random.Random(numpy_seed(rng))
+    raise TypeError('Not a seed or random number generator: {!r}'.format(rng))
+
+
+def make_numpy_rng(rng):
+    """
+    Gives the NumPy random number generator to draw a batch of worlds from
+
+    :param rng: a seed, a RandomState or Generator to use as is, a
+        random.Random to seed one from, or None to use the shared generator
+        of numpy.random
+    :type rng: int or numpy.random.RandomState or random.Random
+    :rtype: numpy.random.RandomState
+    :return: the generator to draw from
+    :raises TypeError: if rng is neither a seed nor a generator
+    """
+    if rng is None:
+        return np.random
+    if isinstance(rng, numbers.Integral):
+        rng = int(rng)
+        return np.random.RandomState(
+            [rng & 0xffffffff, (rng >> 32) & 0xffffffff]
+        )
+    if is_numpy_rng(rng):
+        return rng
+    if hasattr(rng, 'getrandbits'):
+        return make_numpy_rng(rng.getrandbits(64))
+    raise TypeError('Not a seed or random number generator: {!r}'.format(rng))
+
+
+def is_numpy_rng(rng):
+    """
+    Checks if a generator is one of NumPy's, either kind
+
+    :param rng: the generator to check
+    :type rng: object
+    :rtype: bool
+    :return: whether it is a RandomState, a Generator or numpy.random
+    """
+    return hasattr(rng, 'random_sample') or hasattr(rng, 'integers')
+
+
+def numpy_seed(np_rng):
+    """
+    Draws a 64 bit seed from either kind of NumPy generator
+
+    :param np_rng: the generator to draw from
+    :type np_rng: numpy.random.RandomState or numpy.random.Generator
+    :rtype: int
+    :return: the seed
+    """
+    draw = np_rng.integers if hasattr(np_rng, 'integers') else np_rng.randint
+    high, low = draw(0, 1 << 32, size=2, dtype=np.int64)
+    return (int(high) << 32) | int(low)
 
 
-def create_board(board_size, prob_obst, prob_pit, prob_wump):
+def uniform_draws(np_rng, shape):
     """
-    Creates a board with the given constraints
+    Draws uniform floats in [0, 1) from either kind of NumPy generator
 
-    :param board_size: size of the board
-    :type board_size: int
+    :param np_rng: the generator to draw from
+    :type np_rng: numpy.random.RandomState or numpy.random.Generator
+    :param shape: the shape of the draws
+    :type shape: tuple(int)
+    :rtype: numpy.ndarray
+    :return: the draws
+    """
+    if hasattr(np_rng, 'random_sample'):
+        return np_rng.random_sample(shape)
+    return np_rng.random(shape)
+
+
+MASK_64 = (1 << 64) - 1
+
+
+def world_seed(seed, index):
+    """
+    Derives the seed of one world from the seed of a whole run, so every
+    world has its own independent stream and can be regenerated from its
+    index alone. This is the index-th output of SplitMix64 seeded with the
+    run's seed.
+
+    :param seed: the seed of the run
+    :type seed: int
+    :param index: which world of the run to seed
+    :type index: int
+    :rtype: int
+    :return: a 64 bit seed for the world
+    """
+    z = (seed + (index + 1) * 0x9e3779b97f4a7c15) & MASK_64
+    z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & MASK_64
+    z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & MASK_64
+    return z ^ (z >> 31)
+
+
+"""
+The cell type given to each interval of a random draw, in the same order
+that create_cell checks them.
+"""
+DRAW_CELL_TYPES = np.array(
+    [cell_types.OBSTACLE, cell_types.PIT, cell_types.WUMPUS, cell_types.EMPTY],
+    dtype=np.uint8
+)
+
+
+def create_boards(n, board_size, prob_obst, prob_pit, prob_wump,
+                  eager_percepts=False, np_rng=np.random):
+    """
+    Creates a batch of boards with the given constraints, drawing every
+    cell of every board at once
+
+    :param n: the number of boards to create
+    :type n: int
+    :param board_size: size of the boards, or their width and height
+    :type board_size: int or tuple(int, int)
     :param prob_obst: probability of an obstical
     :type prob_obst: float
     :param prob_pit: probability of a pit
     :type prob_pit: float
     :param prob_wump: probability of a wumpus
     :type prob_wump: float
-    :rtype: [[Cell]]
-    :return: an initial board state having the given constraints
+    :param eager_percepts: whether to compute the percepts of every square
+    :type eager_percepts: bool
+    :param np_rng: the NumPy generator to draw from
+    :type np_rng: numpy.random.RandomState
+    :rtype: WorldBatch
+    :return: initial board states having the given constraints
     """
-    prob_pit += prob_obst
-    prob_wump += prob_pit
-    while True:
-        board = list()
-        empty_cells = list()
-        for row in xrange(board_size):
-            board.append(list())
-            for col in xrange(board_size):
-                cell = create_cell(prob_obst, prob_pit, prob_wump)
-                if cell.cell_type == cell_types.EMPTY:
-                    empty_cells.append([row, col])
-                board[row].append(cell)
-        if len(empty_cells) >= 2:
-            place_in_empty_cell(board, cell_types.GOLD, empty_cells)
-            starting_pos = choose_empty_cell(empty_cells)
-            starting_pos.reverse()
-            starting_direction = choose_direction()
-
-            return BoardState(
-                board=board,
-                pos=starting_pos,
-                direction=starting_direction
+    width, height = board_dimensions(board_size)
+    thresholds = np.cumsum([prob_obst, prob_pit, prob_wump])
+    squares = width * height
+    cells = np.empty((n, squares), dtype=np.uint8)
+
+    to_draw = np.arange(n)
+    while len(to_draw):
+        draws = uniform_draws(np_rng, (len(to_draw), squares))
+        cells[to_draw] = DRAW_CELL_TYPES[np.searchsorted(thresholds, draws)]
+        empty_counts = (cells[to_draw] == cell_types.EMPTY).sum(axis=1)
+        to_draw = to_draw[empty_counts < 2]
+
+    boards = np.arange(n)
+    keys = uniform_draws(np_rng, (n, squares))
+    keys[cells != cell_types.EMPTY] = -1
+    gold = keys.argmax(axis=1)
+    cells[boards, gold] = cell_types.GOLD
+    keys[boards, gold] = -1
+    start = keys.argmax(axis=1)
+
+    positions = np.column_stack((start % width, start // width))
+    starting_directions = (
+        uniform_draws(np_rng, n) * len(directions.DIRECTIONS)
+    ).astype(np.uint8)
+    cells = cells.reshape(n, height, width)
+
+    percept_masks = None
+    if eager_percepts:
+        percept_masks = percept_grid.percept_masks(cells)
+
+    return WorldBatch(cells, positions, starting_directions, percept_masks)
+
+
+class WorldBatch(object):
+    def __init__(self, cells, positions, directions, percept_masks=None):
+        """
+        Holds a batch of generated worlds as stacked arrays, handing out
+        a CompactBoardState for any one of them.
+
+        :param cells: the cell type of every square of every board, with
+            shape (boards, rows, columns)
+        :type cells: numpy.ndarray
+        :param positions: the starting position of the agent on every
+            board, given as column then row order
+        :type positions: numpy.ndarray
+        :param directions: the starting direction of the agent on every
+            board
+        :type directions: numpy.ndarray
+        :param percept_masks: the bit mask of the board percepts of every
+            square of every board, if computed
+        :type percept_masks: numpy.ndarray
+        """
+        self.cells = cells
+        self.positions = positions
+        self.directions = directions
+        self.percept_masks = percept_masks
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __getitem__(self, index):
+        """
+        Gives a board state for one world of the batch. The board state
+        has its own copy of the cells, so playing it leaves the batch
+        unchanged.
+
+        :param index: which world of the batch to give
+        :type index: int
+        :rtype: CompactBoardState
+        :return: the initial board state of the world
+        """
+        board_state = CompactBoardState(
+            bytearray(self.cells[index].tobytes()),
+            self.cells.shape[2],
+            self.positions[index].tolist(),
+            int(self.directions[index])
+        )
+        if self.percept_masks is not None:
+            board_state.percept_masks = bytearray(
+                self.percept_masks[index].tobytes()
             )
+        return board_state
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+
+def create_compact_board(board_size, prob_obst, prob_pit, prob_wump,
+                         rng=random):
+    """
+    Creates a compact board with the given constraints in time linear in
+    its number of squares. The board is drawn a chunk of squares at a time
+    and nothing is kept per empty square, so large boards only need the
+    memory of the board itself.
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param prob_obst: probability of an obstical
+    :type prob_obst: float
+    :param prob_pit: probability of a pit
+    :type prob_pit: float
+    :param prob_wump: probability of a wumpus
+    :type prob_wump: float
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: CompactBoardState
+    :return: an initial board state having the given constraints
+    """
+    return CompactBoardState(
+        *draw_board(board_size, prob_obst, prob_pit, prob_wump, rng)
+    )
 
 
-def place_in_empty_cell(board, cell_type, empty_cells):
+def draw_board(board_size, prob_obst, prob_pit, prob_wump, rng=random):
+    """
+    Draws the cells of a board, the agent's starting square and its
+    direction, for either kind of board state (see create_compact_board).
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param prob_obst: probability of an obstical
+    :type prob_obst: float
+    :param prob_pit: probability of a pit
+    :type prob_pit: float
+    :param prob_wump: probability of a wumpus
+    :type prob_wump: float
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: tuple(bytearray, int, list[int], int)
+    :return: the type of every cell in row order, the width of the board,
+        and the agent's starting position and direction
+    """
+    width, height = board_dimensions(board_size)
+    squares = width * height
+    thresholds = np.array([prob_obst, prob_pit, prob_wump]).cumsum()
+    np_rng = make_numpy_rng(rng.getrandbits(64))
+
+    empty_count = 0
+    while empty_count < 2:
+        cells = bytearray(squares)
+        empty_count = 0
+        for first in xrange(0, squares, GENERATION_CHUNK):
+            last = min(first + GENERATION_CHUNK, squares)
+            draws = uniform_draws(np_rng, last - first)
+            chunk = DRAW_CELL_TYPES[thresholds.searchsorted(draws)]
+            cells[first:last] = chunk.tobytes()
+            empty_count += np.count_nonzero(chunk == cell_types.EMPTY)
+
+    gold = choose_empty_square(cells, empty_count, rng)
+    cells[gold] = cell_types.GOLD
+    start = choose_empty_square(cells, empty_count - 1, rng)
+
+    return (
+        cells, width, [start % width, start // width], choose_direction(rng)
+    )
+
+
+def choose_empty_square(cells, empty_count, rng=random):
+    """
+    Chooses an empty square of a compact board uniformly, by trying random
+    squares and, if that keeps missing, counting through the empty squares
+    to a random one
+
+    :param cells: the type of every cell on the board, in row order
+    :type cells: bytearray
+    :param empty_count: the number of empty squares on the board
+    :type empty_count: int
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: int
+    :return: the index of an empty square
+    """
+    for _ in xrange(PLACEMENT_TRIES):
+        square = rng.randrange(len(cells))
+        if cells[square] == cell_types.EMPTY:
+            return square
+
+    nth = rng.randrange(empty_count)
+    types = np.frombuffer(cells, dtype=np.uint8)
+    for start in xrange(0, len(cells), GENERATION_CHUNK):
+        empties = np.flatnonzero(
+            types[start:start + GENERATION_CHUNK] == cell_types.EMPTY
+        )
+        if nth < len(empties):
+            return start + int(empties[nth])
+        nth -= len(empties)
+
+
+def create_board(board_size, prob_obst, prob_pit, prob_wump, compact=False,
+                 rng=random):
+    """
+    Creates a board with the given constraints. The cells are drawn as by
+    create_compact_board whichever way the board is stored, so the same
+    generator gives the same world either way.
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param prob_obst: probability of an obstical
+    :type prob_obst: float
+    :param prob_pit: probability of a pit
+    :type prob_pit: float
+    :param prob_wump: probability of a wumpus
+    :type prob_wump: float
+    :param compact: whether to return a CompactBoardState
+    :type compact: bool
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: BoardState
+    :return: an initial board state having the given constraints
+    """
+    cells, width, starting_pos, starting_direction = draw_board(
+        board_size, prob_obst, prob_pit, prob_wump, rng
+    )
+    if compact:
+        return CompactBoardState(
+            cells, width, starting_pos, starting_direction
+        )
+    return BoardState(
+        board=grid_of(cells, width),
+        pos=starting_pos,
+        direction=starting_direction
+    )
+
+
+def create_exact_board(board_size, num_obst, num_pit, num_wump, compact=False,
+                       rng=random):
+    """
+    Creates a board with exactly the given number of obstacles, pits and
+    wumpuses, one gold and an empty starting square. Every placement comes
+    from a single partial shuffle of the squares, so it takes time in
+    proportion to the number of things placed and never retries.
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param num_obst: number of obstacles
+    :type num_obst: int
+    :param num_pit: number of pits
+    :type num_pit: int
+    :param num_wump: number of wumpuses
+    :type num_wump: int
+    :param compact: whether to return a CompactBoardState
+    :type compact: bool
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: BoardState
+    :return: an initial board state having the given counts
+    """
+    width, height = board_dimensions(board_size)
+    placements = (
+        [cell_types.OBSTACLE] * num_obst +
+        [cell_types.PIT] * num_pit +
+        [cell_types.WUMPUS] * num_wump +
+        [cell_types.GOLD]
+    )
+    squares = sample_squares(width * height, len(placements) + 1, rng)
+
+    cells = bytearray(width * height)
+    for square, cell_type in zip(squares, placements):
+        cells[square] = cell_type
+    start = squares[-1]
+    starting_pos = [start % width, start // width]
+    starting_direction = choose_direction(rng)
+
+    if compact:
+        return CompactBoardState(
+            cells, width, starting_pos, starting_direction
+        )
+    return BoardState(
+        board=grid_of(cells, width),
+        pos=starting_pos,
+        direction=starting_direction
+    )
+
+
+def grid_of(cells, width):
+    """
+    Gives the cells of a board as rows of cells
+
+    :param cells: the type of every cell on the board, in row order
+    :type cells: bytearray
+    :param width: the number of columns on the board
+    :type width: int
+    :rtype: [[Cell]]
+    :return: the rows of the board
+    """
+    return [
+        [SHARED_CELLS[cell_type] for cell_type in cells[first:first + width]]
+        for first in xrange(0, len(cells), width)
+    ]
+
+
+def sample_squares(squares, count, rng=random):
+    """
+    Chooses distinct squares uniformly with the first steps of a
+    Fisher-Yates shuffle of the square indices. Only the moved indices
+    are stored, so this takes time and memory in proportion to count
+    rather than to the number of squares.
+
+    :param squares: the number of squares to choose from
+    :type squares: int
+    :param count: the number of squares to choose
+    :type count: int
+    :param rng: the generator to draw from
+    :type rng: random.Random
+    :rtype: list[int]
+    :return: the chosen square indices, in the order they were chosen
+    """
+    moved = {}
+    chosen = []
+    for index in xrange(count):
+        swap = rng.randrange(index, squares)
+        chosen.append(moved.get(swap, swap))
+        moved[swap] = moved.get(index, index)
+    return chosen
+
+
+def exact_counts(board_size, prob_obst, prob_pit, prob_wump):
+    """
+    Gives the expected number of obstacles, pits and wumpuses on a board
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param prob_obst: probability of an obstical
+    :type prob_obst: float
+    :param prob_pit: probability of a pit
+    :type prob_pit: float
+    :param prob_wump: probability of a wumpus
+    :type prob_wump: float
+    :rtype: tuple(int, int, int)
+    :return: the number of obstacles, pits and wumpuses to place
+    """
+    width, height = board_dimensions(board_size)
+    return tuple(
+        int(round(prob * width * height))
+        for prob in (prob_obst, prob_pit, prob_wump)
+    )
+
+
+def place_in_empty_cell(board, cell_type, empty_cells, rng=random):
     """
     Places a cell of given type in a random empty cell
 
@@ -74,32 +645,36 @@ def place_in_empty_cell(board, cell_type, empty_cells):
     :type cell_type: int
     :param empty_cells: a list of empty cells
     :type empty_cells: list
+    :param rng: the generator to draw from
+    :type rng: random.Random
     :rtype: None
     :return: None
     """
-    row, col = choose_empty_cell(empty_cells)
+    row, col = choose_empty_cell(empty_cells, rng)
     board[row][col] = Cell(cell_type)
 
 
-def choose_empty_cell(empty_cells):
+def choose_empty_cell(empty_cells, rng=random):
     """
     Chooses an empty cell and removes it from the set
 
     :param empty_cells: list of empty cells
     :type empty_cells: tuple
+    :param rng: the generator to draw from
+    :type rng: random.Random
     :rtype: tuple
     :return: Chooses an empty cell
     """
-    empty_cell = choice(empty_cells)
+    empty_cell = rng.choice(empty_cells)
     empty_cells.remove(empty_cell)
     return empty_cell
 
 
-def choose_direction():
-    return choice(directions.DIRECTIONS)
+def choose_direction(rng=random):
+    return rng.choice(directions.DIRECTIONS)
 
 
-def create_cell(prob_obst, prob_pit, prob_wump):
+def create_cell(prob_obst, prob_pit, prob_wump, rng=random):
     """
     Creates a cell of the correct type using the probabilities
 
@@ -109,10 +684,12 @@ def create_cell(prob_obst, prob_pit, prob_wump):
     :type prob_pit: float
     :param prob_wump: probability that a cell is of type wumpus
     :type prob_wump: float
+    :param rng: the generator to draw from
+    :type rng: random.Random
     :rtype: float
     :return: a Cell of a random type
     """
-    cell_type = random()
+    cell_type = rng.random()
 
     if cell_type <= prob_obst:
         return Cell(cell_types.OBSTACLE)
@@ -123,37 +700,84 @@ def create_cell(prob_obst, prob_pit, prob_wump):
     return Cell(cell_types.EMPTY)
 
 
-def valid_input(board_size, prob_obst, prob_pit, prob_wump):
+def valid_input(board_size, prob_obst, prob_pit, prob_wump,
+                max_size=MAX_BOARD_SIZE):
     """
     Checks if the input to the function is valid
 
-    :param board_size: desired size of the board
-    :type board_size: int
+    :param board_size: desired size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
     :param prob_obst: probability of an obsticle
     :type prob_obst: float
     :param prob_pit: probability of a pit
     :type prob_pit: float
     :param prob_wump: probability of a wumpus
     :type prob_wump: float
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
     :rtype: bool
     :return: if the input is valid
     """
     return (
-        check_board_size(board_size) and
+        check_board_size(board_size, max_size) and
         check_prob(prob_obst, prob_pit, prob_wump)
     )
 
 
-def check_board_size(board_size):
+def check_board_size(board_size, max_size=MAX_BOARD_SIZE):
     """
     Checks that the board size is valid
 
-    :param board_size: size of the board
-    :type board_size: int
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
     :rtype: bool
     :return: return if the board size is valid
     """
-    return 5 <= board_size <= 25
+    return all(
+        MIN_BOARD_SIZE <= side and (max_size is None or side <= max_size)
+        for side in board_dimensions(board_size)
+    )
+
+
+def board_dimensions(board_size):
+    """
+    Gives the width and height of a board size
+
+    :param board_size: size of a square board, or a width and height
+    :type board_size: int or tuple(int, int)
+    :rtype: tuple(int, int)
+    :return: the width and height of the board
+    """
+    if isinstance(board_size, (int, long)):
+        return board_size, board_size
+    return tuple(board_size)
+
+
+def check_counts(board_size, num_obst, num_pit, num_wump):
+    """
+    Checks that the cell counts fit on the board, leaving room for the
+    gold and the starting square
+
+    :param board_size: size of the board, or its width and height
+    :type board_size: int or tuple(int, int)
+    :param num_obst: number of obstacles
+    :type num_obst: int
+    :param num_pit: number of pits
+    :type num_pit: int
+    :param num_wump: number of wumpuses
+    :type num_wump: int
+    :rtype: bool
+    :return: return if the counts are correct
+    """
+    width, height = board_dimensions(board_size)
+    return (
+        min(num_obst, num_pit, num_wump) >= 0 and
+        num_obst + num_pit + num_wump + 2 <= width * height
+    )
 
 
 def check_prob(prob_obst, prob_pit, prob_wump):
@@ -0,0 +1,124 @@
+"""
+Measures where an environment spends its time: how long each type of
+action takes to perform, and how often the board state is asked about
+its squares.
+"""
+from bisect import bisect_left
+from timeit import default_timer
+
+import actions
+
+"""
+The upper bounds, in seconds, of the buckets actions are sorted into by
+how long they took, doubling from a microsecond to about a second. Slower
+actions land in one last bucket without a bound.
+"""
+LATENCY_BUCKETS = tuple(2 ** power * 1e-6 for power in xrange(21))
+
+"""
+The board state methods whose calls are counted.
+"""
+COUNTED_METHODS = ('cell_at', 'cell_type_at', 'arrow_stop', 'on_board',
+                   'adj_cells')
+
+
+class Instrumentation(object):
+    def __init__(self, board_state):
+        """
+        Starts measuring an environment's actions and the calls made to
+        its board state. Calls are counted by wrapping the board state's
+        methods, so nothing is counted after stop is called.
+
+        :param board_state: the board state of the environment
+        :type board_state: BoardState
+        """
+        self.board_state = board_state
+        self.action_calls = {action: 0 for action in actions.ACTIONS}
+        self.action_seconds = {action: 0.0 for action in actions.ACTIONS}
+        self.action_histograms = {
+            action: [0] * (len(LATENCY_BUCKETS) + 1)
+            for action in actions.ACTIONS
+        }
+        self.method_calls = {name: 0 for name in COUNTED_METHODS}
+
+        for name in COUNTED_METHODS:
+            setattr(board_state, name, self._counted(name))
+
+    def _counted(self, name):
+        """
+        Wraps a method of the board state so that its calls are counted.
+
+        :param name: the name of the method
+        :type name: str
+        :rtype: function
+        :returns: the method, counting each call in method_calls
+        """
+        method = getattr(self.board_state, name)
+        method_calls = self.method_calls
+
+        def counted(*args):
+            method_calls[name] += 1
+            return method(*args)
+        return counted
+
+    def stop(self):
+        """
+        Stops counting calls to the board state, by taking the wrappers
+        off its methods.
+
+        :rtype: None
+        :returns: Nothing, but puts back the board state's own methods
+        """
+        for name in COUNTED_METHODS:
+            self.board_state.__dict__.pop(name, None)
+
+    def time_action(self, perform, action):
+        """
+        Performs an action, recording how long it took.
+
+        :param perform: performs the action, without being measured
+        :type perform: function
+        :param action: the action to perform
+        :type action: int
+        """
+        start = default_timer()
+        perform(action)
+        seconds = default_timer() - start
+
+        self.action_calls[action] += 1
+        self.action_seconds[action] += seconds
+        self.action_histograms[action][
+            bisect_left(LATENCY_BUCKETS, seconds)
+        ] += 1
+
+    def snapshot(self):
+        """
+        Gives everything measured so far.
+
+        :rtype: dict
+        :returns: under 'actions', for each action name, the number of
+            calls, the total and mean seconds taken and a histogram of
+            [upper bound in seconds, calls] pairs for the buckets that
+            were used, and under 'board_state', the number of calls to
+            each counted method
+        """
+        import environment
+
+        found = {}
+        for action in actions.ACTIONS:
+            calls = self.action_calls[action]
+            seconds = self.action_seconds[action]
+            bounds = LATENCY_BUCKETS + (float('inf'),)
+            found[environment.ACTION_NAME[action]] = {
+                'calls': calls,
+                'seconds': seconds,
+                'mean_seconds': seconds / calls if calls else 0.0,
+                'histogram': [
+                    [bound, count] for bound, count
+                    in zip(bounds, self.action_histograms[action]) if count
+                ]
+            }
+        return {
+            'actions': found,
+            'board_state': dict(self.method_calls)
+        }
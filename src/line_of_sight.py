@@ -0,0 +1,197 @@
+"""
+Finds where arrows stop without walking them across the board, by indexing
+the next arrow-stopping square along the rows and columns.
+"""
+from array import array
+
+import numpy as np
+
+import cell_types
+import directions
+
+
+def find(parents, offset):
+    """
+    Follows the pointers of a line from an offset to the stopper they
+    lead to, halving the path on the way so later lookups are shorter.
+
+    :param parents: the pointer of each offset along the line, with one
+        more offset past the end of the board pointing to itself
+    :type parents: array
+    :param offset: where to start
+    :type offset: int
+    :rtype: int
+    :returns: the offset of the first stopper at or past the given one
+    """
+    parent = parents[offset]
+    while parent != offset:
+        grandparent = parents[parent]
+        parents[offset] = grandparent
+        offset, parent = grandparent, parents[grandparent]
+    return offset
+
+
+class ArrowIndex(object):
+    def __init__(self):
+        """
+        Creates an empty index of the arrow-stopping squares of a board.
+        Each row and column is indexed, in each direction, the first time
+        an arrow flies along it, as a union-find forest where every square
+        points towards the next stopper. Clearing a stopper points it at
+        the square ahead, so a lookup takes near constant time however
+        many squares have been cleared.
+
+        The index keeps no reference to the board, which is passed to
+        each lookup, so board states forked from each other can share it
+        until one of them changes its cells.
+        """
+        self.lines = {}
+
+    def stop(self, board_state, square, direction):
+        """
+        Finds where an arrow flying from a square stops.
+
+        :param board_state: the board the arrow flies over
+        :type board_state: BoardState
+        :param square: where the arrow starts, which it can stop at (see
+            squares)
+        :type square: int
+        :param direction: the direction the arrow flies in
+        :type direction: int
+        :rtype: int
+        :returns: the square of the first obstacle or wumpus in the
+            arrow's path, or -1 if the arrow leaves the board
+        """
+        key, offset = locate(board_state, square, direction)
+        parents = self.lines.get(key)
+        if parents is None:
+            parents = self.lines[key] = build_line(board_state, key)
+
+        distance = find(parents, offset) - offset
+        if offset + distance == len(parents) - 1:
+            return -1
+        return square + board_state.squares.offsets[direction] * distance
+
+    def cleared(self, board_state, square):
+        """
+        Updates the index after the stopper at a square is removed.
+
+        :param board_state: the board the stopper was removed from
+        :type board_state: BoardState
+        :param square: the square that no longer stops arrows
+        :type square: int
+        """
+        for direction in directions.DIRECTIONS:
+            key, offset = locate(board_state, square, direction)
+            parents = self.lines.get(key)
+            if parents is not None:
+                parents[offset] = offset + 1
+
+    def blocked(self, board_state, square):
+        """
+        Updates the index after a stopper is put at a square, which
+        union-find cannot undo, by forgetting the lines through it so
+        they are indexed again when next used.
+
+        :param board_state: the board the stopper was put on
+        :type board_state: BoardState
+        :param square: the square that now stops arrows
+        :type square: int
+        """
+        for direction in directions.DIRECTIONS:
+            self.lines.pop(locate(board_state, square, direction)[0], None)
+
+
+def locate(board_state, square, direction):
+    """
+    Gives the line a square lies on in a direction, and how far along
+    it the square is.
+
+    :param board_state: the board the line is on
+    :type board_state: BoardState
+    :param square: the square (see squares)
+    :type square: int
+    :param direction: the direction the line runs in
+    :type direction: int
+    :rtype: tuple(tuple(int, int), int)
+    :returns: the direction and the row or column of the line, and the
+        square's offset along it
+    """
+    row, col = divmod(square, board_state.width)
+    d_col, d_row = directions.MOVEMENTS[direction]
+    if d_col:
+        offset = col if d_col > 0 else board_state.width - 1 - col
+        return (direction, row), offset
+    offset = row if d_row > 0 else board_state.height - 1 - row
+    return (direction, col), offset
+
+
+def build_line(board_state, key):
+    """
+    Indexes one line of a board, pointing each stopper at itself and
+    every other square at the square ahead.
+
+    :param board_state: the board the line is on
+    :type board_state: BoardState
+    :param key: the direction and the row or column of the line
+    :type key: tuple(int, int)
+    :rtype: array
+    :returns: the pointer of each offset along the line, with one more
+        offset past the end
+    """
+    direction, number = key
+    d_col, d_row = directions.MOVEMENTS[direction]
+    if d_col:
+        types = board_state.row_types(number)
+    else:
+        types = board_state.column_types(number)
+    if d_col < 0 or d_row < 0:
+        types = types[::-1]
+
+    parents = array('i', xrange(1, len(types) + 2))
+    parents[-1] = len(types)
+    for offset, cell_type in enumerate(types):
+        if cell_type in cell_types.STOP_ARROW_CELLS:
+            parents[offset] = offset
+    return parents
+
+
+def arrow_targets(boards):
+    """
+    Finds the wumpus an arrow shot from every square of many boards in
+    every direction would kill, by looking along each row and column for
+    the nearest thing that stops arrows.
+
+    :param boards: the cell type of every square, with shape (boards,
+        rows, columns)
+    :type boards: numpy.ndarray
+    :rtype: numpy.ndarray
+    :returns: an int32 array of shape (boards, rows * columns, directions)
+        holding the square of the wumpus killed, or -1 if none would be
+    """
+    count, height, width = boards.shape
+    squares = np.arange(height * width).reshape(height, width)
+    targets = np.empty((count, height * width, len(directions.DIRECTIONS)),
+                       np.int32)
+    for direction in directions.DIRECTIONS:
+        # turn the boards so that the arrow flies along the rows
+        d_col, d_row = directions.MOVEMENTS[direction]
+        lines, indices = ((boards, squares) if d_col else
+                          (boards.transpose(0, 2, 1), squares.T))
+        if d_col < 0 or d_row < 0:
+            lines, indices = lines[..., ::-1], indices[:, ::-1]
+
+        length = lines.shape[-1]
+        stops = np.isin(lines, list(cell_types.STOP_ARROW_CELLS))
+        nearest = np.where(stops, np.arange(length), length)
+        nearest = np.minimum.accumulate(nearest[..., ::-1], axis=-1)[
+            ..., ::-1
+        ]
+        stopper = np.minimum(nearest, length - 1)
+        found = np.where(
+            (nearest < length) & (np.take_along_axis(lines, stopper, -1) ==
+                                  cell_types.WUMPUS),
+            indices[np.arange(len(indices))[:, None], stopper], -1
+        )
+        targets[:, indices.ravel(), direction] = found.reshape(count, -1)
+    return targets
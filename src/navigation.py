@@ -1,11 +1,94 @@
+from collections import OrderedDict
+from heapq import heappush, heappop
+
 import directions
 import actions
+import environment
+
+TURN_COST = min(
+    environment.ACTION_PENALTY[actions.LEFT],
+    environment.ACTION_PENALTY[actions.RIGHT]
+)
+FORWARD_COST = environment.ACTION_PENALTY[actions.FORWARD]
+
+"""
+The cost of a state that cannot reach any goal.
+"""
+UNREACHABLE = float('inf')
+
+"""
+The actions that change which way the agent faces, and how.
+"""
+TURNS = (
+    (actions.LEFT, -1, environment.ACTION_PENALTY[actions.LEFT]),
+    (actions.RIGHT, 1, environment.ACTION_PENALTY[actions.RIGHT])
+)
+
+"""
+How many quarter turns clockwise each turning action turns the agent.
+"""
+TURN_BY_ACTION = {action: turn for action, turn, _ in TURNS}
 
 
 class Navigator:
 
-    def __init__(self, reasoning_agent):
+    def __init__(self, reasoning_agent, cache_size=0):
+        """
+        Creates a navigator that only moves through squares the reasoning
+        agent considers safe.
+
+        :param reasoning_agent: tells whether a square is safe
+        :type reasoning_agent: function
+        :param cache_size: how many searches to remember, or 0 to not
+            remember any. A caching navigator must be told whenever what
+            the reasoning agent considers safe changes (see
+            knowledge_changed)
+        :type cache_size: int
+        """
         self.reasoning_agent = reasoning_agent
+        self.expanded = 0
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.knowledge_version = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def knowledge_changed(self):
+        """
+        Records that the reasoning agent's idea of which squares are safe
+        has changed, so remembered searches are no longer used.
+
+        :rtype: None
+        :returns: Nothing, but moves on the knowledge version
+        """
+        self.knowledge_version += 1
+        self.cache.clear()
+
+    def squares_changed(self, squares):
+        """
+        Records that the reasoning agent has changed its mind about
+        whether some squares are safe.
+
+        :param squares: the squares whose safety changed
+        :type squares: iterable(Tuple(int,int))
+        :rtype: None
+        :returns: Nothing, but moves on the knowledge version
+        """
+        self.knowledge_changed()
+
+    def cache_stats(self):
+        """
+        Gives how well the search cache is doing.
+
+        :rtype: dict
+        :return: the number of cache hits and misses, and how many
+            searches are remembered
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self.cache)
+        }
 
     def path_to(self, cur_loc, final_loc):
         """
@@ -26,7 +109,10 @@ class Navigator:
 
     def a_star(self, cur_x, cur_y, cur_dir, fin_x, fin_y):
         """
-        A start implementation for navigation
+        A star search over the agent's position and direction, costing
+        each action by its score penalty, so the actions returned are the
+        cheapest way to reach the desired square. The number of states
+        expanded is kept in expanded.
 
         :param cur_x: current column location of agent
         :type cur_x: int
@@ -42,28 +128,197 @@ class Navigator:
         :return: A queue of actions to take to get from the current
             square to the desired square
         """
-        frontier = list()
-        frontier.append([cur_x, cur_y, cur_dir, []])
-        came_from = dict()
-        came_from[(cur_x, cur_y)] = None
+        def heuristic(x, y, direction):
+            return self.heuristic(x, y, direction, fin_x, fin_y)
 
-        while len(frontier) > 0:
-            x, y, direction, actions_to_take = frontier.pop(0)
-            if (x, y) == (fin_x, fin_y):
-                return actions_to_take
+        found = self.search(
+            (cur_x, cur_y, cur_dir), {(fin_x, fin_y)}, heuristic
+        )
+        return found and found[1]
 
-            to_visit = self.calculate_actions(
-                x, y, direction, actions_to_take, self.get_neighbors(x, y)
-            )
+    def path_to_nearest(self, cur_loc, final_locs):
+        """
+        Finds the cheapest path from the current location to any of the
+        desired locations, with a single search
+
+        :param cur_loc: position vector
+        :type cur_loc: Tuple(int,int,int)
+        :param final_locs: vector locations of the desired squares
+        :type final_locs: set(Tuple(int,int))
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the cheapest square to get to along with the queue of
+            actions to take to get there, or None if none can be reached
+        """
+        return self.search(tuple(cur_loc), final_locs)
+
+    def search(self, start, goals, heuristic=None):
+        """
+        Searches over the agent's position and direction for the cheapest
+        way to reach any of the goal squares, costing each action by its
+        score penalty. The goal squares may be entered even if the
+        reasoning agent does not consider them safe. The number of states
+        expanded is kept in expanded.
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goals: the squares to search for
+        :type goals: set(Tuple(int,int))
+        :param heuristic: gives a lower bound on the cost from a column,
+            row and direction to the goals, or None to search without one
+        :type heuristic: function
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the goal square reached and the actions to reach it, or
+            None if no goal can be reached
+        """
+        if not self.cache_size:
+            return self.uncached_search(start, goals, heuristic)
+
+        key = (start, frozenset(goals), self.knowledge_version)
+        if key in self.cache:
+            self.cache_hits += 1
+            found = self.cache.pop(key)
+        else:
+            self.cache_misses += 1
+            found = self.uncached_search(start, goals, heuristic)
+            if len(self.cache) >= self.cache_size:
+                self.cache.popitem(last=False)
+        self.cache[key] = found
+
+        return found and (found[0], list(found[1]))
 
-            to_visit.sort(key=lambda k: len(k[3]))
-            for cell in to_visit:
-                loc = (cell[0], cell[1])
-                if loc not in came_from:
-                    frontier.append(cell)
-                    came_from[loc] = cell
+    def uncached_search(self, start, goals, heuristic=None):
+        """
+        Searches for the cheapest way to reach any of the goal squares,
+        without looking in the cache (see search)
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goals: the squares to search for
+        :type goals: set(Tuple(int,int))
+        :param heuristic: gives a lower bound on the cost to the goals
+        :type heuristic: function
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the goal square reached and the actions to reach it, or
+            None if no goal can be reached
+        """
+        estimate = heuristic(*start) if heuristic else 0
+        frontier = [(estimate, estimate, 0, start)]
+        best_cost = {start: 0}
+        came_from = {start: None}
+        self.expanded = 0
+
+        while frontier:
+            _, _, cost, state = heappop(frontier)
+            x, y, direction = state
+            if (x, y) in goals:
+                return (x, y), self.reconstruct_actions(came_from, state)
+            if cost > best_cost[state]:
+                continue
+            self.expanded += 1
+
+            for action, next_state, step_cost in self.successors(
+                    x, y, direction, goals):
+                next_cost = cost + step_cost
+                if next_cost < best_cost.get(next_state, next_cost + 1):
+                    best_cost[next_state] = next_cost
+                    came_from[next_state] = (state, action)
+                    estimate = heuristic(*next_state) if heuristic else 0
+                    heappush(frontier, (
+                        next_cost + estimate, estimate, next_cost, next_state
+                    ))
         return None
 
+    def reconstruct_actions(self, came_from, state):
+        """
+        Walks back from a state to the start of the search to give the
+        actions that led to it
+
+        :param came_from: the state each state was reached from, and by
+            which action, or None for the start state
+        :type came_from: dict
+        :param state: the state to walk back from
+        :type state: tuple(int, int, int)
+        :rtype: list[int]
+        :return: the actions from the start state to the given state
+        """
+        actions_to_take = []
+        step = came_from[state]
+        while step is not None:
+            state, action = step
+            actions_to_take.append(action)
+            step = came_from[state]
+        actions_to_take.reverse()
+        return actions_to_take
+
+    def successors(self, x, y, direction, goals=()):
+        """
+        Gives the states the agent can reach with one action, along with
+        the cost of that action
+
+        :param x: current column location of agent
+        :type x: int
+        :param y: current row location of agent
+        :type y: int
+        :param direction: cardinal direction agent is facing
+        :type direction: int
+        :param goals: squares that may be moved into even if they are not
+            known to be safe
+        :type goals: set(Tuple(int,int))
+        :rtype: list[tuple(int, tuple(int, int, int), int)]
+        :return: the action, the state it leads to, and its cost
+        """
+        next_states = [
+            (action, (x, y, (direction + turn) % len(directions.DIRECTIONS)),
+             cost)
+            for action, turn, cost in TURNS
+        ]
+        d_x, d_y = directions.MOVEMENTS[direction]
+        if ((x + d_x, y + d_y) in goals or
+                self.reasoning_agent([x + d_x, y + d_y])):
+            next_states.append(
+                (actions.FORWARD, (x + d_x, y + d_y, direction), FORWARD_COST)
+            )
+        return next_states
+
+    def heuristic(self, x, y, direction, fin_x, fin_y):
+        """
+        Gives a lower bound on the cost of getting to the desired square:
+        a move forward for every square in between, plus the fewest turns
+        needed to face each way the agent still has to go
+
+        :param x: current column location of agent
+        :type x: int
+        :param y: current row location of agent
+        :type y: int
+        :param direction: cardinal direction agent is facing
+        :type direction: int
+        :param fin_x: the desired column location of agent
+        :type fin_x: int
+        :param fin_y: the desired row location of agent
+        :type fin_y: int
+        :rtype: int
+        :return: the least the rest of the path could cost
+        """
+        d_x = fin_x - x
+        d_y = fin_y - y
+        needed = []
+        if d_x:
+            needed.append(directions.EAST if d_x > 0 else directions.WEST)
+        if d_y:
+            needed.append(directions.SOUTH if d_y > 0 else directions.NORTH)
+
+        if not needed:
+            turns = 0
+        elif direction in needed:
+            turns = len(needed) - 1
+        elif (len(needed) == 2 or
+              (direction + 2) % len(directions.DIRECTIONS) == needed[0]):
+            turns = 2
+        else:
+            turns = 1
+
+        return (abs(d_x) + abs(d_y)) * FORWARD_COST + turns * TURN_COST
+
     def get_neighbors(self, x, y):
         """
         Returns a list of safe cells to check
@@ -199,3 +454,590 @@ class Navigator:
                 actions.LEFT,
                 actions.FORWARD
             ]
+
+
+class IncrementalNavigator(Navigator):
+
+    def __init__(self, reasoning_agent, cache_size=0):
+        """
+        Creates a navigator for replanning towards the same goals while
+        the reasoning agent finds out which squares are safe, best suited
+        to squares that stop being safe (Adaptive A*). It keeps the last
+        path found, and a lower bound on the cost to the goals of every
+        state its searches expanded. While squares only stop being safe,
+        the path is given again from wherever the agent is along it,
+        unless one of its squares was lost, and a new search is steered
+        towards the goals by those bounds. Once a square becomes safe, or
+        the goals change, both are forgotten. The navigator must be told
+        of every square whose safety changes (see squares_changed).
+
+        :param reasoning_agent: tells whether a square is safe
+        :type reasoning_agent: function
+        :param cache_size: how many searches to remember (see Navigator)
+        :type cache_size: int
+        """
+        Navigator.__init__(self, reasoning_agent, cache_size)
+        self.goals = frozenset()
+        self.bounds = {}
+        self.reused = 0
+        self.forget_path()
+
+    def forget_path(self):
+        """
+        Forgets the last path found.
+
+        :rtype: None
+        :returns: Nothing, but the next call searches again
+        """
+        self.path = None
+        self.path_states = {}
+        self.path_squares = set()
+
+    def squares_changed(self, squares):
+        """
+        Records that the reasoning agent has changed its mind about
+        whether some squares are safe. The last path is forgotten if it
+        goes through one of them, and everything is forgotten if one of
+        them became safe, since that may make a cheaper path.
+
+        :param squares: the squares whose safety changed
+        :type squares: iterable(Tuple(int,int))
+        :rtype: None
+        :returns: Nothing, but forgets what the change made wrong
+        """
+        Navigator.squares_changed(self, squares)
+        for x, y in squares:
+            if self.reasoning_agent([x, y]):
+                self.bounds = {}
+                self.forget_path()
+                return
+            if (x, y) in self.path_squares:
+                self.forget_path()
+
+    def uncached_search(self, start, goals, heuristic=None):
+        """
+        Gives the rest of the last path if the agent is on it, otherwise
+        searches for the cheapest way to reach any of the goal squares,
+        estimating the cost from each state by the greater of the
+        heuristic and what earlier searches found (see search). The
+        number of times a path was given again is kept in reused.
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goals: the squares to search for
+        :type goals: set(Tuple(int,int))
+        :param heuristic: gives a lower bound on the cost to the goals
+        :type heuristic: function
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the goal square reached and the actions to reach it, or
+            None if no goal can be reached
+        """
+        if goals != self.goals:
+            self.goals = frozenset(goals)
+            self.bounds = {}
+            self.forget_path()
+        start = tuple(start)
+        index = self.path_states.get(start)
+        if index is not None:
+            self.expanded = 0
+            self.reused += 1
+            return self.path[0], self.path[1][index:]
+
+        bounds = self.bounds
+
+        def estimate(state):
+            bound = bounds.get(state, 0)
+            return max(bound, heuristic(*state)) if heuristic else bound
+
+        first_estimate = estimate(start)
+        frontier = [(first_estimate, first_estimate, 0, start)]
+        best_cost = {start: 0}
+        came_from = {start: None}
+        expanded = []
+
+        while frontier:
+            _, _, cost, state = heappop(frontier)
+            x, y, direction = state
+            if (x, y) in goals:
+                # every expanded state is at least this much closer to the
+                # goals than the start is, however the agent moves later
+                for closed in expanded:
+                    bounds[closed] = cost - best_cost[closed]
+                self.expanded = len(expanded)
+                path = self.reconstruct_actions(came_from, state)
+                self.remember_path(start, (x, y), path)
+                return (x, y), list(path)
+            if cost > best_cost[state]:
+                continue
+            expanded.append(state)
+
+            for action, next_state, step_cost in self.successors(
+                    x, y, direction, goals):
+                next_cost = cost + step_cost
+                if next_cost < best_cost.get(next_state, next_cost + 1):
+                    best_cost[next_state] = next_cost
+                    came_from[next_state] = (state, action)
+                    next_estimate = estimate(next_state)
+                    heappush(frontier, (
+                        next_cost + next_estimate, next_estimate, next_cost,
+                        next_state
+                    ))
+        self.expanded = len(expanded)
+        return None
+
+    def remember_path(self, start, goal, path):
+        """
+        Remembers a path, along with the state the agent is in before each
+        of its actions and the squares it goes through.
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goal: the goal square the path reaches
+        :type goal: Tuple(int,int)
+        :param path: the actions to reach the goal
+        :type path: list[int]
+        :rtype: None
+        :returns: Nothing, but the path can be given again
+        """
+        self.path = (goal, path)
+        self.path_states = {}
+        self.path_squares = set()
+        x, y, direction = start
+        for index, action in enumerate(path + [None]):
+            self.path_states[(x, y, direction)] = index
+            self.path_squares.add((x, y))
+            if action == actions.FORWARD:
+                d_x, d_y = directions.MOVEMENTS[direction]
+                x, y = x + d_x, y + d_y
+            elif action is not None:
+                direction += TURN_BY_ACTION[action]
+                direction %= len(directions.DIRECTIONS)
+
+
+"""
+The side, in squares, of the clusters a HierarchicalNavigator splits the
+board into.
+"""
+CLUSTER_SIZE = 10
+
+"""
+The length of a run of squares along a cluster border from which it is
+crossed at both ends instead of at the middle.
+"""
+LONG_RUN = 6
+
+
+class HierarchicalNavigator(Navigator):
+
+    def __init__(self, reasoning_agent, width, height,
+                 cluster_size=CLUSTER_SIZE, cache_size=0):
+        """
+        Creates a navigator for long routes on large boards (HPA*). The
+        board is split into square clusters, the ways from one cluster
+        into the next are found once, and the cheapest way across each
+        cluster between them is remembered, so a long route is planned
+        across clusters and then pieced together from remembered paths.
+        Routes found this way are close to, but not always, the cheapest.
+        Searches for several squares, or for a square less than two
+        clusters away, are done as by Navigator.
+
+        :param reasoning_agent: tells whether a square is safe
+        :type reasoning_agent: function
+        :param width: the number of columns on the board
+        :type width: int
+        :param height: the number of rows on the board
+        :type height: int
+        :param cluster_size: the side of each cluster, in squares
+        :type cluster_size: int
+        :param cache_size: how many searches to remember (see Navigator)
+        :type cache_size: int
+        """
+        Navigator.__init__(self, reasoning_agent, cache_size)
+        self.width = width
+        self.height = height
+        self.cluster_size = cluster_size
+        self.min_distance = 2 * cluster_size
+        self.transitions = {}
+        self.entry_edges = {}
+
+    def squares_changed(self, squares):
+        """
+        Records that the reasoning agent has changed its mind about
+        whether some squares are safe, forgetting what was worked out
+        about the clusters and borders they are in.
+
+        :param squares: the squares whose safety changed
+        :type squares: iterable(Tuple(int,int))
+        :rtype: None
+        :returns: Nothing, but the clusters are worked out again when used
+        """
+        Navigator.squares_changed(self, squares)
+        size = self.cluster_size
+        for x, y in squares:
+            cluster = (x // size, y // size)
+            self.entry_edges.pop(cluster, None)
+            for border in self.borders_at(x, y):
+                self.transitions.pop(border, None)
+                (c_x, c_y), direction = border
+                d_x, d_y = directions.MOVEMENTS[direction]
+                self.entry_edges.pop((c_x, c_y), None)
+                self.entry_edges.pop((c_x + d_x, c_y + d_y), None)
+
+    def precompute(self):
+        """
+        Works out the ways across every cluster up front, rather than as
+        searches first reach them.
+
+        :rtype: None
+        :returns: Nothing, but fills in the clusters' edges
+        """
+        size = self.cluster_size
+        for c_y in xrange((self.height + size - 1) // size):
+            for c_x in xrange((self.width + size - 1) // size):
+                self.edges_from((c_x, c_y))
+
+    def uncached_search(self, start, goals, heuristic=None):
+        """
+        Searches for the cheapest way to reach any of the goal squares,
+        going by the clusters when there is a single goal far enough
+        away (see search)
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goals: the squares to search for
+        :type goals: set(Tuple(int,int))
+        :param heuristic: gives a lower bound on the cost to the goals
+        :type heuristic: function
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the goal square reached and the actions to reach it, or
+            None if no goal can be reached
+        """
+        if len(goals) == 1:
+            (goal,) = goals
+            if (self.on_board(start[0], start[1]) and
+                    self.on_board(goal[0], goal[1]) and
+                    abs(goal[0] - start[0]) + abs(goal[1] - start[1]) >=
+                    self.min_distance):
+                found = self.search_clusters(tuple(start), tuple(goal))
+                if found:
+                    return found
+                # a goal that is not safe may only be enterable from
+                # another cluster, which the clusters do not account for
+        return Navigator.uncached_search(self, start, goals, heuristic)
+
+    def search_clusters(self, start, goal):
+        """
+        Searches from one cluster entry to the next, starting with the
+        ways out of the agent's cluster and ending with the ways into the
+        goal's cluster. The number of entries expanded is kept in
+        expanded.
+
+        :param start: the agent's column, row and direction
+        :type start: Tuple(int,int,int)
+        :param goal: the square to search for
+        :type goal: Tuple(int,int)
+        :rtype: Tuple(Tuple(int,int), list[int])
+        :return: the goal square and the actions to reach it, or None if
+            no way through the clusters was found
+        """
+        to_goal = self.paths_to_square(goal, self.cluster_of(goal))
+        best_cost = {}
+        came_from = {}
+        frontier = []
+
+        def reach(node, cost, parent, path):
+            if cost < best_cost.get(node, UNREACHABLE):
+                best_cost[node] = cost
+                came_from[node] = (parent, path)
+                if node == goal:
+                    estimate = 0
+                else:
+                    estimate = self.heuristic(*(node + goal))
+                heappush(frontier, (cost + estimate, estimate, cost, node))
+
+        for entry, cost, path in self.exits_from(start):
+            reach(entry, cost, None, path)
+
+        self.expanded = 0
+        while frontier:
+            _, _, cost, node = heappop(frontier)
+            if node == goal:
+                return goal, self.join_paths(came_from, goal)
+            if cost > best_cost[node]:
+                continue
+            self.expanded += 1
+
+            if node in to_goal:
+                reach(goal, cost + to_goal[node][0], node,
+                      self.follow_path(to_goal, node))
+            for entry, step_cost, path in self.edges_from(
+                    self.cluster_of(node)).get(node, ()):
+                reach(entry, cost + step_cost, node, path)
+        return None
+
+    def join_paths(self, came_from, node):
+        """
+        Puts together the actions along the route that led to a node
+
+        :param came_from: the node each node was reached from, and the
+            actions that took it there
+        :type came_from: dict
+        :param node: the node to walk back from
+        :type node: tuple
+        :rtype: list[int]
+        :return: the actions from the agent to the node
+        """
+        paths = []
+        while node is not None:
+            node, path = came_from[node]
+            paths.append(path)
+        actions_to_take = []
+        for path in reversed(paths):
+            actions_to_take.extend(path)
+        return actions_to_take
+
+    def edges_from(self, cluster):
+        """
+        Gives the ways across a cluster from each of its entries to the
+        entries of its neighbours, working them out if they are not known
+
+        :param cluster: the cluster's column and row, in clusters
+        :type cluster: Tuple(int,int)
+        :rtype: dict
+        :return: for each entry, a list of the entries it leads to along
+            with the cost and actions to get there
+        """
+        edges = self.entry_edges.get(cluster)
+        if edges is None:
+            edges = {}
+            for _, entry in self.cluster_transitions(cluster, inward=True):
+                edges[entry] = self.exits_from(entry)
+            self.entry_edges[cluster] = edges
+        return edges
+
+    def exits_from(self, start):
+        """
+        Finds the cheapest way from a state to each way out of its
+        cluster, without leaving the cluster
+
+        :param start: a column, row and direction
+        :type start: Tuple(int,int,int)
+        :rtype: list[tuple(tuple(int, int, int), int, list[int])]
+        :return: the entries of neighbouring clusters that can be reached,
+            with the cost and actions to reach each
+        """
+        cluster = self.cluster_of(start)
+        best_cost = {start: 0}
+        came_from = {start: None}
+        frontier = [(0, start)]
+        while frontier:
+            cost, state = heappop(frontier)
+            if cost > best_cost[state]:
+                continue
+            for action, next_state, step_cost in self.successors(*state):
+                if (self.cluster_of(next_state) != cluster or
+                        not self.on_board(next_state[0], next_state[1])):
+                    continue
+                next_cost = cost + step_cost
+                if next_cost < best_cost.get(next_state, next_cost + 1):
+                    best_cost[next_state] = next_cost
+                    came_from[next_state] = (state, action)
+                    heappush(frontier, (next_cost, next_state))
+
+        return [
+            (entry, best_cost[exit] + FORWARD_COST,
+             self.reconstruct_actions(came_from, exit) + [actions.FORWARD])
+            for exit, entry in self.cluster_transitions(cluster)
+            if exit in best_cost
+        ]
+
+    def paths_to_square(self, goal, cluster):
+        """
+        Finds the cheapest way from every state in a cluster to a square
+        in it, without leaving the cluster, by searching back from the
+        square. The square may be entered even if it is not safe.
+
+        :param goal: the square to reach
+        :type goal: Tuple(int,int)
+        :param cluster: the cluster the square is in
+        :type cluster: Tuple(int,int)
+        :rtype: dict
+        :return: for each state that can reach the square, its cost and
+            the action and state it goes on to, which is None at the goal
+        """
+        num_directions = len(directions.DIRECTIONS)
+        paths = {}
+        frontier = []
+        for direction in directions.DIRECTIONS:
+            paths[goal + (direction,)] = (0, None, None)
+            frontier.append((0, goal + (direction,)))
+
+        while frontier:
+            cost, state = heappop(frontier)
+            if cost > paths[state][0]:
+                continue
+            x, y, direction = state
+            previous = [
+                ((x, y, (direction - turn) % num_directions), action,
+                 turn_cost)
+                for action, turn, turn_cost in TURNS
+            ]
+            if (x, y) == goal or self.reasoning_agent([x, y]):
+                d_x, d_y = directions.MOVEMENTS[direction]
+                previous.append(
+                    ((x - d_x, y - d_y, direction), actions.FORWARD,
+                     FORWARD_COST)
+                )
+            for prev_state, action, step_cost in previous:
+                if (self.cluster_of(prev_state) != cluster or
+                        not self.on_board(prev_state[0], prev_state[1])):
+                    continue
+                prev_cost = cost + step_cost
+                if prev_cost < paths.get(prev_state, (prev_cost + 1,))[0]:
+                    paths[prev_state] = (prev_cost, action, state)
+                    heappush(frontier, (prev_cost, prev_state))
+        return paths
+
+    def follow_path(self, paths, state):
+        """
+        Reads off the actions from a state to the square searched back
+        from by paths_to_square
+
+        :param paths: the cost, action and next state of each state
+        :type paths: dict
+        :param state: the state to start from
+        :type state: Tuple(int,int,int)
+        :rtype: list[int]
+        :return: the actions from the state to the square
+        """
+        actions_to_take = []
+        _, action, state = paths[state]
+        while state is not None:
+            actions_to_take.append(action)
+            _, action, state = paths[state]
+        return actions_to_take
+
+    def cluster_transitions(self, cluster, inward=False):
+        """
+        Gives the ways out of (or into) a cluster, each as the state
+        facing out of one cluster and the state it moves forward to in
+        the next
+
+        :param cluster: the cluster's column and row, in clusters
+        :type cluster: Tuple(int,int)
+        :param inward: whether to give the ways into the cluster rather
+            than out of it
+        :type inward: bool
+        :rtype: list[tuple(tuple(int, int, int), tuple(int, int, int))]
+        :return: the state leaving a cluster and the state entering the
+            next
+        """
+        c_x, c_y = cluster
+        found = []
+        for border in (((c_x, c_y), directions.EAST),
+                       ((c_x, c_y), directions.SOUTH),
+                       ((c_x - 1, c_y), directions.EAST),
+                       ((c_x, c_y - 1), directions.SOUTH)):
+            for exit, entry in self.border_transitions(border):
+                if self.cluster_of(entry if inward else exit) == cluster:
+                    found.append((exit, entry))
+        return found
+
+    def border_transitions(self, border):
+        """
+        Finds the ways across the border between a cluster and the one
+        east or south of it: one for each run of squares that are safe on
+        both sides, crossing at the middle of the run, in each direction
+
+        :param border: the cluster west or north of the border, and the
+            direction the border is crossed going away from it
+        :type border: Tuple(Tuple(int,int),int)
+        :rtype: list[tuple(tuple(int, int, int), tuple(int, int, int))]
+        :return: the state leaving a cluster and the state entering the
+            next
+        """
+        found = self.transitions.get(border)
+        if found is not None:
+            return found
+
+        (c_x, c_y), direction = border
+        size = self.cluster_size
+        d_x, d_y = directions.MOVEMENTS[direction]
+        back = (direction + 2) % len(directions.DIRECTIONS)
+        if direction == directions.EAST:
+            x = c_x * size + size - 1
+            sides = [((x, y), (x + 1, y))
+                     for y in xrange(c_y * size,
+                                     min(c_y * size + size, self.height))]
+        else:
+            y = c_y * size + size - 1
+            sides = [((x, y), (x, y + 1))
+                     for x in xrange(c_x * size,
+                                     min(c_x * size + size, self.width))]
+
+        found = []
+        run = []
+        for pair in sides + [None]:
+            if pair is not None and all(
+                    self.on_board(*square) and
+                    self.reasoning_agent(list(square)) for square in pair):
+                run.append(pair)
+            elif run:
+                if len(run) < LONG_RUN:
+                    crossings = [run[len(run) // 2]]
+                else:
+                    crossings = [run[0], run[-1]]
+                for near, far in crossings:
+                    found.append((near + (direction,), far + (direction,)))
+                    found.append((far + (back,), near + (back,)))
+                run = []
+        self.transitions[border] = found
+        return found
+
+    def borders_at(self, x, y):
+        """
+        Gives the borders of its cluster that a square lies along
+
+        :param x: the square's column
+        :type x: int
+        :param y: the square's row
+        :type y: int
+        :rtype: list[tuple(tuple(int, int), int)]
+        :return: the borders, as given to border_transitions
+        """
+        size = self.cluster_size
+        c_x, c_y = x // size, y // size
+        found = []
+        if x % size == size - 1:
+            found.append(((c_x, c_y), directions.EAST))
+        if x % size == 0:
+            found.append(((c_x - 1, c_y), directions.EAST))
+        if y % size == size - 1:
+            found.append(((c_x, c_y), directions.SOUTH))
+        if y % size == 0:
+            found.append(((c_x, c_y - 1), directions.SOUTH))
+        return found
+
+    def cluster_of(self, state):
+        """
+        Gives the cluster a state or square is in
+
+        :param state: a column and row, and maybe a direction
+        :type state: tuple
+        :rtype: Tuple(int,int)
+        :return: the cluster's column and row, in clusters
+        """
+        return (state[0] // self.cluster_size, state[1] // self.cluster_size)
+
+    def on_board(self, x, y):
+        """
+        Determine whether a square is on the board
+
+        :param x: the square's column
+        :type x: int
+        :param y: the square's row
+        :type y: int
+        :rtype: bool
+        :returns: whether the square is on the board
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
@@ -0,0 +1,92 @@
+"""
+Computes the board percepts of every square at once, as bit masks (see
+percepts.MASKS), by shifting the grid of cell types onto its neighbors.
+"""
+import numpy as np
+
+import cell_types
+import environment
+import percepts
+
+
+def adjacent_counts(present):
+    """
+    Counts, for every square of one or more boards, how many adjacent
+    squares have something.
+
+    :param present: whether each square has it, indexed by row then
+        column in the last two axes
+    :type present: numpy.ndarray
+    :rtype: numpy.ndarray
+    :returns: an int8 array of counts the shape of present
+    """
+    present = present.astype(np.int8)
+    counts = np.zeros_like(present)
+    counts[..., 1:, :] += present[..., :-1, :]
+    counts[..., :-1, :] += present[..., 1:, :]
+    counts[..., :, 1:] += present[..., :, :-1]
+    counts[..., :, :-1] += present[..., :, 1:]
+    return counts
+
+
+def percept_masks(types):
+    """
+    Computes the board percepts of every square in one or more boards.
+
+    :param types: the cell type of every square, indexed by row then
+        column in the last two axes
+    :type types: numpy.ndarray
+    :rtype: numpy.ndarray
+    :returns: a uint8 array the shape of types holding the bit mask of
+        the board percepts sensed on each square
+    """
+    masks = np.zeros(types.shape, dtype=np.uint8)
+
+    for cell_type, percept in environment.ADJACENT_BOARD_PERCEPTS.iteritems():
+        hazard = types == cell_type
+        near = np.zeros_like(hazard)
+        near[..., 1:, :] |= hazard[..., :-1, :]
+        near[..., :-1, :] |= hazard[..., 1:, :]
+        near[..., :, 1:] |= hazard[..., :, :-1]
+        near[..., :, :-1] |= hazard[..., :, 1:]
+        masks[near] |= percepts.MASKS[percept]
+
+    for cell_type, percept in environment.ON_SPOT_BOARD_PERCEPTS.iteritems():
+        masks[types == cell_type] |= percepts.MASKS[percept]
+
+    return masks
+
+
+def board_percept_masks(cells, width):
+    """
+    Computes the board percepts of every square in a single board.
+
+    :param cells: the type of every cell on the board, in row order
+    :type cells: bytearray
+    :param width: the number of columns on the board
+    :type width: int
+    :rtype: bytearray
+    :returns: the bit mask of the board percepts of every square, in
+        row order
+    """
+    types = np.frombuffer(cells, dtype=np.uint8).reshape(-1, width)
+    return bytearray(percept_masks(types).tobytes())
+
+
+def board_hazard_counts(cells, width):
+    """
+    Counts the pits and wumpuses next to every square of a single board.
+
+    :param cells: the type of every cell on the board, in row order
+    :type cells: bytearray
+    :param width: the number of columns on the board
+    :type width: int
+    :rtype: tuple(bytearray, bytearray)
+    :returns: the number of adjacent pits and of adjacent wumpuses of
+        every square, in row order
+    """
+    types = np.frombuffer(cells, dtype=np.uint8).reshape(-1, width)
+    return tuple(
+        bytearray(adjacent_counts(types == cell_type).tobytes())
+        for cell_type in (cell_types.PIT, cell_types.WUMPUS)
+    )
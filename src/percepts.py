@@ -18,3 +18,64 @@ NAMES = {
     SCREAM:  'SCREAM',
     DEATH:   'DEATH'
 }
+
+"""
+Bit masks for the percepts, so a collection of percepts can be stored as
+a single small int.
+"""
+MASKS = [1 << percept for percept in PERCEPTS]
+(GLITTER_MASK, BREEZE_MASK, STENCH_MASK,
+ BUMP_MASK, SCREAM_MASK, DEATH_MASK) = MASKS
+
+
+def to_mask(percept_set):
+    """
+    Packs a collection of percepts into a bit mask.
+
+    :param percept_set: the percepts to pack
+    :type percept_set: iterable[int]
+    :rtype: int
+    :returns: the bit mask with a bit set for each percept
+    """
+    mask = 0
+    for percept in percept_set:
+        mask |= MASKS[percept]
+    return mask
+
+
+def from_mask(mask):
+    """
+    Unpacks a bit mask into a set of percepts.
+
+    :param mask: the bit mask to unpack
+    :type mask: int
+    :rtype: set{int}
+    :returns: the percepts whose bits are set in the mask
+    """
+    return set(_MASK_PERCEPTS[mask])
+
+
+def names(mask):
+    """
+    Gives the names of the percepts in a bit mask.
+
+    :param mask: the bit mask to name
+    :type mask: int
+    :rtype: list[string]
+    :returns: the names of the percepts whose bits are set in the mask
+    """
+    return list(_MASK_NAMES[mask])
+
+
+"""
+The decoded percepts and names of every possible mask, so decoding is a
+lookup.
+"""
+_MASK_PERCEPTS = [
+    tuple(percept for percept in PERCEPTS if mask & MASKS[percept])
+    for mask in xrange(1 << len(PERCEPTS))
+]
+_MASK_NAMES = [
+    tuple(NAMES[percept] for percept in mask_percepts)
+    for mask_percepts in _MASK_PERCEPTS
+]
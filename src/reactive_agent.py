@@ -1,9 +1,15 @@
 import actions
 import directions
 import percepts
-from board_state import move
+import tracing
 from navigation import Navigator
 
+"""
+How far each direction moves, as (column, row) tuples indexed by direction.
+"""
+MOVES = tuple(tuple(directions.MOVEMENTS[direction])
+              for direction in directions.DIRECTIONS)
+
 
 def adjacent(pos):
     """
@@ -14,11 +20,8 @@ def adjacent(pos):
     :rtype: list(tuple(int, int))
     :returns: list of positions adjacent to specified position
     """
-    return {
-        tuple(pos[i] + vec[i]
-              for i in xrange(len(pos)))
-        for vec in directions.MOVEMENTS.itervalues()
-    }
+    x, y = pos
+    return {(x + d_x, y + d_y) for d_x, d_y in MOVES}
 
 
 def action_result(pos, dir, action):
@@ -41,21 +44,24 @@ def action_result(pos, dir, action):
     if action == actions.RIGHT:
         return pos, (dir + 1) % 4
     else:
-        return move(pos, dir), dir
+        d_x, d_y = MOVES[dir]
+        return (pos[0] + d_x, pos[1] + d_y), dir
 
 
-def run(env, logger):
+def run(env, logger=None, tracer=None):
     """
-    runs a reactive agent on a given environment, using the specified logger
+    runs a reactive agent on a given environment, recording what it does
+    to the specified tracer, or else logging it to the specified logger
 
     :param env: envirnoment in which the agent acts
     :ptype: environment
     :param logger: logger to be used for sample runs
     :ptype: logger
+    :param tracer: tracer to record events to (see tracing)
+    :ptype: tracer
     """
     pos = (0, 0)
     dir = directions.NORTH
-    dest_pos = [None]
     visited = set()
     safe = set()
     questionable = set()
@@ -73,67 +79,92 @@ def run(env, logger):
         :return: True if the square is safe, false otherwise
         """
         pos = tuple(pos)
-        if pos in safe or pos in visited or pos == dest_pos[0]:
+        if pos in safe or pos in visited:
             return True
         return False
 
     navigator = Navigator(is_safe)
+    tracer = tracing.tracer_for(logger, tracer)
+    traced = tracer.enabled
+    record = tracer.record
 
     while not env.is_finished():
-        percept = env.get_percepts()
-        logger.info("Percepts: %s", env.named_percepts())
+        percept = env.get_percept_mask()
+        if traced:
+            record(tracing.PERCEPTS, env.turn, percept)
 
         # update visited, safe, questionable, and unsafe
-        if percepts.DEATH in percept or percepts.BUMP in percept:
+        if percept & (percepts.DEATH_MASK | percepts.BUMP_MASK):
             if last_action is not None:
                 unnav_pos, dir = action_result(pos, dir, last_action)
-            unsafe |= {tuple(unnav_pos)}
-            logger.info("%s must be unnavigable", unnav_pos)
+            unsafe.add(unnav_pos)
+            safe.discard(unnav_pos)
+            questionable.discard(unnav_pos)
+            if traced:
+                record(tracing.UNNAVIGABLE, env.turn, *unnav_pos)
+            # the rest of the plan assumed this move would succeed
+            actions_to_do = list()
+            changed = {unnav_pos}
         else:
             if last_action is not None:
                 pos, dir = action_result(pos, dir, last_action)
-                pos = tuple(pos)
-            visited |= {tuple(pos)}
+            changed = set() if pos in safe or pos in visited else {pos}
+            visited.add(pos)
+            safe.discard(pos)
+            questionable.discard(pos)
 
-            if percepts.BREEZE in percept or percepts.STENCH in percept:
+            if percept & (percepts.BREEZE_MASK | percepts.STENCH_MASK):
                 questionable |= (adjacent(pos) - (safe | visited | unsafe))
             else:
-                logger.info("Due to lack of danger %s must be safe",
-                            adjacent(pos) - (visited | unsafe))
-                safe |= (adjacent(pos) - (visited | unsafe))
+                newly_safe = adjacent(pos) - (safe | visited | unsafe)
+                if traced:
+                    record(tracing.NEWLY_SAFE, env.turn,
+                           pos[0], pos[1], len(newly_safe))
+                safe |= newly_safe
+                changed |= newly_safe
+
+        if changed:
+            navigator.squares_changed(changed)
 
         if not actions_to_do:
-            if percepts.GLITTER in percept:
-                logger.info("Found gold, terminating...")
+            if percept & percepts.GLITTER_MASK:
+                if traced:
+                    record(tracing.FOUND_GOLD, env.turn)
                 env.grab()
-            elif safe:
-                dest_pos[0] = dest = safe.pop()
-                logger.info("Starting navigation to safe square: %s", dest)
-                actions_to_do = navigator.path_to(pos + (dir,), dest)
-            elif questionable:
-                dest_pos[0] = dest = questionable.pop()
-                logger.info(
-                    "Starting navigation to questionable square: %s", dest
-                )
-                actions_to_do = navigator.path_to(pos + (dir,), dest)
             else:
-                logger.info("No squares left to go to, terminating...")
-                return
+                for risky, squares in ((False, safe), (True, questionable)):
+                    found = squares and navigator.path_to_nearest(
+                        pos + (dir,), squares
+                    )
+                    if found:
+                        dest, actions_to_do = found
+                        if traced:
+                            record(tracing.DESTINATION, env.turn,
+                                   dest[0], dest[1], risky)
+                        break
+                else:
+                    if traced:
+                        record(tracing.NO_SQUARES_LEFT, env.turn)
+                    break
         if actions_to_do:
             last_action = actions_to_do.pop(0)
+            if traced:
+                record(tracing.ACTION, env.turn, last_action)
             if last_action == actions.FORWARD:
                 env.move_forward()
-                logger.info("\tMoved Forward")
             elif last_action == actions.LEFT:
                 env.turn_left()
-                logger.info("\tTurned Left")
             elif last_action == actions.RIGHT:
                 env.turn_right()
-                logger.info("\tTurned Right")
             else:
                 print(last_action)
-            if len(actions_to_do) == 0:
-                logger.info("Navigation ended")
+            if len(actions_to_do) == 0 and traced:
+                record(tracing.NAVIGATION_ENDED, env.turn)
+
+    if traced and navigator.cache_size:
+        stats = navigator.cache_stats()
+        record(tracing.CACHE_STATS, env.turn,
+               stats['hits'], stats['misses'], stats['size'])
 
 if __name__ == '__main__':
     import environment
@@ -0,0 +1,103 @@
+"""
+Square indices: a position on a board given as the single int
+row * width + col, with a table of how far each direction moves an index,
+so that moving around the board is integer arithmetic rather than
+building lists.
+"""
+import directions
+
+
+class Squares(object):
+    __slots__ = ('width', 'height', 'size', 'offsets', 'column_moves')
+
+    def __init__(self, width, height):
+        """
+        Builds the tables for a board of a size, which hold a few numbers
+        whatever the size, so every board builds its own.
+
+        - offsets: how far each direction moves an index, by direction
+        - column_moves: how far each direction moves along the columns,
+          which steps across the left or right edge are checked against
+
+        :param width: the number of columns on the board
+        :type width: int
+        :param height: the number of rows on the board
+        :type height: int
+        """
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.column_moves = tuple(
+            directions.MOVEMENTS[direction][0]
+            for direction in directions.DIRECTIONS
+        )
+        self.offsets = tuple(
+            directions.MOVEMENTS[direction][1] * width + d_col
+            for direction, d_col in zip(directions.DIRECTIONS,
+                                        self.column_moves)
+        )
+
+    def index(self, pos):
+        """
+        Gives the square of a position.
+
+        :param pos: the position, given as column then row order
+        :type pos: list[int]
+        :rtype: int
+        :returns: the index of the square
+        """
+        col, row = pos
+        return row * self.width + col
+
+    def position(self, square):
+        """
+        Gives the position of a square.
+
+        :param square: the index of the square
+        :type square: int
+        :rtype: list[int]
+        :returns: the position, given as column then row order
+        """
+        return [square % self.width, square // self.width]
+
+    def step(self, square, direction):
+        """
+        Gives the square next to a square in a direction.
+
+        :param square: the index of the square to step from
+        :type square: int
+        :param direction: the direction to step in
+        :type direction: int
+        :rtype: int
+        :returns: the index of the square stepped to, or -1 if the step
+            leads off the board
+        """
+        next_square = square + self.offsets[direction]
+        if not 0 <= next_square < self.size:
+            return -1
+        d_col = self.column_moves[direction]
+        if d_col and not 0 <= square % self.width + d_col < self.width:
+            return -1
+        return next_square
+
+    def adjacent(self, square):
+        """
+        Gives the squares on the board adjacent to a square.
+
+        :param square: the index of the square
+        :type square: int
+        :rtype: list[int]
+        :returns: the indices of the adjacent squares
+        """
+        width = self.width
+        col = square % width
+        found = []
+        if square >= width:
+            found.append(square - width)
+        if col + 1 < width:
+            found.append(square + 1)
+        if square + width < self.size:
+            found.append(square + width)
+        if col:
+            found.append(square - 1)
+        return found
@@ -0,0 +1,246 @@
+import argparse
+import importlib
+import logging
+import multiprocessing
+import time
+from itertools import imap
+
+import environment
+from generate_world import MAX_BOARD_SIZE, check_board_size, world_seed
+
+"""
+The percentiles of the score given in a tournament's summary.
+"""
+PERCENTILES = (5, 25, 50, 75, 95)
+
+"""
+How many batches of games each process is handed over a tournament. More
+batches even out the work between processes, fewer cut down on the
+messages sent between them.
+"""
+BATCHES_PER_PROCESS = 4
+
+
+def agent_logger():
+    """
+    Gives the logger agents are run with in a tournament, which throws
+    away everything logged to it.
+
+    :rtype: logging.Logger
+    :returns: a logger that logs nothing
+    """
+    logger = logging.getLogger('tournament.agent')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+    return logger
+
+
+def play(game):
+    """
+    Plays one game of a tournament.
+
+    :param game: the agent to play, the number of the game, the size of
+        the board, the seed of the tournament and the largest board size
+        allowed
+    :type game: tuple(function, int, int, int, int)
+    :rtype: tuple(int, int, bool, int, int)
+    :returns: the number of the game, the score, whether the gold was
+        grabbed, the number of deaths and the number of actions taken
+    """
+    agent, index, size, seed, max_size = game
+    world, env = environment.new_game(
+        size, compact=True, seed=world_seed(seed, index), max_size=max_size
+    )
+    agent(env, agent_logger())
+    return index, env.score, env.is_finished(), len(env.deaths), env.turn
+
+
+class TournamentResults(object):
+    def __init__(self):
+        """
+        Creates a tally of the results of a tournament's games, which
+        may be added in any order.
+        """
+        self.scores = []
+        self.wins = 0
+        self.deaths = 0
+        self.actions = 0
+        self.started = time.time()
+
+    def add(self, result):
+        """
+        Adds the result of a game to the tally.
+
+        :param result: the result of the game, as given by play
+        :type result: tuple(int, int, bool, int, int)
+        """
+        _, score, won, deaths, actions = result
+        self.scores.append(score)
+        self.wins += won
+        self.deaths += deaths
+        self.actions += actions
+
+    def percentile(self, percent):
+        """
+        Gives the score that a given percent of the games scored at most,
+        by nearest rank.
+
+        :param percent: the percent of the games, from 0 to 100
+        :type percent: int
+        :rtype: int
+        :returns: the score at that percentile
+        """
+        scores = sorted(self.scores)
+        rank = int(round(percent / 100.0 * len(scores)))
+        return scores[min(max(rank - 1, 0), len(scores) - 1)]
+
+    def summary(self):
+        """
+        Sums up the games tallied so far.
+
+        :rtype: dict
+        :returns: the number of games, the mean score and its percentiles,
+            the fraction of games won, the deaths and actions in all and
+            per game, and how many games were played a second. The figures
+            per game are None until a game has been tallied.
+        """
+        games = len(self.scores)
+        elapsed = time.time() - self.started
+        if not games:
+            return {
+                'games': 0,
+                'mean_score': None,
+                'score_percentiles': {
+                    percent: None for percent in PERCENTILES
+                },
+                'win_rate': None,
+                'deaths': 0,
+                'deaths_per_game': None,
+                'actions_per_game': None,
+                'seconds': elapsed,
+                'games_per_second': 0.0
+            }
+        return {
+            'games': games,
+            'mean_score': float(sum(self.scores)) / games,
+            'score_percentiles': {
+                percent: self.percentile(percent) for percent in PERCENTILES
+            },
+            'win_rate': float(self.wins) / games,
+            'deaths': self.deaths,
+            'deaths_per_game': float(self.deaths) / games,
+            'actions_per_game': float(self.actions) / games,
+            'seconds': elapsed,
+            'games_per_second': games / elapsed if elapsed else float('inf')
+        }
+
+
+def run_tournament(agent, games, size=10, seed=0, processes=None,
+                   on_result=None, max_size=MAX_BOARD_SIZE):
+    """
+    Plays an agent on a number of worlds, made from a seed so that the
+    same tournament can be played again, spreading the games over a pool
+    of processes.
+
+    :param agent: the agent to play, which is called with the environment
+        and a logger like reactive_agent.run, and must be defined at the
+        top level of a module so it can be sent to other processes
+    :type agent: function
+    :param games: the number of games to play, at least 1
+    :type games: int
+    :param size: the size of the boards to play on, or their width and
+        height
+    :type size: int or tuple(int, int)
+    :param seed: the seed the worlds are made from
+    :type seed: int
+    :param processes: the number of processes to play in, or None for one
+        per core. With 1, the games are played in this process.
+    :type processes: int
+    :param on_result: called with each game's result (see play) as it
+        comes in
+    :type on_result: function
+    :param max_size: the largest allowed width or height, or None to allow
+        any size
+    :type max_size: int
+    :rtype: dict
+    :returns: the summary of the tournament (see TournamentResults)
+    :raises ValueError: if fewer than 1 game is asked for, or the size is
+        not allowed
+    """
+    if games < 1:
+        raise ValueError('A tournament needs at least 1 game')
+    if not check_board_size(size, max_size):
+        raise ValueError('Board size {} is not allowed'.format(size))
+    results = TournamentResults()
+    tasks = (
+        (agent, index, size, seed, max_size) for index in xrange(games)
+    )
+    processes = processes or multiprocessing.cpu_count()
+
+    if processes == 1:
+        pool = None
+        played = imap(play, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        chunksize = max(1, games // (processes * BATCHES_PER_PROCESS))
+        played = pool.imap_unordered(play, tasks, chunksize)
+
+    try:
+        for result in played:
+            results.add(result)
+            if on_result:
+                on_result(result)
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    return results.summary()
+
+
+def load_agent(name):
+    """
+    Finds an agent from its module and function name.
+
+    :param name: the agent, as module:function
+    :type name: str
+    :rtype: function
+    :returns: the agent
+    """
+    module_name, _, function_name = name.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Play an agent on many seeded worlds.'
+    )
+    parser.add_argument('--agent', default='reactive_agent:run',
+                        help='the agent to play, as module:function')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--max-size', type=int, default=MAX_BOARD_SIZE,
+                        help='the largest size allowed, or 0 for any size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='defaults to one per core')
+    args = parser.parse_args()
+
+    summary = run_tournament(
+        load_agent(args.agent), args.games, args.size, args.seed,
+        args.processes, max_size=args.max_size or None
+    )
+    print 'Games: {}'.format(summary['games'])
+    print 'Mean score: {:.1f}'.format(summary['mean_score'])
+    for percent in PERCENTILES:
+        print 'Score p{}: {}'.format(
+            percent, summary['score_percentiles'][percent]
+        )
+    print 'Win rate: {:.1%}'.format(summary['win_rate'])
+    print 'Deaths: {} ({:.2f} per game)'.format(
+        summary['deaths'], summary['deaths_per_game']
+    )
+    print 'Actions per game: {:.1f}'.format(summary['actions_per_game'])
+    print 'Games per second: {:.1f}'.format(summary['games_per_second'])
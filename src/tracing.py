@@ -0,0 +1,256 @@
+"""
+Records what an agent does as typed events, which are only formatted into
+messages when the trace is read, so that recording one costs little and
+not recording one costs nothing.
+"""
+import logging
+import struct
+from array import array
+
+import environment
+import percepts
+
+"""
+The kinds of event in a trace. Each event has the turn it happened on and
+three numbers, whose meaning depends on the kind.
+"""
+PERCEPTS = 0         # the percept bit mask
+UNNAVIGABLE = 1      # the column and row of a square bumped or died in
+NEWLY_SAFE = 2       # the column and row, and how many became safe
+DESTINATION = 3      # the column and row, and 1 if it is questionable
+ACTION = 4           # the action
+NAVIGATION_ENDED = 5
+FOUND_GOLD = 6
+NO_SQUARES_LEFT = 7
+CACHE_STATS = 8      # the navigator's cache hits, misses and size
+
+"""
+How to format each kind of event, given its three numbers.
+"""
+MESSAGES = {
+    PERCEPTS: lambda mask, _, __: 'Percepts: {}'.format(
+        percepts.names(mask)
+    ),
+    UNNAVIGABLE: lambda col, row, _: '({}, {}) must be unnavigable'.format(
+        col, row
+    ),
+    NEWLY_SAFE: lambda col, row, count: (
+        'Due to lack of danger {} more squares next to ({}, {}) must be '
+        'safe'.format(count, col, row)
+    ),
+    DESTINATION: lambda col, row, questionable: (
+        'Starting navigation to {} square: ({}, {})'.format(
+            'questionable' if questionable else 'safe', col, row
+        )
+    ),
+    ACTION: lambda action, _, __: '\t{}'.format(
+        environment.ACTION_NAME[action].capitalize()
+    ),
+    NAVIGATION_ENDED: lambda _, __, ___: 'Navigation ended',
+    FOUND_GOLD: lambda _, __, ___: 'Found gold, terminating...',
+    NO_SQUARES_LEFT: lambda _, __, ___: (
+        'No squares left to go to, terminating...'
+    ),
+    CACHE_STATS: lambda hits, misses, size: (
+        'Path cache: {} hits, {} misses, {} searches kept'.format(
+            hits, misses, size
+        )
+    )
+}
+
+"""
+The layout of an event in a binary trace: its kind, its turn and its three
+numbers, little endian.
+"""
+EVENT = struct.Struct('<Biiii')
+
+"""
+The bytes a binary trace starts with.
+"""
+MAGIC = b'WTRC\x01'
+
+
+def describe(event):
+    """
+    Formats an event as a message.
+
+    :param event: the kind, turn and three numbers of the event
+    :type event: tuple(int, int, int, int, int)
+    :rtype: str
+    :returns: the message, prefixed with the turn
+    """
+    kind, turn, first, second, third = event
+    return '{:>6}  {}'.format(turn, MESSAGES[kind](first, second, third))
+
+
+class NullTracer(object):
+    """
+    A tracer that records nothing. Agents check enabled before building
+    an event, so running with this costs nothing.
+    """
+    enabled = False
+
+    def record(self, kind, turn, first=0, second=0, third=0):
+        """
+        Throws an event away.
+        """
+
+    def close(self):
+        """
+        Does nothing, as there is nothing to flush.
+        """
+
+
+class RingTracer(object):
+    def __init__(self, capacity=4096):
+        """
+        Creates a tracer that keeps the most recent events in a buffer
+        allocated up front, overwriting the oldest once it is full.
+
+        :param capacity: the number of events kept
+        :type capacity: int
+        """
+        self.enabled = True
+        self.capacity = capacity
+        self.buffer = array('i', [0]) * (capacity * 5)
+        self.recorded = 0
+
+    def record(self, kind, turn, first=0, second=0, third=0):
+        """
+        Records an event.
+
+        :param kind: the kind of event, such as PERCEPTS
+        :type kind: int
+        :param turn: the turn it happened on
+        :type turn: int
+        :param first: the first number of the event
+        :type first: int
+        :param second: the second number of the event
+        :type second: int
+        :param third: the third number of the event
+        :type third: int
+        """
+        buffer = self.buffer
+        start = self.recorded % self.capacity * 5
+        buffer[start] = kind
+        buffer[start + 1] = turn
+        buffer[start + 2] = first
+        buffer[start + 3] = second
+        buffer[start + 4] = third
+        self.recorded += 1
+
+    def close(self):
+        """
+        Does nothing, as the events are kept in memory.
+        """
+
+    def events(self):
+        """
+        Gives the events kept, oldest first.
+
+        :rtype: generator
+        :returns: the kind, turn and three numbers of each event
+        """
+        kept = min(self.recorded, self.capacity)
+        for index in xrange(self.recorded - kept, self.recorded):
+            start = index % self.capacity * 5
+            yield tuple(self.buffer[start:start + 5])
+
+    def dump(self):
+        """
+        Formats the events kept, oldest first.
+
+        :rtype: list[str]
+        :returns: one message per event
+        """
+        return [describe(event) for event in self.events()]
+
+
+class BinaryTracer(object):
+    def __init__(self, output):
+        """
+        Creates a tracer that writes every event to a file, packed into
+        fixed size records (see EVENT). The trace can be read back with
+        read_trace.
+
+        :param output: the file to write to, opened in binary mode
+        :type output: file
+        """
+        self.enabled = True
+        self.output = output
+        self.pack = EVENT.pack
+        output.write(MAGIC)
+
+    def record(self, kind, turn, first=0, second=0, third=0):
+        """
+        Writes an event (see RingTracer.record).
+        """
+        self.output.write(self.pack(kind, turn, first, second, third))
+
+    def close(self):
+        """
+        Flushes the events written to the file.
+        """
+        self.output.flush()
+
+
+def read_trace(trace):
+    """
+    Reads back the events written by a BinaryTracer.
+
+    :param trace: the file the trace was written to, opened in binary mode
+    :type trace: file
+    :rtype: generator
+    :returns: the kind, turn and three numbers of each event
+    """
+    if trace.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a trace file')
+    while True:
+        packed = trace.read(EVENT.size)
+        if len(packed) < EVENT.size:
+            return
+        yield EVENT.unpack(packed)
+
+
+class LoggerTracer(object):
+    def __init__(self, logger, level=logging.INFO):
+        """
+        Creates a tracer that logs each event as it happens. It is only
+        enabled if the logger would keep messages at the given level.
+
+        :param logger: the logger to log to
+        :type logger: logging.Logger
+        :param level: the level to log at
+        :type level: int
+        """
+        self.enabled = logger.isEnabledFor(level)
+        self.logger = logger
+        self.level = level
+
+    def record(self, kind, turn, first=0, second=0, third=0):
+        """
+        Logs an event (see RingTracer.record).
+        """
+        self.logger.log(self.level, '%s', MESSAGES[kind](first, second, third))
+
+    def close(self):
+        """
+        Does nothing, as the logger's handlers flush themselves.
+        """
+
+
+def tracer_for(logger=None, tracer=None):
+    """
+    Picks the tracer an agent records to.
+
+    :param logger: a logger to log events to if no tracer is given
+    :type logger: logging.Logger
+    :param tracer: the tracer to record to
+    :rtype: tracer
+    :returns: the tracer, a LoggerTracer for the logger, or a NullTracer
+    """
+    if tracer is not None:
+        return tracer
+    if logger is not None:
+        return LoggerTracer(logger)
+    return NullTracer()
@@ -0,0 +1,266 @@
+"""
+Plays many games in lockstep, holding every board in stacked NumPy arrays
+and performing one action in every game with each step.
+"""
+import numpy as np
+
+import actions
+import cell_types
+import directions
+import environment
+import percept_grid
+import percepts
+
+"""
+How far each direction moves, indexed by direction.
+"""
+COLUMN_MOVES = np.array(
+    [directions.MOVEMENTS[direction][0]
+     for direction in directions.DIRECTIONS]
+)
+ROW_MOVES = np.array(
+    [directions.MOVEMENTS[direction][1]
+     for direction in directions.DIRECTIONS]
+)
+
+"""
+The score lost for each action, indexed by action.
+"""
+ACTION_PENALTIES = np.array(
+    [environment.ACTION_PENALTY[action] for action in actions.ACTIONS]
+)
+
+
+class VecEnvironment(object):
+    def __init__(self, cells, positions, starting_directions):
+        """
+        Creates a batch of games played in lockstep, which follow the same
+        rules as Environment.
+
+        :param cells: the cell type of every square of every board, with
+            shape (games, rows, columns). The array is copied.
+        :type cells: numpy.ndarray
+        :param positions: the starting position of the agent in every
+            game, given as column then row order
+        :type positions: numpy.ndarray
+        :param starting_directions: the starting direction of the agent in
+            every game
+        :type starting_directions: numpy.ndarray
+        """
+        games, self.height, self.width = cells.shape
+        self.games = np.arange(games)
+        self.cells = cells.reshape(games, -1).copy()
+        self.cols = np.array(positions)[:, 0].astype(np.int64)
+        self.rows = np.array(positions)[:, 1].astype(np.int64)
+        self.directions = np.array(starting_directions, dtype=np.int64)
+        self.arrows = (self.cells == cell_types.WUMPUS).sum(axis=1)
+
+        masks = percept_grid.percept_masks(cells)
+        self.static_masks = (
+            masks & ~np.uint8(percepts.STENCH_MASK)
+        ).reshape(games, -1)
+        self.wumpus_counts = percept_grid.adjacent_counts(
+            cells == cell_types.WUMPUS
+        ).reshape(games, -1)
+
+        self.action_percepts = np.zeros(games, dtype=np.uint8)
+        self.scores = np.zeros(games, dtype=np.int64)
+        self.turn = 0
+        self.finished = np.zeros(games, dtype=bool)
+        self.deaths = np.zeros(games, dtype=np.int64)
+        self.kills = np.zeros(games, dtype=np.int64)
+
+    @classmethod
+    def from_batch(cls, batch):
+        """
+        Creates games from a batch of generated worlds.
+
+        :param batch: the worlds to play
+        :type batch: WorldBatch
+        :rtype: VecEnvironment
+        :returns: a game for each world
+        """
+        return cls(batch.cells, batch.positions, batch.directions)
+
+    @classmethod
+    def from_board_states(cls, board_states):
+        """
+        Creates games from board states of the same size.
+
+        :param board_states: the worlds to play
+        :type board_states: list[BoardState]
+        :rtype: VecEnvironment
+        :returns: a game for each world
+        """
+        width = board_states[0].width
+        cells = np.array([
+            np.frombuffer(bytes(board_state.flat_cell_types()),
+                          dtype=np.uint8).reshape(-1, width)
+            for board_state in board_states
+        ])
+        return cls(
+            cells, [board_state.pos for board_state in board_states],
+            [board_state.direction for board_state in board_states]
+        )
+
+    def __len__(self):
+        return len(self.games)
+
+    def get_percept_masks(self):
+        """
+        Gives the percepts currently available to the agent in every game.
+
+        :rtype: numpy.ndarray
+        :returns: the bit mask of the senses in each game (see
+            percepts.MASKS)
+        """
+        squares = self.rows * self.width + self.cols
+        stench = self.wumpus_counts[self.games, squares] > 0
+        return (
+            self.static_masks[self.games, squares] | self.action_percepts |
+            stench.astype(np.uint8) * np.uint8(percepts.STENCH_MASK)
+        )
+
+    def step(self, chosen):
+        """
+        Performs an action in every game.
+
+        :param chosen: the action to perform in each game
+        :type chosen: numpy.ndarray
+        :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        :returns: the percept masks after the action, the change in score
+            and whether each game is finished
+        """
+        chosen = np.asarray(chosen)
+        self.action_percepts[:] = 0
+        rewards = -ACTION_PENALTIES[chosen]
+
+        turns = (chosen == actions.RIGHT).astype(np.int64)
+        turns -= chosen == actions.LEFT
+        self.directions = (self.directions + turns) % len(
+            directions.DIRECTIONS
+        )
+
+        self._move_forward(np.flatnonzero(chosen == actions.FORWARD), rewards)
+        self._shoot(np.flatnonzero(chosen == actions.SHOOT), rewards)
+        self._grab(np.flatnonzero(chosen == actions.GRAB), rewards)
+
+        self.scores += rewards
+        self.turn += 1
+        return self.get_percept_masks(), rewards, self.finished.copy()
+
+    def _cell_types(self, games, cols, rows):
+        """
+        Gives the cell types at positions in some games, treating
+        positions off the board as obstacles.
+
+        :rtype: numpy.ndarray
+        :returns: the cell type at each position
+        """
+        on_board = ((cols >= 0) & (cols < self.width) &
+                    (rows >= 0) & (rows < self.height))
+        types = np.full(len(games), cell_types.OBSTACLE, dtype=np.uint8)
+        types[on_board] = self.cells[
+            games[on_board],
+            rows[on_board] * self.width + cols[on_board]
+        ]
+        return types
+
+    def _move_forward(self, games, rewards):
+        """
+        Moves the agent forward in some games, as
+        Environment._do_move_forward.
+
+        :param games: the games to move in
+        :type games: numpy.ndarray
+        :param rewards: the change in score of every game, updated in place
+        :type rewards: numpy.ndarray
+        """
+        dirs = self.directions[games]
+        cols = self.cols[games] + COLUMN_MOVES[dirs]
+        rows = self.rows[games] + ROW_MOVES[dirs]
+        types = self._cell_types(games, cols, rows)
+
+        bumped = types == cell_types.OBSTACLE
+        self.action_percepts[games[bumped]] |= percepts.BUMP_MASK
+
+        died = games[(types == cell_types.PIT) | (types == cell_types.WUMPUS)]
+        rewards[died] -= environment.DEATH_PENALTY
+        self.deaths[died] += 1
+        self.action_percepts[died] |= percepts.DEATH_MASK
+
+        moved = ((types == cell_types.EMPTY) | (types == cell_types.GOLD))
+        self.cols[games[moved]] = cols[moved]
+        self.rows[games[moved]] = rows[moved]
+
+    def _shoot(self, games, rewards):
+        """
+        Fires an arrow in some games, as Environment._do_shoot, moving
+        every arrow still flying one square at a time.
+
+        :param games: the games to shoot in
+        :type games: numpy.ndarray
+        :param rewards: the change in score of every game, updated in place
+        :type rewards: numpy.ndarray
+        """
+        games = games[self.arrows[games] > 0]
+        self.arrows[games] -= 1
+
+        dirs = self.directions[games]
+        cols = self.cols[games].copy()
+        rows = self.rows[games].copy()
+        flying = np.arange(len(games))
+        hit = [flying[:0]]
+        while len(flying):
+            types = self._cell_types(games[flying], cols[flying],
+                                     rows[flying])
+            hit.append(flying[types == cell_types.WUMPUS])
+            flying = flying[(types != cell_types.OBSTACLE) &
+                            (types != cell_types.WUMPUS)]
+            cols[flying] += COLUMN_MOVES[dirs[flying]]
+            rows[flying] += ROW_MOVES[dirs[flying]]
+
+        hit = np.concatenate(hit)
+        self._kill_wumpuses(games[hit], cols[hit], rows[hit])
+        rewards[games[hit]] += environment.WUMPUS_KILL_REWARD
+
+    def _kill_wumpuses(self, games, cols, rows):
+        """
+        Removes a wumpus from each of some games, as
+        Environment._kill_wumpus, taking its stench off the adjacent
+        squares that have no other wumpus next to them.
+
+        :param games: the games with a wumpus killed
+        :type games: numpy.ndarray
+        :param cols: the column of each killed wumpus
+        :type cols: numpy.ndarray
+        :param rows: the row of each killed wumpus
+        :type rows: numpy.ndarray
+        """
+        self.cells[games, rows * self.width + cols] = cell_types.EMPTY
+        self.kills[games] += 1
+        self.action_percepts[games] |= percepts.SCREAM_MASK
+
+        for d_col, d_row in zip(COLUMN_MOVES, ROW_MOVES):
+            adj_cols, adj_rows = cols + d_col, rows + d_row
+            on_board = ((adj_cols >= 0) & (adj_cols < self.width) &
+                        (adj_rows >= 0) & (adj_rows < self.height))
+            self.wumpus_counts[
+                games[on_board],
+                adj_rows[on_board] * self.width + adj_cols[on_board]
+            ] -= 1
+
+    def _grab(self, games, rewards):
+        """
+        Grabs the gold in the games where the agent is over it, as
+        Environment._do_grab.
+
+        :param games: the games to grab in
+        :type games: numpy.ndarray
+        :param rewards: the change in score of every game, updated in place
+        :type rewards: numpy.ndarray
+        """
+        types = self._cell_types(games, self.cols[games], self.rows[games])
+        found = games[types == cell_types.GOLD]
+        self.finished[found] = True
+        rewards[found] += environment.GOLD_REWARD
@@ -0,0 +1,92 @@
+import json
+import sys
+import unittest
+
+from src.benchmark import compare, corpus, deep_size, run_benchmarks
+
+
+def results(**seconds):
+    return {
+        'benchmarks': {
+            name: {'seconds_per_op': value, 'ops': 1}
+            for name, value in seconds.iteritems()
+        }
+    }
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_fixed(self):
+        """
+        Tests that the benchmarks are always run on the same worlds
+        """
+        for compact in (False, True):
+            first, second = corpus(5, compact), corpus(5, compact)
+            self.assertEqual(
+                [(world.flat_cell_types(), world.pos, world.direction)
+                 for world in first],
+                [(world.flat_cell_types(), world.pos, world.direction)
+                 for world in second]
+            )
+
+    def test_run_benchmarks(self):
+        """
+        Tests that chosen benchmarks are run and give results that can be
+        saved as JSON
+        """
+        found = run_benchmarks(['perform_action.turn_left'], repeat=1)
+        self.assertEqual(['perform_action.turn_left'],
+                         found['benchmarks'].keys())
+        self.assertGreater(
+            found['benchmarks']['perform_action.turn_left']
+            ['seconds_per_op'], 0
+        )
+        self.assertEqual(found, json.loads(json.dumps(found)))
+
+    def test_memory_benchmarks(self):
+        """
+        Tests that memory benchmarks are run by name, and that a compact
+        board takes up less memory per square than a grid of cells
+        """
+        found = run_benchmarks(['memory.board'], repeat=1)
+        self.assertEqual({}, found['benchmarks'])
+        memory = found['memory']
+        self.assertEqual(['memory.board.grid.25', 'memory.board.compact.25'],
+                         memory.keys())
+        self.assertLess(memory['memory.board.compact.25']['bytes_per_square'],
+                        memory['memory.board.grid.25']['bytes_per_square'])
+
+    def test_deep_size_counts_once(self):
+        """
+        Tests that an object referred to many times is only counted once
+        """
+        shared = [0] * 100
+        once, twice = [shared], [shared, shared]
+        self.assertEqual(
+            deep_size(once, set()) - sys.getsizeof(once),
+            deep_size(twice, set()) - sys.getsizeof(twice)
+        )
+
+    def test_compare(self):
+        """
+        Tests that only benchmarks slowed down by more than the threshold
+        are regressions, and that new benchmarks are skipped
+        """
+        compared = compare(results(fast=1.0, slow=1.5, new=1.0),
+                           results(fast=1.0, slow=1.0), threshold=0.2)
+        self.assertEqual(
+            [('fast', 1.0, 1.0, 1.0, False), ('slow', 1.0, 1.5, 1.5, True)],
+            sorted(compared)
+        )
+
+    def test_compare_zero_baseline(self):
+        """
+        Tests that a benchmark measured at 0 in the baseline is compared
+        without dividing by zero, and is a regression once it grows
+        """
+        compared = compare(results(same=0.0, grown=0.5),
+                           results(same=0.0, grown=0.0), threshold=0.2)
+        self.assertEqual(
+            [('grown', 0.0, 0.5, float('inf'), True),
+             ('same', 0.0, 0.0, 1.0, False)],
+            sorted(compared)
+        )
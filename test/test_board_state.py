@@ -0,0 +1,214 @@
+import logging
+import unittest
+
+from src import cell_types, percepts, reactive_agent
+from src.board_state import BoardState, CompactBoardState
+from src.cell import Cell
+from src.directions import EAST, NORTH, WEST
+from src.environment import Environment
+from src.generate_world import generate_world
+
+LAYOUT = [
+    [cell_types.EMPTY, cell_types.PIT, cell_types.EMPTY],
+    [cell_types.WUMPUS, cell_types.EMPTY, cell_types.OBSTACLE],
+    [cell_types.EMPTY, cell_types.GOLD, cell_types.WUMPUS],
+    [cell_types.EMPTY, cell_types.EMPTY, cell_types.EMPTY]
+]
+
+
+def make_board():
+    return [[Cell(cell_type) for cell_type in row] for row in LAYOUT]
+
+
+class TestCompactBoardState(unittest.TestCase):
+    def setUp(self):
+        self.grid = BoardState(make_board(), [1, 1], EAST)
+        self.compact = CompactBoardState.from_board(
+            make_board(), [1, 1], EAST
+        )
+
+    def test_dimensions(self):
+        """
+        Tests that a compact board knows its size from a flat array
+        """
+        self.assertEqual(3, self.compact.width)
+        self.assertEqual(4, self.compact.height)
+        self.assertEqual(12, len(self.compact.cells))
+
+    def test_board_matches(self):
+        """
+        Tests that the compact board exposes the same rows of cells
+        """
+        self.assertEqual(
+            [[cell.cell_type for cell in row] for row in self.grid.board],
+            [[cell.cell_type for cell in row] for row in self.compact.board]
+        )
+
+    def test_cell_at_and_on_board(self):
+        """
+        Tests that lookups agree with the grid backed board everywhere
+        """
+        for row in xrange(-1, 5):
+            for col in xrange(-1, 4):
+                pos = [col, row]
+                self.assertEqual(
+                    self.grid.on_board(pos), self.compact.on_board(pos)
+                )
+                grid_cell = self.grid.cell_at(pos)
+                compact_cell = self.compact.cell_at(pos)
+                if grid_cell is None:
+                    self.assertIsNone(compact_cell)
+                else:
+                    self.assertEqual(
+                        grid_cell.cell_type, compact_cell.cell_type
+                    )
+
+    def test_adj_cells(self):
+        """
+        Tests that adjacent cells agree with the grid backed board
+        """
+        for pos in ([0, 0], [1, 1], [2, 3]):
+            self.assertEqual(
+                sorted(cell.cell_type for cell in self.grid.adj_cells(pos)),
+                sorted(cell.cell_type for cell in self.compact.adj_cells(pos))
+            )
+
+    def test_count_wumpuses(self):
+        """
+        Tests that wumpuses are counted from the flat array
+        """
+        self.assertEqual(2, self.compact.count_wumpuses())
+        self.assertEqual(2, self.compact.arrows)
+
+    def test_board_percepts(self):
+        """
+        Tests that percepts agree with the grid backed board
+        """
+        for pos in ([1, 1], [1, 2], [0, 3], [2, 3]):
+            self.grid.pos = self.compact.pos = pos
+            self.assertEqual(
+                self.grid.get_board_percepts(),
+                self.compact.get_board_percepts()
+            )
+
+    def test_kill_wumpus(self):
+        """
+        Tests that killing a wumpus empties its square in the flat array
+        and clears the stench next to it
+        """
+        self.compact.pos = [0, 0]
+        self.assertIn(percepts.STENCH, self.compact.get_board_percepts())
+        self.compact.kill_wumpus([0, 1])
+        self.assertEqual(
+            cell_types.EMPTY, self.compact.cell_at([0, 1]).cell_type
+        )
+        self.assertNotIn(percepts.STENCH, self.compact.get_board_percepts())
+        self.assertEqual(1, self.compact.count_wumpuses())
+
+    def test_kill_next_to_another_wumpus(self):
+        """
+        Tests that a square next to two wumpuses still smells after one of
+        them is killed, and stops once both are
+        """
+        row = [cell_types.WUMPUS, cell_types.EMPTY, cell_types.WUMPUS]
+        for world in (BoardState([[Cell(cell) for cell in row]], [1, 0], EAST),
+                      CompactBoardState(bytearray(row), 3, [1, 0], EAST)):
+            self.assertIn(percepts.STENCH, world.get_board_percepts())
+            world.kill_wumpus([0, 0])
+            self.assertIn(percepts.STENCH, world.get_board_percepts())
+            world.kill_wumpus([2, 0])
+            self.assertNotIn(percepts.STENCH, world.get_board_percepts())
+
+    def test_hazard_counts_kept_up(self):
+        """
+        Tests that the wumpus counts kept through kills and revivals match
+        counting them again
+        """
+        for world in (self.grid, self.compact):
+            world.get_board_percepts()
+            world.kill_wumpus([0, 1])
+            world.kill_wumpus([2, 2])
+            world.revive_wumpus([0, 1])
+            kept = world.adjacent_wumpuses
+            world.count_hazards()
+            self.assertEqual(world.adjacent_wumpuses, kept)
+            self.assertEqual(bytearray([1, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0]),
+                             kept)
+
+    def test_fork(self):
+        """
+        Tests that forked boards share their cells until one of them kills
+        a wumpus
+        """
+        self.assertIs(self.compact.cells, self.compact.fork().cells)
+        for world in (self.grid, self.compact):
+            forked = world.fork()
+            forked.pos = [2, 1]
+            forked.kill_wumpus([0, 1])
+            self.assertEqual([1, 1], world.pos)
+            self.assertEqual(2, world.count_wumpuses())
+            self.assertEqual(1, forked.count_wumpuses())
+            forked.revive_wumpus([0, 1])
+            self.assertEqual(2, forked.count_wumpuses())
+
+    def test_arrow_stop(self):
+        """
+        Tests that arrows stop at the nearest obstacle or wumpus as wumpuses
+        are killed and put back, and that forks keep their own stoppers
+        """
+        row = [cell_types.WUMPUS, cell_types.EMPTY, cell_types.PIT,
+               cell_types.WUMPUS, cell_types.WUMPUS, cell_types.OBSTACLE]
+        for world in (BoardState([[Cell(cell) for cell in row]], [1, 0], EAST),
+                      CompactBoardState(bytearray(row), 6, [1, 0], EAST)):
+            self.assertEqual(3, world.arrow_stop(1, EAST))
+            self.assertEqual(0, world.arrow_stop(1, WEST))
+            world.kill_wumpus([3, 0])
+            world.kill_wumpus([4, 0])
+            self.assertEqual(5, world.arrow_stop(1, EAST))
+            self.assertEqual(-1, world.arrow_stop(3, NORTH))
+
+            forked = world.fork()
+            forked.revive_wumpus([4, 0])
+            self.assertEqual(4, forked.arrow_stop(1, EAST))
+            self.assertEqual(5, world.arrow_stop(1, EAST))
+            world.kill_wumpus([0, 0])
+            self.assertEqual(-1, world.arrow_stop(2, WEST))
+            self.assertEqual(0, forked.arrow_stop(2, WEST))
+
+    def test_shared_cells_untouched(self):
+        """
+        Tests that a kill does not change the cells shared between boards
+        """
+        self.compact.kill_wumpus([0, 1])
+        other = CompactBoardState.from_board(make_board(), [1, 1], EAST)
+        self.assertEqual(cell_types.WUMPUS, other.cell_at([0, 1]).cell_type)
+
+    def test_same_game(self):
+        """
+        Tests that an agent plays the same game on either backend
+        """
+        logger = logging.getLogger('test_board_state')
+        logger.addHandler(logging.NullHandler())
+        for _ in xrange(10):
+            world = generate_world(10, .1, .1, .1)
+            compact = CompactBoardState.from_board(
+                world.board, world.pos, world.direction
+            )
+            grid_env = Environment(world)
+            compact_env = Environment(compact)
+            reactive_agent.run(grid_env, logger)
+            reactive_agent.run(compact_env, logger)
+            self.assertEqual(grid_env.actions, compact_env.actions)
+            self.assertEqual(grid_env.scores, compact_env.scores)
+
+    def test_generate_compact_world(self):
+        """
+        Tests that the generator can build a compact board directly
+        """
+        world = generate_world(5, .1, .1, .1, compact=True)
+        self.assertIsInstance(world, CompactBoardState)
+        self.assertEqual(25, len(world.cells))
+        self.assertGreaterEqual(world.cells.count(chr(cell_types.EMPTY)), 1)
+        self.assertEqual(
+            cell_types.EMPTY, world.cell_at(world.pos).cell_type
+        )
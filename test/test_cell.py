@@ -1,3 +1,4 @@
+import copy
 import unittest
 from src.cell import Cell
 from src import cell_types
@@ -10,7 +11,6 @@ class TestCell(unittest.TestCase):
         """
         cell = Cell(cell_types.EMPTY)
         self.assertEqual(cell_types.EMPTY, cell.cell_type)
-        self.assertIsNone(cell.percepts)
 
     def test_obstical_cell(self):
         """
@@ -18,7 +18,6 @@ class TestCell(unittest.TestCase):
         """
         cell = Cell(cell_types.OBSTACLE)
         self.assertEqual(cell_types.OBSTACLE, cell.cell_type)
-        self.assertIsNone(cell.percepts)
 
     def test_pit_cell(self):
         """
@@ -26,7 +25,6 @@ class TestCell(unittest.TestCase):
         """
         cell = Cell(cell_types.PIT)
         self.assertEqual(cell_types.PIT, cell.cell_type)
-        self.assertIsNone(cell.percepts)
 
     def test_wumpus_cell(self):
         """
@@ -34,7 +32,6 @@ class TestCell(unittest.TestCase):
         """
         cell = Cell(cell_types.WUMPUS)
         self.assertEqual(cell_types.WUMPUS, cell.cell_type)
-        self.assertIsNone(cell.percepts)
 
     def test_gold_cell(self):
         """
@@ -42,4 +39,25 @@ class TestCell(unittest.TestCase):
         """
         cell = Cell(cell_types.GOLD)
         self.assertEqual(cell_types.GOLD, cell.cell_type)
-        self.assertIsNone(cell.percepts)
+
+
+class TestSharedCells(unittest.TestCase):
+    def test_one_cell_per_type(self):
+        """
+        Tests that cells of the same type are the same shared cell
+        """
+        for cell_type in cell_types.CELL_TYPES:
+            self.assertIs(Cell(cell_type), Cell(cell_type))
+            self.assertIs(Cell(cell_type), copy.deepcopy(Cell(cell_type)))
+        self.assertIsNot(Cell(cell_types.EMPTY), Cell(cell_types.PIT))
+
+    def test_cannot_change(self):
+        """
+        Tests that a shared cell cannot be changed or given new attributes
+        """
+        cell = Cell(cell_types.WUMPUS)
+        with self.assertRaises(AttributeError):
+            cell.cell_type = cell_types.EMPTY
+        with self.assertRaises(AttributeError):
+            cell.percepts = 0
+        self.assertEqual(cell_types.WUMPUS, cell.cell_type)
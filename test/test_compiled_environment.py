@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from src import actions, environment
+from src.compiled_environment import CompiledEnvironment
+from src.generate_world import world_seed
+from test.test_environment import state_of
+
+
+def games():
+    for compact in (False, True):
+        for index in xrange(10):
+            yield (10, compact, False, world_seed(2, index))
+
+
+class TestCompiledEnvironment(unittest.TestCase):
+    def test_matches_environment(self):
+        """
+        Tests that looking actions up in the tables plays exactly the same
+        game as walking the board, through wumpus kills
+        """
+        rng = random.Random(0)
+        for game in games():
+            env = environment.new_game(*game)[1]
+            compiled = environment.new_game(*game, compiled=True)[1]
+            self.assertIsInstance(compiled, CompiledEnvironment)
+            for _ in xrange(400):
+                action = rng.choice(actions.ACTIONS)
+                env.perform_action(action)
+                compiled.perform_action(action)
+                self.assertEqual(env.get_percept_mask(),
+                                 compiled.get_percept_mask())
+            self.assertEqual(state_of(env), state_of(compiled))
+
+            patched = (compiled.forward_squares, compiled.forward_percepts,
+                       compiled.arrow_targets)
+            compiled.compile()
+            self.assertEqual(patched, (compiled.forward_squares,
+                                       compiled.forward_percepts,
+                                       compiled.arrow_targets))
+
+    def test_restore_and_fork(self):
+        """
+        Tests that the tables follow kills undone by restoring a snapshot,
+        and that a fork's tables are its own
+        """
+        rng = random.Random(1)
+        for game in games():
+            compiled = environment.new_game(*game, compiled=True)[1]
+            moves = [rng.choice(actions.ACTIONS) for _ in xrange(300)]
+            compiled.perform_actions(moves[:100])
+            snapshot = compiled.snapshot()
+            forked = compiled.fork()
+            compiled.perform_actions(moves[200:])
+            compiled.restore(snapshot)
+            compiled.perform_actions(moves[100:200])
+            forked.perform_actions(moves[100:200])
+
+            replayed = environment.new_game(*game)[1]
+            replayed.perform_actions(moves[:200])
+            self.assertEqual(state_of(replayed), state_of(compiled))
+            self.assertEqual(state_of(replayed), state_of(forked))
@@ -0,0 +1,215 @@
+import random
+import unittest
+
+from src import actions, cell_types, environment, percepts
+from src.board_state import CompactBoardState
+from src.cell import Cell
+from src.directions import EAST, NORTH
+from src.environment import Environment
+from src.generate_world import world_seed
+
+
+def make_env(direction=EAST):
+    cells = bytearray([
+        cell_types.EMPTY, cell_types.EMPTY, cell_types.WUMPUS,
+        cell_types.PIT, cell_types.EMPTY, cell_types.GOLD
+    ])
+    return Environment(CompactBoardState(cells, 3, [0, 0], direction))
+
+
+def state_of(env):
+    """
+    Gives everything about a game that actions can change, including the
+    percepts sensed on every square.
+    """
+    board_state = env.board_state
+    pos = board_state.pos
+    masks = []
+    for index in xrange(len(board_state.flat_cell_types())):
+        board_state.pos = [index % board_state.width,
+                           index // board_state.width]
+        masks.append(board_state.get_board_percept_mask())
+    board_state.pos = pos
+    return (
+        env.score, env.turn, env.get_percept_mask(), env.finished,
+        dict(env.action_counts), list(env.actions), list(env.scores),
+        list(env.deaths), list(env.kills), list(board_state.pos),
+        board_state.direction,
+        board_state.arrows, list(board_state.flat_cell_types()), masks
+    )
+
+
+class TestPercepts(unittest.TestCase):
+    def test_percept_mask(self):
+        """
+        Tests that board and action percepts are merged into one mask
+        """
+        env = make_env(NORTH)
+        self.assertEqual(percepts.BREEZE_MASK, env.get_percept_mask())
+        env.move_forward()
+        self.assertEqual(
+            percepts.BREEZE_MASK | percepts.BUMP_MASK, env.get_percept_mask()
+        )
+        self.assertEqual(
+            {percepts.BREEZE, percepts.BUMP}, env.get_percepts()
+        )
+        self.assertEqual(['BREEZE', 'BUMP'], env.named_percepts())
+
+    def test_action_percepts_clear(self):
+        """
+        Tests that action percepts only last for one turn
+        """
+        env = make_env(NORTH)
+        env.move_forward()
+        env.turn_right()
+        self.assertEqual(percepts.BREEZE_MASK, env.get_percept_mask())
+
+    def test_scream(self):
+        """
+        Tests that killing a wumpus is heard and clears its stench
+        """
+        env = make_env()
+        env.move_forward()
+        self.assertEqual(percepts.STENCH_MASK, env.get_percept_mask())
+        env.shoot()
+        self.assertEqual(percepts.SCREAM_MASK, env.get_percept_mask())
+
+    def test_death(self):
+        """
+        Tests that walking into a pit is sensed as a death
+        """
+        env = make_env()
+        env.turn_right()
+        env.move_forward()
+        self.assertTrue(env.get_percept_mask() & percepts.DEATH_MASK)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_off_by_default(self):
+        """
+        Tests that nothing is measured unless asked for
+        """
+        env = make_env()
+        env.move_forward()
+        self.assertIsNone(env.instrumentation_snapshot())
+        self.assertNotIn('cell_at', vars(env.board_state))
+
+    def test_snapshot(self):
+        """
+        Tests that each action is timed and board state calls are counted
+        until measuring is turned off
+        """
+        env = make_env()
+        env.instrument()
+        env.move_forward()
+        env.move_forward()
+        env.shoot()
+        snapshot = env.instrumentation_snapshot()
+
+        forward = snapshot['actions']['move forward']
+        self.assertEqual(2, forward['calls'])
+        self.assertEqual(2, sum(count for _, count in forward['histogram']))
+        self.assertGreater(forward['seconds'], 0)
+        self.assertEqual(forward['seconds'] / 2, forward['mean_seconds'])
+        self.assertEqual(1, snapshot['actions']['shoot arrow']['calls'])
+        self.assertEqual(0, snapshot['actions']['grab item']['calls'])
+        self.assertGreater(snapshot['board_state']['arrow_stop'], 0)
+        self.assertGreater(snapshot['board_state']['cell_type_at'], 0)
+
+        instrumentation = env.instrument(False)
+        env.turn_left()
+        env.board_state.cell_at([0, 0])
+        self.assertIsNone(env.instrumentation_snapshot())
+        self.assertEqual(snapshot, instrumentation.snapshot())
+
+
+class TestSnapshots(unittest.TestCase):
+    def games(self):
+        for compact in (False, True):
+            for eager_percepts in (False, True):
+                for index in xrange(5):
+                    yield (10, compact, eager_percepts, world_seed(1, index))
+
+    def test_restore(self):
+        """
+        Tests that restoring a snapshot undoes every action since, kills
+        included, however many times it is restored
+        """
+        rng = random.Random(0)
+        for game in self.games():
+            env = environment.new_game(*game)[1]
+            for _ in xrange(20):
+                snapshot = env.snapshot()
+                before = state_of(env)
+                for _ in xrange(3):
+                    for _ in xrange(rng.randrange(1, 30)):
+                        env.perform_action(rng.choice(actions.ACTIONS))
+                    env.restore(snapshot)
+                    self.assertEqual(before, state_of(env))
+                for _ in xrange(rng.randrange(1, 30)):
+                    env.perform_action(rng.choice(actions.ACTIONS))
+
+    def test_fork(self):
+        """
+        Tests that a fork and the game it came from play on without
+        changing each other
+        """
+        rng = random.Random(1)
+        for game in self.games():
+            moves = [rng.choice(actions.ACTIONS) for _ in xrange(200)]
+            env = environment.new_game(*game)[1]
+            env.perform_actions(moves[:50])
+            forked = env.fork()
+            forked.perform_actions(moves[50:150])
+            env.perform_actions(moves[100:])
+
+            for played, history in ((forked, moves[:150]),
+                                    (env, moves[:50] + moves[100:])):
+                replayed = environment.new_game(*game)[1]
+                replayed.perform_actions(history)
+                self.assertEqual(state_of(replayed), state_of(played))
+
+
+class TestNewGame(unittest.TestCase):
+    def test_large_and_rectangular(self):
+        """
+        Tests that boards past the size cap, and rectangular boards, can be
+        played once the cap is raised
+        """
+        for compact in (False, True):
+            world, env = environment.new_game(
+                (40, 30), compact, seed=5, max_size=None
+            )
+            self.assertEqual((40, 30), (world.width, world.height))
+            self.assertIs(world, env.board_state)
+            world, _ = environment.new_game(30, compact, max_size=30)
+            self.assertEqual((30, 30), (world.width, world.height))
+
+    def test_size_not_allowed(self):
+        """
+        Tests that a board size that is not allowed is refused rather than
+        played without a board
+        """
+        for size in (30, 4, (10, 30)):
+            with self.assertRaises(ValueError):
+                environment.new_game(size)
+        with self.assertRaises(ValueError):
+            environment.new_game(40, max_size=30)
+
+
+class TestCellChecks(unittest.TestCase):
+    def test_deadly_and_stops_arrow(self):
+        """
+        Tests that the cell checks agree with the cell types they are
+        given by
+        """
+        for cell_type in cell_types.CELL_TYPES:
+            cell = Cell(cell_type)
+            self.assertEqual(cell_type in (cell_types.PIT, cell_types.WUMPUS),
+                             environment.deadly(cell))
+            self.assertEqual(
+                cell_type in (cell_types.OBSTACLE, cell_types.WUMPUS),
+                environment.stops_arrow(cell)
+            )
+        self.assertIs(cell_types.STOP_ARROW_CELLS,
+                      environment.STOP_ARROW_CELLS)
@@ -0,0 +1,109 @@
+import unittest
+from io import BytesIO
+
+from src import actions, environment, reactive_agent
+from src.episode import Episode, HEADER, MAGIC
+from src.generate_world import world_seed
+
+
+def play(seed, compact):
+    world, env = environment.new_game(10, compact, seed=seed)
+    episode = Episode.start(world, seed if compact else None)
+    reactive_agent.run(env)
+    episode.record(env)
+    return env, episode
+
+
+def written(episode):
+    output = BytesIO()
+    episode.write(output)
+    return output.getvalue()
+
+
+class TestEpisode(unittest.TestCase):
+    def test_round_trip(self):
+        """
+        Tests that an episode read back from a file replays the same game,
+        whether its world was stored as a seed or as cells
+        """
+        for compact in (True, False):
+            env, episode = play(world_seed(0, 2), compact)
+            data = written(episode)
+            read = Episode.read(BytesIO(data))
+
+            self.assertEqual(env.actions, read.actions)
+            self.assertEqual(env.scores, read.scores())
+            replayed = read.replay()
+            self.assertEqual(env.score, replayed.score)
+            self.assertEqual(env.board_state.pos, replayed.board_state.pos)
+            self.assertEqual(env.deaths, replayed.deaths)
+
+            cells = 0 if compact else 100
+            self.assertEqual(
+                len(MAGIC) + HEADER.size + cells + 3 * env.turn, len(data)
+            )
+
+    def test_replay_to_turn(self):
+        """
+        Tests that replaying part of a game gives the state of that turn
+        """
+        world, env = environment.new_game(10, True, seed=world_seed(0, 3))
+        episode = Episode.start(world, world_seed(0, 3))
+        states = [(list(world.pos), world.direction)]
+        for action in (actions.LEFT, actions.LEFT, actions.FORWARD,
+                       actions.RIGHT, actions.FORWARD, actions.SHOOT,
+                       actions.GRAB):
+            env.perform_action(action)
+            states.append((list(world.pos), world.direction))
+        episode.record(env)
+
+        for turn, state in enumerate(states):
+            replayed = episode.replay(turn).board_state
+            self.assertEqual(state, (replayed.pos, replayed.direction))
+
+    def test_seeded_grid_world(self):
+        """
+        Tests that an episode of a seeded grid world, new_game's default,
+        rebuilds the same world rather than a compact one
+        """
+        world, env = environment.new_game(10, seed=42)
+        episode = Episode.start(world, 42)
+        self.assertFalse(episode.compact)
+        reactive_agent.run(env)
+        episode.record(env)
+
+        read = Episode.read(BytesIO(written(episode)))
+        replayed = read.replay()
+        self.assertEqual(env.score, replayed.score)
+        self.assertEqual(env.board_state.pos, replayed.board_state.pos)
+
+    def test_seeded_large_world(self):
+        """
+        Tests that a seeded world past new_game's default size cap, and
+        not square, is rebuilt at its own size
+        """
+        for compact in (False, True):
+            world, _ = environment.new_game(
+                (40, 30), compact, seed=5, max_size=None
+            )
+            read = Episode.read(BytesIO(written(Episode.start(world, 5))))
+            rebuilt = read.world()
+            self.assertEqual(world.flat_cell_types(),
+                             rebuilt.flat_cell_types())
+            self.assertEqual((world.pos, world.direction),
+                             (rebuilt.pos, rebuilt.direction))
+
+    def test_wrong_seed(self):
+        """
+        Tests that a seed rebuilding a different world is an error rather
+        than a replay of another game
+        """
+        world, _ = environment.new_game(10, seed=42)
+        episode = Episode.start(world, 42)
+        episode.seed = 43
+        with self.assertRaises(ValueError):
+            episode.world()
+
+        episode = Episode(3, 2, [0, 0], world.direction, seed=42)
+        with self.assertRaises(ValueError):
+            episode.world()
@@ -1,6 +1,8 @@
+import random
 import unittest
+import numpy as np
 import src.generate_world as generate_world
-from src import cell_types
+from src import cell_types, directions, percept_grid
 from src.cell import Cell
 
 
@@ -61,6 +63,329 @@ class TestCreateBoard(unittest.TestCase):
         self.assertGreaterEqual(empty_count, 2)
 
 
+class TestGenerateWorlds(unittest.TestCase):
+    def test_generate_worlds_invalid(self):
+        """
+        Tests that no batch is created with invalid input
+        """
+        self.assertIsNone(generate_world.generate_worlds(3, 4, 0, 0, 0))
+        self.assertIsNone(generate_world.generate_worlds(3, 5, 1, 1, 1))
+
+    def test_generate_worlds_correct(self):
+        """
+        Tests that every world of a batch has one gold and an empty
+        starting square
+        """
+        batch = generate_world.generate_worlds(50, 6, .2, .2, .2)
+        self.assertEqual(50, len(batch))
+        self.assertEqual((50, 6, 6), batch.cells.shape)
+        self.assertTrue(
+            ((batch.cells == cell_types.GOLD).sum(axis=(1, 2)) == 1).all()
+        )
+        for world in batch:
+            self.assertEqual(6, world.width)
+            self.assertEqual(6, world.height)
+            self.assertEqual(
+                cell_types.EMPTY, world.cell_at(world.pos).cell_type
+            )
+            self.assertIn(world.direction, directions.DIRECTIONS)
+            self.assertEqual(world.arrows, world.count_wumpuses())
+
+    def test_generate_worlds_probability(self):
+        """
+        Tests that the batch draws cell types like create_cell
+        """
+        obstacles = generate_world.generate_worlds(5, 5, .99, 0, 0)
+        pits = generate_world.generate_worlds(5, 5, 0, .99, 0)
+        wumpuses = generate_world.generate_worlds(5, 5, 0, 0, .99)
+        for batch, cell_type in ((obstacles, cell_types.OBSTACLE),
+                                 (pits, cell_types.PIT),
+                                 (wumpuses, cell_types.WUMPUS)):
+            self.assertEqual(
+                set([cell_type, cell_types.EMPTY, cell_types.GOLD]),
+                set(batch.cells.flat)
+            )
+
+    def test_views_are_independent(self):
+        """
+        Tests that playing a world from a batch leaves the batch as it was
+        """
+        batch = generate_world.generate_worlds(1, 5, 0, 0, .5)
+        world = batch[0]
+        cells = batch.cells.copy()
+        for index, cell_type in enumerate(world.cells):
+            if cell_type == cell_types.WUMPUS:
+                world.kill_wumpus([index % 5, index // 5])
+        self.assertTrue((cells == batch.cells).all())
+
+    def test_eager_percepts(self):
+        """
+        Tests that a batch with eager percepts gives them to its worlds
+        """
+        batch = generate_world.generate_worlds(
+            3, 5, .1, .1, .1, eager_percepts=True
+        )
+        for world in batch:
+            self.assertEqual(
+                bytearray(
+                    percept_grid.board_percept_masks(world.cells, 5)
+                ),
+                world.percept_masks
+            )
+
+
+def cell_types_of(world):
+    return [[cell.cell_type for cell in row] for row in world.board]
+
+
+class TestSeeding(unittest.TestCase):
+    def test_same_seed_same_world(self):
+        """
+        Tests that a world can be regenerated from its seed
+        """
+        for compact in (False, True):
+            first = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact, rng=42
+            )
+            second = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact, rng=42
+            )
+            self.assertEqual(cell_types_of(first), cell_types_of(second))
+            self.assertEqual(first.pos, second.pos)
+            self.assertEqual(first.direction, second.direction)
+
+    def test_same_world_either_way(self):
+        """
+        Tests that a seed gives the same world whether the board is
+        stored as a grid or compactly
+        """
+        for index in xrange(20):
+            seed = generate_world.world_seed(3, index)
+            grid = generate_world.generate_world(10, .1, .1, .1, rng=seed)
+            compact = generate_world.generate_world(
+                10, .1, .1, .1, compact=True, rng=seed
+            )
+            self.assertEqual(cell_types_of(grid), cell_types_of(compact))
+            self.assertEqual(grid.pos, compact.pos)
+            self.assertEqual(grid.direction, compact.direction)
+
+    def test_random_instance(self):
+        """
+        Tests that a world can be drawn from a given generator
+        """
+        first = generate_world.generate_world(
+            10, .1, .1, .1, rng=random.Random(7)
+        )
+        second = generate_world.generate_world(10, .1, .1, .1, rng=7)
+        self.assertEqual(cell_types_of(first), cell_types_of(second))
+
+    def test_numpy_generator(self):
+        """
+        Tests that a world can be drawn from a NumPy generator, and a batch
+        from a random.Random, each seeding a generator of the other kind
+        """
+        for compact in (False, True):
+            first = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact,
+                rng=np.random.RandomState(7)
+            )
+            second = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact,
+                rng=np.random.RandomState(7)
+            )
+            self.assertEqual(cell_types_of(first), cell_types_of(second))
+            self.assertEqual(first.pos, second.pos)
+
+        first = generate_world.generate_worlds(
+            5, 6, .1, .1, .1, rng=random.Random(7)
+        )
+        second = generate_world.generate_worlds(
+            5, 6, .1, .1, .1, rng=random.Random(7)
+        )
+        self.assertTrue((first.cells == second.cells).all())
+        self.assertTrue((first.positions == second.positions).all())
+
+    def test_not_a_generator(self):
+        """
+        Tests that something that is neither a seed nor a generator is
+        refused
+        """
+        with self.assertRaises(TypeError):
+            generate_world.generate_world(10, .1, .1, .1, rng='seed')
+        with self.assertRaises(TypeError):
+            generate_world.generate_worlds(5, 6, .1, .1, .1, rng=1.5)
+
+    def test_world_seeds_independent(self):
+        """
+        Tests that the worlds of a run get distinct, repeatable seeds
+        """
+        seeds = [generate_world.world_seed(1, index) for index in xrange(100)]
+        self.assertEqual(100, len(set(seeds)))
+        self.assertEqual(seeds[5], generate_world.world_seed(1, 5))
+        self.assertNotEqual(seeds[5], generate_world.world_seed(2, 5))
+        self.assertTrue(all(0 <= seed < 2 ** 64 for seed in seeds))
+
+    def test_same_seed_same_batch(self):
+        """
+        Tests that a batch can be regenerated from its seed, including
+        64 bit seeds
+        """
+        seed = generate_world.world_seed(3, 0)
+        first = generate_world.generate_worlds(20, 6, .1, .1, .1, rng=seed)
+        second = generate_world.generate_worlds(20, 6, .1, .1, .1, rng=seed)
+        self.assertTrue((first.cells == second.cells).all())
+        self.assertTrue((first.positions == second.positions).all())
+        self.assertTrue((first.directions == second.directions).all())
+
+    def test_numpy_seed(self):
+        """
+        Tests that a NumPy integer seeds worlds and batches the same as
+        the int it holds
+        """
+        seed = generate_world.world_seed(3, 0)
+        for compact in (False, True):
+            first = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact, rng=np.int64(42)
+            )
+            second = generate_world.generate_world(
+                10, .1, .1, .1, compact=compact, rng=42
+            )
+            self.assertEqual(cell_types_of(first), cell_types_of(second))
+            self.assertEqual(first.pos, second.pos)
+        first = generate_world.generate_worlds(
+            20, 6, .1, .1, .1, rng=np.uint64(seed)
+        )
+        second = generate_world.generate_worlds(20, 6, .1, .1, .1, rng=seed)
+        self.assertTrue((first.cells == second.cells).all())
+        self.assertTrue((first.positions == second.positions).all())
+
+
+class TestLargeBoards(unittest.TestCase):
+    def test_rectangular_board(self):
+        """
+        Tests that boards can have different widths and heights
+        """
+        for compact in (False, True):
+            world = generate_world.generate_world(
+                (7, 5), .1, .1, .1, compact=compact
+            )
+            self.assertEqual(5, len(world.board))
+            self.assertEqual(7, len(world.board[0]))
+            self.assertEqual(
+                cell_types.EMPTY, world.cell_at(world.pos).cell_type
+            )
+
+    def test_uncapped_board(self):
+        """
+        Tests that a board bigger than the usual cap can be generated
+        """
+        self.assertIsNone(generate_world.generate_world(300, .1, .1, .1))
+        world = generate_world.generate_world(
+            (300, 200), .1, .1, .1, compact=True, max_size=None
+        )
+        self.assertEqual(300, world.width)
+        self.assertEqual(200, world.height)
+        self.assertEqual(1, world.cells.count(chr(cell_types.GOLD)))
+        self.assertEqual(
+            cell_types.EMPTY, world.cell_at(world.pos).cell_type
+        )
+
+    def test_compact_board_seeded(self):
+        """
+        Tests that a compact board can be regenerated from its seed
+        """
+        first = generate_world.generate_world(
+            100, .1, .1, .1, compact=True, rng=9, max_size=None
+        )
+        second = generate_world.generate_world(
+            100, .1, .1, .1, compact=True, rng=9, max_size=None
+        )
+        self.assertEqual(first.cells, second.cells)
+        self.assertEqual(first.pos, second.pos)
+
+    def test_choose_empty_square(self):
+        """
+        Tests that an empty square is found even when random tries miss
+        """
+        cells = bytearray([cell_types.PIT] * 10000)
+        cells[1234] = cell_types.EMPTY
+        self.assertEqual(
+            1234, generate_world.choose_empty_square(cells, 1)
+        )
+
+    def test_check_board_size(self):
+        """
+        Tests board sizes given as a width and height, and without a cap
+        """
+        self.assertTrue(generate_world.check_board_size((5, 25)))
+        self.assertFalse(generate_world.check_board_size((4, 25)))
+        self.assertFalse(generate_world.check_board_size((5, 26)))
+        self.assertTrue(generate_world.check_board_size(4096, None))
+        self.assertFalse(generate_world.check_board_size(4, None))
+
+
+class TestExactCounts(unittest.TestCase):
+    def count(self, world, cell_type):
+        return sum(
+            cell.cell_type == cell_type for row in world.board for cell in row
+        )
+
+    def test_exact_world(self):
+        """
+        Tests that exactly the requested cells are placed
+        """
+        for compact in (False, True):
+            world = generate_world.generate_exact_world(
+                (8, 6), 5, 4, 3, compact=compact
+            )
+            self.assertEqual(6, len(world.board))
+            self.assertEqual(5, self.count(world, cell_types.OBSTACLE))
+            self.assertEqual(4, self.count(world, cell_types.PIT))
+            self.assertEqual(3, self.count(world, cell_types.WUMPUS))
+            self.assertEqual(1, self.count(world, cell_types.GOLD))
+            self.assertEqual(3, world.arrows)
+            self.assertEqual(
+                cell_types.EMPTY, world.cell_at(world.pos).cell_type
+            )
+
+    def test_full_board(self):
+        """
+        Tests that a board can be filled up to the gold and start square
+        """
+        world = generate_world.generate_exact_world(5, 0, 23, 0, rng=4)
+        self.assertEqual(23, self.count(world, cell_types.PIT))
+        self.assertEqual(1, self.count(world, cell_types.EMPTY))
+        self.assertIsNone(generate_world.generate_exact_world(5, 0, 24, 0))
+        self.assertIsNone(generate_world.generate_exact_world(5, -1, 0, 0))
+
+    def test_counts_from_probabilities(self):
+        """
+        Tests that counts can be derived from the probabilities
+        """
+        self.assertEqual(
+            (10, 5, 0), generate_world.exact_counts((10, 5), .2, .1, 0)
+        )
+        world = generate_world.generate_world(
+            10, .2, .1, .05, exact=True, rng=1
+        )
+        self.assertEqual(20, self.count(world, cell_types.OBSTACLE))
+        self.assertEqual(10, self.count(world, cell_types.PIT))
+        self.assertEqual(5, self.count(world, cell_types.WUMPUS))
+        self.assertIsNone(
+            generate_world.generate_world(5, 1, 1, 1, exact=True)
+        )
+
+    def test_sample_squares(self):
+        """
+        Tests that sampled squares are distinct and cover every square
+        """
+        self.assertEqual(
+            range(50), sorted(generate_world.sample_squares(50, 50))
+        )
+        chosen = generate_world.sample_squares(10 ** 9, 1000)
+        self.assertEqual(1000, len(set(chosen)))
+
+
 class TestCreateCell(unittest.TestCase):
     def test_create_cell(self):
         """
@@ -1,10 +1,55 @@
+import random
 import unittest
 
-from src.navigation import Navigator
+from src.navigation import (
+    Navigator, IncrementalNavigator, HierarchicalNavigator
+)
 from src.generate_world import generate_world
 from src.cell_types import EMPTY
 from src.actions import LEFT, RIGHT, FORWARD
 from src.directions import NORTH, SOUTH, EAST, WEST, MOVEMENTS
+from src.reactive_agent import action_result
+
+
+def follow(loc, path):
+    pos, direction = loc[:2], loc[2]
+    for action in path:
+        pos, direction = action_result(pos, direction, action)
+    return tuple(pos)
+
+
+def squares_entered(loc, path):
+    pos, direction = loc[:2], loc[2]
+    entered = []
+    for action in path:
+        pos, direction = action_result(pos, direction, action)
+        if action == FORWARD:
+            entered.append(tuple(pos))
+    return entered
+
+
+def cheapest_cost(safe, start, goal):
+    """
+    Finds the cheapest number of actions to reach the goal by breadth
+    first search over every position and direction.
+    """
+    frontier = [start]
+    seen = {start}
+    cost = 0
+    while frontier:
+        next_frontier = []
+        for x, y, direction in frontier:
+            if (x, y) == goal:
+                return cost
+            d_x, d_y = MOVEMENTS[direction]
+            for state in ((x, y, (direction + 1) % 4),
+                          (x, y, (direction - 1) % 4),
+                          (x + d_x, y + d_y, direction)):
+                if state not in seen and safe(state[:2]):
+                    seen.add(state)
+                    next_frontier.append(state)
+        frontier = next_frontier
+        cost += 1
 
 
 class TestNavigation(unittest.TestCase):
@@ -30,6 +75,149 @@ class TestNavigation(unittest.TestCase):
             self.board[loc[1]][loc[0]].cell_type == EMPTY
         )
 
+    def test_straight_path(self):
+        """
+        Tests that a square straight ahead is reached without turning
+        """
+        navigator = Navigator(lambda loc: True)
+        self.assertEqual(
+            [FORWARD, FORWARD], navigator.path_to((0, 0, EAST), (2, 0))
+        )
+        self.assertEqual([], navigator.path_to((0, 0, EAST), (0, 0)))
+
+    def test_fewest_turns(self):
+        """
+        Tests that a path turns only as often as it has to
+        """
+        navigator = Navigator(lambda loc: True)
+        path = navigator.path_to((0, 0, NORTH), (2, 2))
+        self.assertEqual(6, len(path))
+        self.assertEqual((2, 2), follow((0, 0, NORTH), path))
+
+    def test_unreachable(self):
+        """
+        Tests that no path is given to a square that cannot be reached
+        """
+        navigator = Navigator(lambda loc: loc[0] == 0 and 0 <= loc[1] < 5)
+        self.assertIsNone(navigator.path_to((0, 0, EAST), (2, 0)))
+
+    def test_optimal_around_walls(self):
+        """
+        Tests that paths are as cheap as possible on a board with walls
+        """
+        walls = {(1, 0), (1, 1), (1, 2), (3, 4), (3, 3), (3, 2), (2, 4)}
+
+        def safe(loc):
+            return (0 <= loc[0] < 5 and 0 <= loc[1] < 5 and
+                    tuple(loc) not in walls)
+
+        navigator = Navigator(safe)
+        for direction in (NORTH, EAST, SOUTH, WEST):
+            for goal in ((4, 4), (2, 0), (4, 0), (0, 4)):
+                start = (0, 0, direction)
+                path = navigator.path_to(start, goal)
+                self.assertEqual(goal, follow(start, path))
+                self.assertEqual(cheapest_cost(safe, start, goal), len(path))
+
+    def test_path_to_nearest(self):
+        """
+        Tests that the cheapest of several squares is chosen
+        """
+        navigator = Navigator(lambda loc: True)
+        self.assertEqual(
+            ((0, -2), [FORWARD, FORWARD]),
+            navigator.path_to_nearest((0, 0, NORTH), {(3, 0), (0, -2)})
+        )
+        self.assertEqual(
+            ((2, 0), [RIGHT, FORWARD, FORWARD]),
+            navigator.path_to_nearest((0, 0, NORTH), {(2, 0), (0, 3)})
+        )
+
+    def test_path_to_nearest_unsafe_goal(self):
+        """
+        Tests that a goal square may be entered even if it is not safe,
+        but not passed through
+        """
+        navigator = Navigator(lambda loc: loc[0] == 0 and -5 < loc[1] < 5)
+        self.assertEqual(
+            ((1, 0), [RIGHT, FORWARD]),
+            navigator.path_to_nearest((0, 0, NORTH), {(1, 0), (2, 0)})
+        )
+        self.assertIsNone(
+            navigator.path_to_nearest((0, 0, NORTH), {(2, 0)})
+        )
+
+    def test_cached_search(self):
+        """
+        Tests that a repeated search is answered from the cache, with a
+        path the caller may change
+        """
+        navigator = Navigator(lambda loc: 0 <= loc[0] < 5 and 0 <= loc[1] < 5,
+                              cache_size=4)
+        path = navigator.path_to((0, 0, EAST), (2, 0))
+        path.append(LEFT)
+        self.assertEqual(
+            [FORWARD, FORWARD], navigator.path_to((0, 0, EAST), (2, 0))
+        )
+        self.assertEqual(
+            {'hits': 1, 'misses': 1, 'size': 1}, navigator.cache_stats()
+        )
+
+    def test_cache_invalidated_by_knowledge(self):
+        """
+        Tests that searches are redone once the safe squares change
+        """
+        walls = set()
+        navigator = Navigator(
+            lambda loc: (0 <= loc[0] < 5 and 0 <= loc[1] < 5 and
+                         tuple(loc) not in walls),
+            cache_size=4
+        )
+        self.assertEqual(
+            [FORWARD, FORWARD], navigator.path_to((0, 0, EAST), (2, 0))
+        )
+        walls.add((1, 0))
+        navigator.knowledge_changed()
+        path = navigator.path_to((0, 0, EAST), (2, 0))
+        self.assertEqual(7, len(path))
+        self.assertEqual((2, 0), follow((0, 0, EAST), path))
+        self.assertEqual(2, navigator.cache_stats()['misses'])
+
+    def test_cache_evicts_least_recent(self):
+        """
+        Tests that the cache holds at most cache_size searches, dropping
+        the one used least recently
+        """
+        navigator = Navigator(lambda loc: 0 <= loc[0] < 5 and 0 <= loc[1] < 5,
+                              cache_size=2)
+        navigator.path_to((0, 0, EAST), (1, 0))
+        navigator.path_to((0, 0, EAST), (2, 0))
+        navigator.path_to((0, 0, EAST), (1, 0))
+        navigator.path_to((0, 0, EAST), (3, 0))
+        self.assertEqual(2, navigator.cache_stats()['size'])
+
+        navigator.path_to((0, 0, EAST), (1, 0))
+        self.assertEqual(2, navigator.cache_stats()['hits'])
+        navigator.path_to((0, 0, EAST), (2, 0))
+        self.assertEqual(4, navigator.cache_stats()['misses'])
+
+    def test_reconstruct_actions(self):
+        """
+        Tests that actions are read back from the states' parents
+        """
+        came_from = {
+            (0, 0, NORTH): None,
+            (0, 0, EAST): ((0, 0, NORTH), RIGHT),
+            (1, 0, EAST): ((0, 0, EAST), FORWARD)
+        }
+        self.assertEqual(
+            [RIGHT, FORWARD],
+            self.navigator.reconstruct_actions(came_from, (1, 0, EAST))
+        )
+        self.assertEqual(
+            [], self.navigator.reconstruct_actions(came_from, (0, 0, NORTH))
+        )
+
     def test_rotation_left(self):
         self.assertEqual(self.navigator.rotate(1, 0), LEFT)
         self.assertEqual(self.navigator.rotate(2, 1), LEFT)
@@ -271,3 +459,182 @@ class TestNavigation(unittest.TestCase):
             for cell in row:
                 cur_row += str(cell)
             print cur_row
+
+
+class TestIncrementalNavigation(unittest.TestCase):
+    def setUp(self):
+        self.walls = set()
+        self.navigator = IncrementalNavigator(self.safe)
+
+    def safe(self, loc):
+        return (0 <= loc[0] < 8 and 0 <= loc[1] < 8 and
+                tuple(loc) not in self.walls)
+
+    def block(self, *squares):
+        self.walls.update(squares)
+        self.navigator.squares_changed(squares)
+
+    def test_reuses_path(self):
+        """
+        Tests that nothing is searched again while nothing has changed,
+        even as the agent moves along its path
+        """
+        start = (0, 0, EAST)
+        path = self.navigator.path_to(start, (5, 3))
+        self.assertEqual(9, len(path))
+
+        self.assertEqual(path, self.navigator.path_to(start, (5, 3)))
+        self.assertEqual(0, self.navigator.expanded)
+        moved = follow(start, path[:2]) + (EAST,)
+        self.assertEqual(path[2:], self.navigator.path_to(moved, (5, 3)))
+        self.assertEqual(0, self.navigator.expanded)
+        self.assertEqual(2, self.navigator.reused)
+
+    def test_keeps_path_past_lost_squares(self):
+        """
+        Tests that a path is given again when squares off it stop being
+        safe, and searched again when one on it does
+        """
+        start = (0, 0, EAST)
+        self.assertEqual(
+            [FORWARD] * 5, self.navigator.path_to(start, (5, 0))
+        )
+        self.block((2, 1), (3, 1))
+        self.assertEqual(
+            [FORWARD] * 5, self.navigator.path_to(start, (5, 0))
+        )
+        self.assertEqual(0, self.navigator.expanded)
+
+        self.block((3, 0))
+        path = self.navigator.path_to(start, (5, 0))
+        self.assertEqual((5, 0), follow(start, path))
+        self.assertNotIn((3, 0), squares_entered(start, path))
+        self.assertEqual(cheapest_cost(self.safe, start, (5, 0)), len(path))
+
+    def test_learns_from_searches(self):
+        """
+        Tests that a search after a square stops being safe expands fewer
+        states than a new search would
+        """
+        start = (0, 3, EAST)
+        self.block(*[(4, y) for y in xrange(7)])
+        self.navigator.path_to(start, (7, 3))
+        self.assertIn((3, 5), squares_entered(
+            start, self.navigator.path_to(start, (7, 3))
+        ))
+        self.block((3, 5))
+
+        path = self.navigator.path_to(start, (7, 3))
+        navigator = Navigator(self.safe)
+        self.assertEqual(len(navigator.path_to(start, (7, 3))), len(path))
+        self.assertLess(self.navigator.expanded, navigator.expanded)
+
+    def test_forgets_when_squares_open(self):
+        """
+        Tests that the cheaper path a square becoming safe opens up is
+        found
+        """
+        start = (0, 0, EAST)
+        self.block((2, 0))
+        self.assertEqual(10, len(self.navigator.path_to(start, (5, 0))))
+
+        self.walls.clear()
+        self.navigator.squares_changed([(2, 0)])
+        self.assertEqual(
+            [FORWARD] * 5, self.navigator.path_to(start, (5, 0))
+        )
+
+    def test_matches_search(self):
+        """
+        Tests that paths are as cheap as a new search would find, as the
+        agent moves and squares stop being safe, and now and then become
+        safe again or the goals change
+        """
+        navigator = Navigator(self.safe)
+        rng = random.Random(3)
+        goals = {(7, 7)}
+        start = (0, 0, EAST)
+        for turn in xrange(300):
+            square = (rng.randrange(8), rng.randrange(8))
+            if turn % 10 == 0:
+                self.walls.discard(square)
+            else:
+                self.walls.add(square)
+            self.navigator.squares_changed([square])
+            if turn % 25 == 0:
+                goals = {(rng.randrange(8), rng.randrange(8))
+                         for _ in xrange(rng.randrange(1, 3))}
+
+            found = self.navigator.path_to_nearest(start, goals)
+            expected = navigator.path_to_nearest(start, goals)
+            if expected is None:
+                self.assertIsNone(found)
+                start = (rng.randrange(8), rng.randrange(8), EAST)
+                continue
+            self.assertIn(found[0], goals)
+            self.assertEqual(found[0], follow(start, found[1]))
+            self.assertEqual(len(expected[1]), len(found[1]))
+            if found[1]:
+                pos, direction = action_result(
+                    start[:2], start[2], found[1][0]
+                )
+                start = tuple(pos) + (direction,)
+            else:
+                start = (rng.randrange(8), rng.randrange(8), start[2])
+
+
+class TestHierarchicalNavigation(unittest.TestCase):
+    def setUp(self):
+        # a wall down the middle of the board, with one gap in it
+        self.walls = {(12, y) for y in xrange(30) if y != 3}
+        self.navigator = HierarchicalNavigator(self.safe, 30, 30, 5)
+
+    def safe(self, loc):
+        return (0 <= loc[0] < 30 and 0 <= loc[1] < 30 and
+                tuple(loc) not in self.walls)
+
+    def check_path(self, start, goal, path):
+        self.assertEqual(goal, follow(start, path))
+        for square in squares_entered(start, path):
+            self.assertTrue(self.safe(square))
+        cheapest = cheapest_cost(self.safe, start, goal)
+        self.assertTrue(cheapest <= len(path) <= cheapest * 1.2)
+
+    def test_far_square(self):
+        """
+        Tests that a square many clusters away is reached through the
+        gap, at close to the cheapest cost
+        """
+        start = (0, 29, EAST)
+        path = self.navigator.path_to(start, (29, 29))
+        self.check_path(start, (29, 29), path)
+        self.assertIn((12, 3), squares_entered(start, path))
+
+    def test_changed_squares(self):
+        """
+        Tests that routes change with the safety of the squares along
+        them
+        """
+        start = (0, 29, EAST)
+        self.navigator.path_to(start, (29, 29))
+        self.walls ^= {(12, 3), (12, 27)}
+        self.navigator.squares_changed([(12, 3), (12, 27)])
+
+        path = self.navigator.path_to(start, (29, 29))
+        self.check_path(start, (29, 29), path)
+        self.assertIn((12, 27), squares_entered(start, path))
+
+        self.walls.add((12, 27))
+        self.navigator.squares_changed([(12, 27)])
+        self.assertIsNone(self.navigator.path_to(start, (29, 29)))
+
+    def test_near_squares(self):
+        """
+        Tests that nearby and multiple squares are searched for as by a
+        Navigator
+        """
+        navigator = Navigator(self.safe)
+        for start, goals in (((0, 0, SOUTH), {(3, 4)}),
+                             ((0, 0, SOUTH), {(20, 0), (0, 20)})):
+            self.assertEqual(navigator.path_to_nearest(start, goals),
+                             self.navigator.path_to_nearest(start, goals))
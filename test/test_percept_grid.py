@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from src import cell_types, percepts
+from src.board_state import BoardState, CompactBoardState
+from src.cell import Cell
+from src.directions import NORTH
+from src.generate_world import generate_world
+from src.percept_grid import (
+    percept_masks, board_percept_masks, board_hazard_counts
+)
+
+
+class TestPerceptMasks(unittest.TestCase):
+    def test_single_board(self):
+        """
+        Tests that hazards are sensed on adjacent squares and gold on its
+        own square
+        """
+        types = np.array([
+            [cell_types.PIT, cell_types.EMPTY, cell_types.EMPTY],
+            [cell_types.EMPTY, cell_types.EMPTY, cell_types.GOLD],
+            [cell_types.EMPTY, cell_types.WUMPUS, cell_types.EMPTY]
+        ], dtype=np.uint8)
+        expected = np.array([
+            [0, percepts.BREEZE_MASK, 0],
+            [percepts.BREEZE_MASK, percepts.STENCH_MASK,
+             percepts.GLITTER_MASK],
+            [percepts.STENCH_MASK, 0, percepts.STENCH_MASK]
+        ], dtype=np.uint8)
+        self.assertTrue((percept_masks(types) == expected).all())
+
+    def test_batch_does_not_bleed(self):
+        """
+        Tests that hazards on one board are not sensed on another
+        """
+        types = np.zeros((2, 3, 3), dtype=np.uint8)
+        types[0, 2, 2] = cell_types.PIT
+        masks = percept_masks(types)
+        self.assertEqual(2, np.count_nonzero(masks[0]))
+        self.assertEqual(0, np.count_nonzero(masks[1]))
+
+    def test_flat_board(self):
+        """
+        Tests that a flat board is reshaped by its width
+        """
+        cells = bytearray([cell_types.WUMPUS, 0, 0, 0, 0, 0])
+        self.assertEqual(
+            bytearray([0, percepts.STENCH_MASK, 0,
+                       percepts.STENCH_MASK, 0, 0]),
+            board_percept_masks(cells, 3)
+        )
+
+    def test_hazard_counts(self):
+        """
+        Tests that every pit and wumpus next to a square is counted
+        """
+        cells = bytearray([cell_types.PIT, cell_types.WUMPUS, cell_types.PIT,
+                           cell_types.EMPTY, cell_types.WUMPUS, 0])
+        pits, wumpuses = board_hazard_counts(cells, 3)
+        self.assertEqual(bytearray([0, 2, 0, 1, 0, 1]), pits)
+        self.assertEqual(bytearray([1, 1, 1, 1, 1, 1]), wumpuses)
+
+
+class TestEagerPercepts(unittest.TestCase):
+    def assert_matches_lazy(self, world, lazy):
+        for row in xrange(len(lazy.board)):
+            for col in xrange(len(lazy.board[row])):
+                world.pos = lazy.pos = [col, row]
+                self.assertEqual(
+                    lazy.get_board_percepts(), world.get_board_percepts()
+                )
+                self.assertEqual(
+                    percepts.to_mask(lazy.get_board_percepts()),
+                    world.get_board_percept_mask()
+                )
+
+    def test_matches_lazy(self):
+        """
+        Tests that eager percepts match the lazily computed ones on every
+        square of generated worlds
+        """
+        for compact in (False, True):
+            for _ in xrange(5):
+                world = generate_world(
+                    10, .1, .2, .2, compact=compact, eager_percepts=True
+                )
+                self.assertIsNotNone(world.percept_masks)
+                lazy = BoardState(
+                    [[Cell(cell.cell_type) for cell in row]
+                     for row in world.board],
+                    world.pos, world.direction
+                )
+                self.assert_matches_lazy(world, lazy)
+
+    def test_kill_wumpus(self):
+        """
+        Tests that killing a wumpus clears the stench around it
+        """
+        cells = bytearray([0, cell_types.WUMPUS, 0, 0, 0, 0])
+        world = CompactBoardState(cells, 3, [0, 0], NORTH)
+        world.precompute_percepts()
+        self.assertIn(percepts.STENCH, world.get_board_percepts())
+        world.kill_wumpus([1, 0])
+        self.assertEqual(0, world.get_board_percept_mask())
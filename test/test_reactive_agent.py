@@ -0,0 +1,23 @@
+import logging
+import unittest
+
+from src import environment, reactive_agent
+from src.generate_world import world_seed
+
+
+class TestReactiveAgent(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('test_reactive_agent')
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+
+    def test_never_dies_twice_in_one_place(self):
+        """
+        Tests that the agent learns from every death, including after
+        bumping part way along a path
+        """
+        for index in xrange(10):
+            world, env = environment.new_game(25, seed=world_seed(0, index))
+            reactive_agent.run(env, self.logger)
+            places = [tuple(pos) for _, pos, _ in env.deaths]
+            self.assertEqual(len(set(places)), len(places))
@@ -0,0 +1,52 @@
+import unittest
+
+from src import cell_types
+from src.board_state import BoardState, CompactBoardState, move
+from src.cell import Cell
+from src.directions import DIRECTIONS, EAST, NORTH, SOUTH, WEST
+from src.squares import Squares
+
+
+class TestSquares(unittest.TestCase):
+    def test_steps_match_positions(self):
+        """
+        Tests that stepping from every square in every direction lands on
+        the index of the position moved to, or -1 off the board
+        """
+        squares = Squares(4, 3)
+        for row in xrange(3):
+            for col in xrange(4):
+                square = squares.index([col, row])
+                self.assertEqual([col, row], squares.position(square))
+                for direction in DIRECTIONS:
+                    next_col, next_row = move([col, row], direction)
+                    on_board = 0 <= next_col < 4 and 0 <= next_row < 3
+                    self.assertEqual(
+                        squares.index([next_col, next_row]) if on_board
+                        else -1,
+                        squares.step(square, direction)
+                    )
+
+    def test_edges(self):
+        """
+        Tests that a corner square only has neighbors inside the board
+        """
+        squares = Squares(4, 3)
+        self.assertEqual([1, 4], sorted(squares.adjacent(0)))
+        self.assertEqual(-1, squares.step(11, SOUTH))
+        self.assertEqual(-1, squares.step(11, EAST))
+        self.assertEqual(7, squares.step(11, NORTH))
+        self.assertEqual(10, squares.step(11, WEST))
+
+    def test_position_kept_as_square(self):
+        """
+        Tests that the agent's position is kept as a square, on both kinds
+        of board
+        """
+        row = [cell_types.EMPTY] * 4
+        grid = BoardState([[Cell(cell) for cell in row]] * 3, [3, 2], NORTH)
+        compact = CompactBoardState(bytearray(row * 3), 4, (3, 2), NORTH)
+        self.assertEqual(11, grid.square)
+        self.assertEqual([3, 2], compact.pos)
+        compact.pos = [1, 1]
+        self.assertEqual(5, compact.square)
@@ -0,0 +1,80 @@
+import unittest
+
+from src import reactive_agent
+from src.tournament import TournamentResults, run_tournament
+
+
+def without_timing(summary):
+    return {key: value for key, value in summary.iteritems()
+            if key not in ('seconds', 'games_per_second')}
+
+
+class TestTournamentResults(unittest.TestCase):
+    def test_summary(self):
+        """
+        Tests that game results are summed up whatever order they come in
+        """
+        results = TournamentResults()
+        for result in ((3, -20, False, 1, 20), (0, 990, True, 0, 10),
+                       (1, -1010, False, 1, 10), (2, 980, True, 0, 20)):
+            results.add(result)
+        summary = results.summary()
+
+        self.assertEqual(4, summary['games'])
+        self.assertEqual(235, summary['mean_score'])
+        self.assertEqual(-1010, summary['score_percentiles'][5])
+        self.assertEqual(-20, summary['score_percentiles'][50])
+        self.assertEqual(990, summary['score_percentiles'][95])
+        self.assertEqual(0.5, summary['win_rate'])
+        self.assertEqual(2, summary['deaths'])
+        self.assertEqual(0.5, summary['deaths_per_game'])
+        self.assertEqual(15, summary['actions_per_game'])
+
+    def test_no_games(self):
+        """
+        Tests that a tally with no games in it is summed up without a
+        mean, rather than dividing by zero
+        """
+        summary = TournamentResults().summary()
+
+        self.assertEqual(0, summary['games'])
+        self.assertIsNone(summary['mean_score'])
+        self.assertIsNone(summary['score_percentiles'][50])
+        self.assertIsNone(summary['win_rate'])
+        self.assertEqual(0, summary['deaths'])
+        self.assertIsNone(summary['deaths_per_game'])
+        self.assertIsNone(summary['actions_per_game'])
+
+
+class TestRunTournament(unittest.TestCase):
+    def test_same_in_pool(self):
+        """
+        Tests that a tournament comes out the same played in this process
+        or in a pool of processes
+        """
+        played = []
+        alone = run_tournament(reactive_agent.run, 8, size=5, seed=3,
+                               processes=1, on_result=played.append)
+        pooled = run_tournament(reactive_agent.run, 8, size=5, seed=3,
+                                processes=2)
+
+        self.assertEqual(without_timing(alone), without_timing(pooled))
+        self.assertEqual(range(8), sorted(result[0] for result in played))
+
+    def test_no_games(self):
+        """
+        Tests that a tournament of no games is refused
+        """
+        with self.assertRaises(ValueError):
+            run_tournament(reactive_agent.run, 0, processes=1)
+
+    def test_board_size(self):
+        """
+        Tests that a board size past the cap is refused before any game is
+        played, and played once the cap is raised
+        """
+        with self.assertRaises(ValueError):
+            run_tournament(reactive_agent.run, 2, size=30, processes=1)
+        summary = run_tournament(reactive_agent.run, 2, size=(30, 6),
+                                 processes=1, max_size=30)
+        self.assertEqual(2, summary['games'])
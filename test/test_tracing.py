@@ -0,0 +1,66 @@
+import logging
+import unittest
+from io import BytesIO
+
+from src import actions, environment, reactive_agent, tracing
+from src.generate_world import world_seed
+
+
+class TestRingTracer(unittest.TestCase):
+    def test_keeps_newest(self):
+        """
+        Tests that a full ring buffer keeps the newest events in order
+        """
+        tracer = tracing.RingTracer(capacity=3)
+        for turn in xrange(5):
+            tracer.record(tracing.ACTION, turn, actions.LEFT)
+        self.assertEqual(
+            [(tracing.ACTION, turn, actions.LEFT, 0, 0)
+             for turn in (2, 3, 4)],
+            list(tracer.events())
+        )
+        self.assertEqual('     4  \tTurn left', tracer.dump()[-1])
+
+
+class TestBinaryTracer(unittest.TestCase):
+    def test_read_back(self):
+        """
+        Tests that the events written to a binary trace are read back
+        """
+        output = BytesIO()
+        tracer = tracing.BinaryTracer(output)
+        tracer.record(tracing.PERCEPTS, 0, 3)
+        tracer.record(tracing.DESTINATION, 1, 4, -1, True)
+        tracer.close()
+        self.assertEqual(
+            [(tracing.PERCEPTS, 0, 3, 0, 0),
+             (tracing.DESTINATION, 1, 4, -1, 1)],
+            list(tracing.read_trace(BytesIO(output.getvalue())))
+        )
+
+
+class TestAgentTrace(unittest.TestCase):
+    def test_actions_traced(self):
+        """
+        Tests that every action the agent takes is traced, and that a
+        silent logger turns tracing off
+        """
+        world, env = environment.new_game(10, seed=world_seed(0, 1))
+        tracer = tracing.RingTracer(capacity=100000)
+        reactive_agent.run(env, tracer=tracer)
+        events = list(tracer.events())
+
+        self.assertEqual(
+            list(env.actions),
+            [first for kind, _, first, _, _ in events
+             if kind == tracing.ACTION] +
+            ([actions.GRAB] if env.is_finished() else [])
+        )
+        self.assertNotIn(tracing.CACHE_STATS,
+                         [kind for kind, _, _, _, _ in events])
+        for event in events:
+            tracing.describe(event)
+
+        logger = logging.getLogger('test_tracing')
+        logger.setLevel(logging.WARNING)
+        self.assertFalse(tracing.tracer_for(logger).enabled)
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from src import actions, environment
+from src.generate_world import generate_worlds, world_seed
+from src.vec_environment import VecEnvironment
+
+
+class TestVecEnvironment(unittest.TestCase):
+    def test_matches_environment(self):
+        """
+        Tests that games played in lockstep go exactly as they do when
+        played one at a time
+        """
+        worlds = [environment.new_game(8, True, seed=world_seed(4, index))[0]
+                  for index in xrange(60)]
+        vec_env = VecEnvironment.from_board_states(worlds)
+        envs = [environment.Environment(world) for world in worlds]
+        rng = np.random.RandomState(0)
+
+        for _ in xrange(300):
+            chosen = rng.choice(actions.ACTIONS, len(envs),
+                                p=[.2, .2, .4, .1, .1])
+            masks, rewards, done = vec_env.step(chosen)
+            for index, env in enumerate(envs):
+                score = env.score
+                env.perform_action(chosen[index])
+                self.assertEqual(env.get_percept_mask(), masks[index])
+                self.assertEqual(env.score - score, rewards[index])
+                self.assertEqual(env.is_finished(), done[index])
+
+        self.assertEqual([env.score for env in envs], list(vec_env.scores))
+        self.assertEqual([len(env.kills) for env in envs],
+                         list(vec_env.kills))
+        self.assertEqual([env.board_state.pos for env in envs],
+                         np.column_stack((vec_env.cols, vec_env.rows))
+                         .tolist())
+        self.assertGreater(vec_env.kills.sum(), 0)
+        self.assertGreater(vec_env.deaths.sum(), 0)
+
+    def test_from_batch(self):
+        """
+        Tests that a generated batch starts in the same state as its
+        worlds
+        """
+        batch = generate_worlds(5, 6, .1, .1, .1, rng=3)
+        vec_env = VecEnvironment.from_batch(batch)
+        self.assertEqual(
+            [environment.Environment(world).get_percept_mask()
+             for world in batch],
+            list(vec_env.get_percept_masks())
+        )
+        self.assertEqual([world.arrows for world in batch],
+                         list(vec_env.arrows))